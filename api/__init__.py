@@ -20,6 +20,13 @@ from api.perizinan import perizinan_ns
 from api.presensi import presensi_ns
 from api.lembur import lembur_ns
 from api.dashboard import dashboard_ns
+from api.commands import face_cli, rekap_cli
+from api.utils.config import engine
+from api.utils.db import init_request_db
+from api.utils.decorator import kiosk_token_scope
+from api.utils.sql_metrics import init_sql_metrics
+from api.utils.metrics import init_metrics
+from api.utils.json_encoder import init_json
 
 app = Flask(__name__)
 CORS(app)
@@ -35,7 +42,26 @@ app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(
     days=int(os.getenv("JWT_REFRESH_EXPIRES", 7))
 )
 
-JWTManager(app)
+jwt = JWTManager(app)
+jwt.token_verification_loader(kiosk_token_scope)
+
+# ==============================
+# DATABASE: SATU TRANSAKSI PER REQUEST + INSTRUMENTASI SQL
+# ==============================
+# sql_metrics didaftarkan lebih dulu → after_request-nya jalan setelah commit
+init_sql_metrics(app, engine.raw)
+init_request_db(app)
+
+# ==============================
+# METRICS PROMETHEUS (/metrics)
+# ==============================
+init_metrics(app, engine.raw)
+
+# ==============================
+# CLI COMMANDS (flask --app api ...)
+# ==============================
+app.cli.add_command(face_cli)
+app.cli.add_command(rekap_cli)
 
 # ==============================
 # SWAGGER AUTH CONFIG
@@ -63,6 +89,9 @@ api = Api(
     security="Bearer Auth"
 )
 
+# Encoder JSON cepat (orjson) untuk semua response RESTX
+init_json(api)
+
 # ==============================
 # REGISTER NAMESPACES
 # ==============================
@@ -82,12 +111,16 @@ api.add_namespace(dashboard_ns, path="/dashboard")
 # ==============================
 @api.errorhandler(AppError)
 def handle_app_error_restx(error: AppError):
-    return {
+    body = {
         "success": False,
         "message": error.message,
         "code": error.status_code,
         "errors": error.errors
-    }, error.status_code
+    }
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after:
+        return body, error.status_code, {"Retry-After": str(retry_after)}
+    return body, error.status_code
 
 # @api.errorhandler(Exception)
 # def handle_unexpected_error_restx(error):
@@ -3,18 +3,26 @@ import os
 from dotenv import load_dotenv
 from flask_restx import Namespace, Resource
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import date, datetime, time, timedelta
 from flask_restx import reqparse
 from werkzeug.datastructures import FileStorage
 
-from api.shared.exceptions import ValidationError
+from api.shared.exceptions import NotFoundError, ValidationError
 from api.shared.helper import count_hari_dalam_bulan, get_wita
 from api.shared.response import success
-from api.utils.decorator import measure_execution_time
+from api.utils.decorator import measure_execution_time, role_required
 from api.query.q_absensi import *
-from api.utils.face import verify_face
-from api.utils.geo import find_valid_lokasi
+from api.query.q_master import get_lokasi_absensi_by_id
+from api.query.q_rekap import refresh_rekap
+from api.utils.config import FACE_KIOSK_TOLERANCE
+from api.utils.db import release_request_connection
+from api.utils.face import encode_live_face, precheck_face_image, verify_face
+from api.utils.face_index import identify_face
+from api.utils.geo import find_nearest_lokasi
+from api.utils.kalender import hari_libur, jumlah_hari_kerja
+from api.utils.lokasi_cache import get_lokasi_arrays
+from api.utils.akses_cache import get_allowed_lokasi_ids_cached, is_pegawai_wfh_cached
 from api.utils.time_calc import *
 
 absensi_ns = Namespace("absensi", description="Absensi Pegawai")
@@ -27,6 +35,9 @@ validate_parser.add_argument("latitude", type=float, location="form", required=T
 validate_parser.add_argument("longitude", type=float, location="form", required=True, help="Longitude lokasi absensi")
 validate_parser.add_argument("id_jam_kerja", type=int, required=False, help="ID jam kerja (opsional, default Normal)")
 
+kiosk_parser = reqparse.RequestParser()
+kiosk_parser.add_argument("file", type=FileStorage, location="files", required=True, help="Foto wajah pegawai")
+
 absensi_basic_parser = reqparse.RequestParser()
 absensi_basic_parser.add_argument("tanggal", type=str, required=False, location="args", help="format: YYYY-MM-DD")
 
@@ -39,21 +50,24 @@ absensi_bulanan_parser.add_argument("tahun", type=int, required=False, help="Tah
 # ==================================================
 # FUNGSI HELPER UNTUK VALIDASI LOKASI
 # ==================================================
-def validate_lokasi_absensi(id_pegawai: int, latitude: float, longitude: float) -> dict:
+def validate_lokasi_absensi(id_pegawai: int, latitude: float, longitude: float, akses: dict = None) -> dict:
     """
     Validasi lokasi absensi:
     - Lokasi fisik → radius + akses pegawai
     - Jika gagal → cek WFH
+    akses (opsional): lokasi_ids & is_wfh yang sudah dimuat (context check-in),
+    jika kosong diambil dari cache akses pegawai.
     """
 
-    # 1️⃣ Ambil semua lokasi aktif
-    all_lokasi = get_all_lokasi_absensi()
+    # 1️⃣ Lokasi aktif dari cache proses (array NumPy)
+    lokasi_arrays = get_lokasi_arrays()
 
-    lokasi_valid = find_valid_lokasi(latitude=latitude, longitude=longitude, lokasi_list=all_lokasi)
+    lokasi_valid = find_nearest_lokasi(latitude=latitude, longitude=longitude, arrays=lokasi_arrays)
 
     # 2️⃣ Jika lokasi fisik TIDAK valid → cek WFH
     if not lokasi_valid:
-        if is_pegawai_wfh(id_pegawai):
+        is_wfh = akses["is_wfh"] if akses else is_pegawai_wfh_cached(id_pegawai)
+        if is_wfh:
             return {
                 "id_lokasi": os.getenv("ID_LOKASI_WFH"),
                 "nama_lokasi": "WFH",
@@ -61,15 +75,23 @@ def validate_lokasi_absensi(id_pegawai: int, latitude: float, longitude: float)
             }
         raise ValidationError("Anda tidak berada di lokasi absensi yang diizinkan")
 
-    # 3️⃣ Lokasi fisik valid → cek akses pegawai
-    allowed_lokasi_ids = get_allowed_lokasi_ids_pegawai(id_pegawai)
-
-    if lokasi_valid["id_lokasi"] not in allowed_lokasi_ids:
+    # 3️⃣ Lokasi fisik valid → cari yang terdekat di antara lokasi milik pegawai
+    #    (radius lokasi bisa beririsan)
+    allowed_lokasi_ids = akses["lokasi_ids"] if akses else get_allowed_lokasi_ids_cached(id_pegawai)
+    lokasi_pegawai = find_nearest_lokasi(
+        latitude=latitude,
+        longitude=longitude,
+        arrays=lokasi_arrays,
+        allowed_ids=allowed_lokasi_ids
+    )
+
+    if not lokasi_pegawai:
         raise ValidationError(
             f"Anda berada di {lokasi_valid['nama_lokasi']}, "
             "namun tidak terdaftar di lokasi tersebut"
         )
 
+    lokasi_valid = lokasi_pegawai
     lokasi_valid["is_wfh"] = False
     return lokasi_valid
 
@@ -213,26 +235,28 @@ class AbsensiCheckInResource(Resource):
         now = get_wita()
         jam_masuk = now.time()
 
-        # 2️⃣ Validasi awal
-        if is_already_checkin(id_pegawai):
+        # 2️⃣ Validasi awal (semua data validasi diambil dalam satu query)
+        context = get_checkin_context(id_pegawai, id_jam_kerja)
+        if context["is_already_checkin"]:
             raise ValidationError("Anda masih memiliki absensi aktif")
 
-        if not verify_face(id_pegawai, file):
+        if not verify_face(id_pegawai, file, face_data=context["face_data"]):
             raise ValidationError("Wajah tidak cocok dengan data pegawai")
 
         # 3️⃣ Validasi lokasi
         lokasi_valid = validate_lokasi_absensi(
             id_pegawai=id_pegawai,
             latitude=latitude,
-            longitude=longitude
+            longitude=longitude,
+            akses=context["akses"]
         )
 
         # 4️⃣ Validasi jam kerja pegawai
-        if not is_valid_jam_kerja_pegawai(id_pegawai, id_jam_kerja):
+        if not context["is_valid_jam_kerja"]:
             raise ValidationError("Anda tidak diperbolehkan mengambil jam kerja ini")
 
         # 5️⃣ Hitung keterlambatan (pakai jam mulai shift)
-        jam_kerja = get_jam_kerja_by_id(id_jam_kerja)
+        jam_kerja = context["jam_kerja"]
         if not jam_kerja:
             raise ValidationError("Jam kerja tidak valid")
 
@@ -241,50 +265,37 @@ class AbsensiCheckInResource(Resource):
             now=now,
             jam_mulai_shift=jam_mulai_kerja
         )
-        print(tanggal)
         menit_terlambat = hitung_menit_terlambat(
             jam_masuk=jam_masuk,
             jam_mulai_kerja=jam_mulai_kerja
         )
 
-        # 6️⃣ Simpan absensi
-        id_absensi = insert_absensi_masuk(
+        # =====================================================
+        # ISTIRAHAT OTOMATIS UNTUK SHIFT CLEANING
+        # =====================================================
+        istirahat = None
+        if id_jam_kerja in [2, 3]:
+            # Shift 2 (Pagi): 12:00 - 14:00
+            # Shift 3 (Malam): 00:00 - 02:00
+            istirahat = {
+                "jam_mulai": time(12, 0) if id_jam_kerja == 2 else time(0, 0),
+                "jam_selesai": time(14, 0) if id_jam_kerja == 2 else time(2, 0),
+                "durasi_menit": 120,
+                "id_lokasi_balik": lokasi_valid["id_lokasi"]  # Gunakan lokasi check-in awal
+            }
+
+        # 6️⃣ Simpan absensi (+ istirahat otomatis) dalam satu transaksi
+        id_absensi = insert_absensi_checkin(
             id_pegawai=id_pegawai,
             tanggal=tanggal,
             jam_masuk=jam_masuk,
             id_lokasi_masuk=lokasi_valid["id_lokasi"],
             id_jam_kerja=id_jam_kerja,
-            menit_terlambat=menit_terlambat
+            menit_terlambat=menit_terlambat,
+            istirahat=istirahat
         )
-        
-        # =====================================================
-        # SIMPAN ISTIRAHAT OTOMATIS UNTUK SHIFT CLEANING
-        # =====================================================
-        if id_jam_kerja in [2, 3]:
-            # Tentukan jam istirahat berdasarkan shift
-            # Shift 2 (Pagi): 12:00 - 14:00
-            # Shift 3 (Malam): 00:00 - 02:00
-            start_time = time(12, 0) if id_jam_kerja == 2 else time(0, 0)
-            end_time = time(14, 0) if id_jam_kerja == 2 else time(2, 0)
-            # 1. Insert mulai istirahat
-            id_istirahat = insert_istirahat_mulai(
-                id_absensi=id_absensi,
-                jam_mulai=start_time
-            )
-            # 2. Update selesai istirahat (Auto)
-            update_istirahat_selesai(
-                id_istirahat=id_istirahat,
-                jam_selesai=end_time,
-                durasi_menit=120,
-                id_lokasi_balik=lokasi_valid["id_lokasi"], # Gunakan lokasi check-in awal
-            )
-            # 3. Akumulasi ke table utama absensi
-            add_total_menit_istirahat(
-                id_absensi=id_absensi,
-                durasi_menit=120
-            )
-        # =====================================================
-        
+        refresh_rekap(tanggal, tanggal, id_pegawai)
+
         # 7️⃣ Response
         return success(
             message="Absensi masuk berhasil",
@@ -368,6 +379,52 @@ class AbsensiCheckoutResource(Resource):
 
 
 
+# ==================================================
+# ENDPOINT KIOSK: IDENTIFIKASI WAJAH 1:N PER LOKASI
+# ==================================================
+@absensi_ns.route("/kiosk/identifikasi")
+class AbsensiKioskIdentifikasiResource(Resource):
+
+    @role_required("kiosk")
+    @absensi_ns.expect(kiosk_parser)
+    @measure_execution_time
+    def post(self):
+        """(kiosk) Identifikasi pegawai dari wajah di lokasi perangkat"""
+        args = kiosk_parser.parse_args()
+
+        # lokasi diambil dari token perangkat (POST /auth/kiosk/token),
+        # bukan dari form → tablet tidak bisa mencari pegawai lokasi lain
+        id_lokasi = get_jwt().get("id_lokasi")
+        if not id_lokasi or not get_lokasi_absensi_by_id(id_lokasi):
+            raise NotFoundError("Lokasi kiosk tidak ditemukan atau tidak aktif")
+        # koneksi request tidak ditahan selama antre / job encoding di pool
+        release_request_connection()
+
+        file = args["file"]
+        file.stream.seek(0)
+        live_bytes = file.stream.read()
+
+        precheck_face_image(live_bytes)
+
+        live_encoding = encode_live_face(live_bytes)
+        if live_encoding is None:
+            raise ValidationError("Wajah tidak terdeteksi dengan jelas")
+
+        pegawai = identify_face(
+            id_lokasi=id_lokasi,
+            live_encoding=live_encoding,
+            tolerance=FACE_KIOSK_TOLERANCE
+        )
+        if not pegawai:
+            raise ValidationError("Wajah tidak dikenali di lokasi ini")
+
+        return success(
+            data=pegawai,
+            message="Pegawai teridentifikasi"
+        )
+
+
+
 # ====================================================
 # ENDPOINT ISTIRAHAT MULAI DAN SELESAI PEGAWAI (ABSEN)
 # ====================================================
@@ -595,7 +652,7 @@ class AbsensiListBasicBulananResource(Resource):
 
         pegawai = get_pegawai_basic(id_pegawai)
         absensi_map = get_absensi_bulanan(id_pegawai, start_date, end_date)
-        hari_libur_set = get_hari_libur_map(start_date, end_date)
+        hari_libur_set = hari_libur(start_date, end_date)
 
         hasil = []
         current_date = start_date
@@ -667,20 +724,6 @@ class AbsensiListBasicBulananResource(Resource):
         )
 
 
-def hitung_hari_kerja_efektif(start_date, end_date):
-    hari_libur = get_hari_libur_map(start_date, end_date)
-
-    total = 0
-    current = start_date
-
-    while current <= end_date:
-        # weekday(): Senin=0 ... Minggu=6
-        if current.weekday() != 6 and current not in hari_libur:
-            total += 1
-        current += timedelta(days=1)
-
-    return total
-
 @absensi_ns.route("/rekap-basic")
 class AbsensiRekapBasicBulananResource(Resource):
 
@@ -708,7 +751,7 @@ class AbsensiRekapBasicBulananResource(Resource):
         pegawai = get_pegawai_basic(id_pegawai)
         rekap = get_rekap_basic_absensi_bulanan(id_pegawai, start_date, end_date)
 
-        hari_kerja_efektif = hitung_hari_kerja_efektif(start_date, end_date)
+        hari_kerja_efektif = jumlah_hari_kerja(start_date, end_date)
 
         total_hadir = rekap["total_hadir"] or 0
         total_izin = 0   # dummy
@@ -1,13 +1,16 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
+from datetime import timedelta
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity
 from werkzeug.security import check_password_hash, generate_password_hash
 
 # Import local functions and modules
 from api.shared.response import success
-from api.shared.exceptions import AuthError, ValidationError
-from api.utils.decorator import measure_execution_time
+from api.shared.exceptions import AuthError, NotFoundError, ValidationError
+from api.utils.config import KIOSK_TOKEN_EXPIRES_DAYS
+from api.utils.decorator import measure_execution_time, role_required
 from api.query.q_auth import *
+from api.query.q_master import get_lokasi_absensi_by_id
 
 auth_ns = Namespace("auth", description="Authentication & Authorization")
 
@@ -23,6 +26,11 @@ pegawai_login_model = auth_ns.model("PegawaiLoginRequest", {
     }
 )
 
+kiosk_token_model = auth_ns.model("KioskTokenRequest", {
+        "id_lokasi": fields.Integer(required=True, description="ID lokasi perangkat kiosk", example=1)
+    }
+)
+
 change_password_model = auth_ns.model("ChangePasswordRequest", {
         "old_password": fields.String(required=True, description="Password lama", example="passwordlama"),
         "new_password": fields.String(required=True, description="Password baru", example="passwordbaru123")
@@ -175,8 +183,53 @@ class PegawaiLoginResource(Resource):
                 }
             }
         )
-        
-        
+
+
+
+# ======================================
+# Token perangkat kiosk (per lokasi)
+# ======================================
+@auth_ns.route("/kiosk/token")
+class KioskTokenResource(Resource):
+
+    @role_required("admin")
+    @auth_ns.expect(kiosk_token_model, validate=True)
+    @measure_execution_time
+    def post(self):
+        """Akses: (admin), Terbitkan token tablet kiosk untuk satu lokasi"""
+        body = request.get_json(silent=True) or {}
+        id_lokasi = body.get("id_lokasi")
+
+        lokasi = get_lokasi_absensi_by_id(id_lokasi)
+        if not lokasi:
+            raise NotFoundError("Lokasi absensi tidak ditemukan atau tidak aktif")
+
+        # Token hanya berlaku untuk endpoint kiosk di lokasi ini. Tanpa refresh
+        # token → diperpanjang dengan diterbitkan ulang oleh admin; lokasi yang
+        # dinonaktifkan langsung membuat token ditolak di endpoint kiosk.
+        access_token = create_access_token(
+            identity=str(lokasi["id_lokasi"]),
+            additional_claims={
+                "account_type": "kiosk",
+                "id_lokasi": lokasi["id_lokasi"],
+                "id_admin": get_jwt_identity()
+            },
+            expires_delta=timedelta(days=KIOSK_TOKEN_EXPIRES_DAYS)
+        )
+
+        return success(
+            data={
+                "access_token": access_token,
+                "lokasi": {
+                    "id_lokasi": lokasi["id_lokasi"],
+                    "nama_lokasi": lokasi["nama_lokasi"]
+                },
+                "expires_in_days": KIOSK_TOKEN_EXPIRES_DAYS
+            },
+            message="Token kiosk berhasil dibuat"
+        )
+
+
 @auth_ns.route("/logout")
 class LogoutResource(Resource):
 
@@ -0,0 +1,106 @@
+# api/commands.py
+import click
+from calendar import monthrange
+from datetime import datetime, timedelta
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+from api.utils.config import engine
+from api.shared.helper import get_wita
+
+
+face_cli = AppGroup("face", help="Perintah maintenance data wajah pegawai")
+
+
+# ==================================================
+# BACKFILL ENCODING WAJAH DARI FOTO CDN
+# ==================================================
+@face_cli.command("backfill")
+@click.option("--all", "semua", is_flag=True, help="Hitung ulang semua, termasuk yang sudah punya encoding")
+def backfill_face_encoding(semua):
+    """Hitung & simpan face_encoding untuk semua wajah yang sudah di-enroll"""
+    from api.utils.face import download_reference_encoding, update_pegawai_face_encoding
+
+    sql = """
+        SELECT id_pegawai, img_path
+        FROM auth_pegawai
+        WHERE status = 1
+          AND img_path IS NOT NULL
+    """
+    if not semua:
+        sql += " AND face_encoding IS NULL"
+    sql += " ORDER BY id_pegawai ASC"
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql)).mappings().all()
+
+    berhasil = gagal = 0
+    for row in rows:
+        try:
+            encoding = download_reference_encoding(row["img_path"])
+        except Exception as e:
+            click.echo(f"[GAGAL] pegawai {row['id_pegawai']}: {e}")
+            gagal += 1
+            continue
+
+        if encoding is None:
+            click.echo(f"[GAGAL] pegawai {row['id_pegawai']}: wajah tidak terdeteksi")
+            gagal += 1
+            continue
+
+        update_pegawai_face_encoding(row["id_pegawai"], encoding)
+        berhasil += 1
+
+    click.echo(f"Selesai: {berhasil} berhasil, {gagal} gagal dari {len(rows)} data")
+
+
+
+rekap_cli = AppGroup("rekap", help="Perintah maintenance rollup rekap presensi")
+
+
+# ==================================================
+# REBUILD & CEK KONSISTENSI ROLLUP REKAP PRESENSI
+# ==================================================
+def _parse_tanggal(value, default):
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise click.BadParameter("Format tanggal harus YYYY-MM-DD")
+
+
+@rekap_cli.command("rebuild")
+@click.option("--dari", help="Tanggal awal (YYYY-MM-DD), default awal bulan ini")
+@click.option("--sampai", help="Tanggal akhir (YYYY-MM-DD), default akhir bulan ini")
+@click.option("--pegawai", "id_pegawai", type=int, help="Hanya satu pegawai")
+@click.option("--cek", is_flag=True, help="Hanya cek konsistensi, tanpa menulis ulang")
+def rebuild_rekap(dari, sampai, id_pegawai, cek):
+    """Bangun ulang rekap_harian & rekap_bulanan dari absensi, izin, dan hari libur"""
+    from api.query.q_rekap import cek_rekap, refresh_rekap
+
+    today = get_wita().date()
+    start_date = _parse_tanggal(dari, today.replace(day=1))
+    end_date = _parse_tanggal(sampai, today.replace(day=monthrange(today.year, today.month)[1]))
+    if end_date < start_date:
+        raise click.BadParameter("--sampai tidak boleh lebih kecil dari --dari")
+
+    if not cek:
+        # per bulan → transaksi kecil, progres terlihat
+        current = start_date
+        while current <= end_date:
+            akhir_bulan = current.replace(day=monthrange(current.year, current.month)[1])
+            batas = min(akhir_bulan, end_date)
+            refresh_rekap(current, batas, id_pegawai)
+            click.echo(f"[OK] {current.isoformat()} s/d {batas.isoformat()}")
+            current = batas + timedelta(days=1)
+
+    selisih = cek_rekap(start_date, end_date, id_pegawai)
+    if selisih["harian"] or selisih["bulanan"]:
+        click.echo(
+            f"Tidak konsisten: {selisih['harian']} baris harian, "
+            f"{selisih['bulanan']} baris bulanan berbeda"
+        )
+        raise SystemExit(1)
+
+    click.echo("Rollup rekap konsisten")
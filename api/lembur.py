@@ -4,8 +4,9 @@ from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity
 from werkzeug.datastructures import FileStorage
 from datetime import datetime, date, time
 
-from api.shared.response import success
+from api.shared.response import success, success_stream
 from api.shared.exceptions import ValidationError
+from api.utils.db import release_request_connection
 from api.utils.decorator import measure_execution_time, role_required
 from api.query.q_lembur import *
 from api.utils.uploader import upload_lampiran_izin_to_cdn
@@ -352,12 +353,14 @@ class LemburListResource(Resource):
             status_approval=args.get("status_approval"),
             id_departemen=args.get("id_departemen"),
             id_status_pegawai=args.get("id_status_pegawai"),
-            id_pegawai=args.get("id_pegawai")  # 🔹 TAMBAHAN
+            id_pegawai=args.get("id_pegawai"),  # 🔹 TAMBAHAN
+            stream=True
         )
 
-        return success(
+        # dikirim bertahap per chunk cursor (bulan dengan lembur banyak)
+        return success_stream(
             message="Data lembur berhasil dimuat",
-            data=[
+            items=(
                 {
                     "id_lembur": r["id_lembur"],
                     "id_pegawai": r["id_pegawai"],
@@ -381,8 +384,9 @@ class LemburListResource(Resource):
                     "path_lampiran": r["path_lampiran"],
                     "alasan_penolakan": r["alasan_penolakan"]
                 }
-                for r in rows
-            ]
+                for chunk in rows
+                for r in chunk
+            )
         )
 
 
@@ -436,6 +440,8 @@ class LemburUpdateResource(Resource):
         # Upload lampiran jika ada
         path_lampiran = lembur["path_lampiran"]
         if args.get("lampiran"):
+            # koneksi request tidak ditahan selama upload CDN
+            release_request_connection()
             path_lampiran = upload_lampiran_izin_to_cdn(args["lampiran"])
 
         update_lembur_admin(
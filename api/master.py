@@ -5,8 +5,9 @@ from datetime import datetime
 
 from api.shared.response import success
 from api.shared.exceptions import ValidationError, NotFoundError
-from api.utils.decorator import measure_execution_time, role_required
+from api.utils.decorator import conditional_get, measure_execution_time, role_required
 from api.query.q_master import *
+from api.query.q_rekap import refresh_rekap
 
 
 master_ns = Namespace("master", description="Master Data")
@@ -83,6 +84,7 @@ hari_libur_model = master_ns.model("HariLibur", {
 class StatusPegawaiListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_status_pegawai")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list status pegawai"""
@@ -108,6 +110,7 @@ class StatusPegawaiListResource(Resource):
 class StatusPegawaiDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_status_pegawai")
     @measure_execution_time
     def get(self, id_status_pegawai):
         """Akses: (admin, pegawai), Get status pegawai by id"""
@@ -153,6 +156,7 @@ class StatusPegawaiDetailResource(Resource):
 class DepartemenListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_departemen")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list departemen"""
@@ -178,6 +182,7 @@ class DepartemenListResource(Resource):
 class DepartemenDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_departemen")
     @measure_execution_time
     def get(self, id_departemen):
         """Akses: (admin, pegawai), Get departemen by id"""
@@ -223,6 +228,7 @@ class DepartemenDetailResource(Resource):
 class JabatanListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jabatan")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list jabatan"""
@@ -248,6 +254,7 @@ class JabatanListResource(Resource):
 class JabatanDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jabatan")
     @measure_execution_time
     def get(self, id_jabatan):
         """Akses: (admin, pegawai), Get jabatan by id"""
@@ -293,6 +300,7 @@ class JabatanDetailResource(Resource):
 class LevelJabatanListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_level_jabatan")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list level jabatan"""
@@ -319,6 +327,7 @@ class LevelJabatanListResource(Resource):
 class LevelJabatanDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_level_jabatan")
     @measure_execution_time
     def get(self, id_level_jabatan):
         """Akses: (admin, pegawai), Get level jabatan by id"""
@@ -365,6 +374,7 @@ class LevelJabatanDetailResource(Resource):
 class JamKerjaListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jam_kerja")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list jam kerja"""
@@ -391,6 +401,7 @@ class JamKerjaListResource(Resource):
 class JamKerjaDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jam_kerja")
     @measure_execution_time
     def get(self, id_jam_kerja):
         """Akses: (admin, pegawai), Get jam kerja by id"""
@@ -464,6 +475,7 @@ class PegawaiJamKerjaResource(Resource):
 class LokasiAbsensiListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_lokasi_absensi")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list lokasi absensi"""
@@ -502,6 +514,7 @@ class LokasiAbsensiListResource(Resource):
 class LokasiAbsensiDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_lokasi_absensi")
     @measure_execution_time
     def get(self, id_lokasi):
         """Akses: (admin, pegawai), Get lokasi absensi by id"""
@@ -560,6 +573,7 @@ class LokasiAbsensiDetailResource(Resource):
 class JenisIzinListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jenis_izin")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list jenis izin"""
@@ -589,6 +603,7 @@ class JenisIzinListResource(Resource):
 class JenisIzinDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jenis_izin")
     @measure_execution_time
     def get(self, id_jenis_izin):
         """Akses: (admin, pegawai), Get jenis izin by id"""
@@ -638,6 +653,7 @@ class JenisIzinDetailResource(Resource):
 class JenisLemburListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jenis_lembur")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list jenis lembur"""
@@ -665,6 +681,7 @@ class JenisLemburListResource(Resource):
 class JenisLemburDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_jenis_lembur")
     @measure_execution_time
     def get(self, id_jenis_lembur):
         """Akses: (admin, pegawai), Get jenis lembur by id"""
@@ -712,6 +729,7 @@ class JenisLemburDetailResource(Resource):
 class LemburRuleListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_lembur_rule", "ref_jenis_lembur")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list aturan lembur"""
@@ -751,6 +769,7 @@ class LemburRuleListResource(Resource):
 class LemburRuleDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_lembur_rule", "ref_jenis_lembur")
     @measure_execution_time
     def get(self, id_rule):
         """Akses: (admin, pegawai), Get aturan lembur by id"""
@@ -811,6 +830,7 @@ class LemburRuleDetailResource(Resource):
 class HariLiburListResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_hari_libur")
     @measure_execution_time
     def get(self):
         """Akses: (admin, pegawai), Get list hari libur"""
@@ -839,6 +859,7 @@ class HariLiburListResource(Resource):
             raise ValidationError("Format tanggal harus YYYY-MM-DD")
 
         data = create_hari_libur(tanggal, nama_libur, jenis)
+        refresh_rekap(tanggal, tanggal)
         return success(data=data, message="Hari libur berhasil ditambahkan")
 
 
@@ -846,6 +867,7 @@ class HariLiburListResource(Resource):
 class HariLiburDetailResource(Resource):
 
     @jwt_required()
+    @conditional_get("ref_hari_libur")
     @measure_execution_time
     def get(self, id_libur):
         """Akses: (admin, pegawai), Get hari libur by id"""
@@ -876,20 +898,29 @@ class HariLiburDetailResource(Resource):
         except ValueError:
             raise ValidationError("Format tanggal harus YYYY-MM-DD")
 
+        lama = get_hari_libur_by_id(id_libur)
         data = update_hari_libur(
             id_libur, tanggal, nama_libur, jenis
         )
         if not data:
             raise NotFoundError("Hari libur tidak ditemukan")
 
+        # tanggal lama kembali jadi hari kerja, tanggal baru jadi libur
+        refresh_rekap(lama["tanggal"], lama["tanggal"])
+        if lama["tanggal"] != tanggal:
+            refresh_rekap(tanggal, tanggal)
+
         return success(data=data, message="Hari libur berhasil diperbarui")
 
     @role_required("admin")
     @measure_execution_time
     def delete(self, id_libur):
         """Akses: (admin), Delete hari libur by id"""
+        lama = get_hari_libur_by_id(id_libur)
         deleted = delete_hari_libur(id_libur)
         if deleted == 0:
             raise NotFoundError("Hari libur tidak ditemukan")
 
+        refresh_rekap(lama["tanggal"], lama["tanggal"])
+
         return success(message="Hari libur berhasil dihapus")
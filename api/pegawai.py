@@ -7,8 +7,8 @@ from werkzeug.datastructures import FileStorage
 
 from api.shared.exceptions import NotFoundError, ValidationError
 from api.shared.helper import generate_recovery_code
-from api.shared.response import success
-from api.utils.decorator import measure_execution_time, role_required
+from api.shared.response import success, success_stream
+from api.utils.decorator import conditional_get, measure_execution_time, role_required
 from api.query.q_pegawai import *
 
 
@@ -82,6 +82,136 @@ pegawai_lokasi_model = pegawai_ns.model("PegawaiLokasiAbsensi", {
     }
 )
 
+listing_parser = reqparse.RequestParser()
+listing_parser.add_argument("fields", type=str, location="args", required=False, help="Field yang dikembalikan, pisahkan koma (contoh: nip,nama_lengkap)")
+listing_parser.add_argument("after", type=str, location="args", required=False, help="Cursor halaman berikutnya: <nama_lengkap>,<id_pegawai> (lihat meta.next_after)")
+listing_parser.add_argument("limit", type=int, location="args", required=False, help="Jumlah pegawai per halaman")
+
+LISTING_MAX_LIMIT = 1000
+
+
+
+# ==================================================
+# FUNGSI HELPER LISTING (FIELDS & PAGINATION)
+# ==================================================
+def parse_listing_args(listing: str):
+    """Validasi ?fields=, ?after=, ?limit= → (fields, after, limit)"""
+    args = listing_parser.parse_args()
+    spec = PEGAWAI_LISTINGS[listing]
+
+    fields = None
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in spec]
+        if unknown:
+            raise ValidationError(
+                f"Field tidak dikenal: {', '.join(unknown)}",
+                errors={"fields": list(spec)}
+            )
+
+    after = None
+    if args.get("after"):
+        # nama bisa mengandung koma → ambil koma terakhir
+        nama, _, id_pegawai = args["after"].rpartition(",")
+        if not nama or not id_pegawai.isdigit():
+            raise ValidationError("Format after harus <nama_lengkap>,<id_pegawai>")
+        after = (nama, int(id_pegawai))
+
+    limit = args.get("limit")
+    if limit is not None and not 1 <= limit <= LISTING_MAX_LIMIT:
+        raise ValidationError(f"limit harus antara 1 dan {LISTING_MAX_LIMIT}")
+
+    return fields, after, limit
+
+
+def project_fields(item: dict, fields):
+    """Sisakan field yang diminta (id_pegawai selalu ikut)"""
+    if not fields:
+        return item
+    return {k: v for k, v in item.items() if k == "id_pegawai" or k in fields}
+
+
+def listing_meta(rows, total: int, limit):
+    return cursor_meta(
+        total,
+        limit,
+        last=rows[-1] if rows else None,
+        page_count=len({row["id_pegawai"] for row in rows})
+    )
+
+
+def cursor_meta(total: int, limit, last, page_count: int):
+    """meta listing dari baris terakhir & jumlah pegawai di halaman (dipakai juga saat streaming)"""
+    meta = {"total": total}
+    if limit:
+        meta["limit"] = limit
+        meta["next_after"] = (
+            f"{last['nama_lengkap']},{last['id_pegawai']}"
+            if last and page_count == limit else None
+        )
+    return meta
+
+
+def build_pegawai_data(row, wanted, pendidikan_map, lokasi_map):
+    """Satu item /pegawai/all-data dari baris listing + map pendidikan & lokasi"""
+    pegawai = {
+        "id_pegawai": row["id_pegawai"],
+        "nip": row.get("nip"),
+        "nama_lengkap": row["nama_lengkap"],
+        "nama_panggilan": row.get("nama_panggilan"),
+        "jenis_kelamin": row.get("jenis_kelamin"),
+        "tanggal_masuk": row["tanggal_masuk"].strftime('%d-%m-%Y') if row.get("tanggal_masuk") else "-",
+
+        "id_departemen": row.get("id_departemen"),
+        "departemen": row.get("nama_departemen"),
+        "id_jabatan": row.get("id_jabatan"),
+        "jabatan": row.get("nama_jabatan"),
+        "id_level_jabatan": row.get("id_level_jabatan"),
+        "level_jabatan": row.get("level_jabatan"),
+        "id_status_pegawai": row.get("id_status_pegawai"),
+        "status_pegawai": row.get("status_pegawai"),
+    }
+
+    if "pribadi" in wanted:
+        pegawai["pribadi"] = {
+            "nik": row["nik"],
+            "alamat": row["alamat"],
+            "no_telepon": row["no_telepon"],
+            "email": row["email_pribadi"],
+            "tempat_lahir": row["tempat_lahir"],
+            "tanggal_lahir": row["tanggal_lahir"],
+            "image": row["image_path"],
+            "agama": row["agama"],
+            "status_nikah": row["status_nikah"],
+        }
+
+    if "rekening" in wanted:
+        pegawai["rekening"] = {
+            "bank": row["nama_bank"],
+            "nomor": row["no_rekening"],
+            "an": row["atas_nama"],
+        }
+
+    if "auth_pegawai" in wanted:
+        pegawai["auth_pegawai"] = {
+            "username": row["username"],
+            "recovery_code": row["kode_pemulihan"],
+            "img_path": row["img_path"],
+            "status": row["auth_status"],
+            "last_login_at": (
+                row["last_login_at"].strftime("%d-%m-%Y %H:%M:%S")
+                if row["last_login_at"] is not None
+                else None
+            ),
+        }
+
+    if "pendidikan" in wanted:
+        pegawai["pendidikan"] = pendidikan_map.get(row["id_pegawai"])
+    if "lokasi_absensi" in wanted:
+        pegawai["lokasi_absensi"] = lokasi_map.get(row["id_pegawai"], [])
+
+    return pegawai
+
 
 
 # ==================================================
@@ -91,73 +221,38 @@ pegawai_lokasi_model = pegawai_ns.model("PegawaiLokasiAbsensi", {
 class PegawaiListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_LOGIN_READ_TABLES)
     @measure_execution_time
     def get(self):
         """Akses: (admin), Get semua data pegawai lengkap --> admin/pegawai"""
-        rows = get_all_pegawai_core()
-        result = []
-
-        for row in rows:
-            pegawai = {
-                "id_pegawai": row["id_pegawai"],
-                "nip": row["nip"],
-                "nama_lengkap": row["nama_lengkap"],
-                "nama_panggilan": row["nama_panggilan"],
-                "jenis_kelamin": row["jenis_kelamin"],
-                "tanggal_masuk": row["tanggal_masuk"].strftime('%d-%m-%Y') if row["tanggal_masuk"] else "-",
-
-                "id_departemen": row["id_departemen"],
-                "departemen": row["nama_departemen"],
-                "id_jabatan": row["id_jabatan"],
-                "jabatan": row["nama_jabatan"],
-                "id_level_jabatan": row["id_level_jabatan"],
-                "level_jabatan": row["level_jabatan"],
-                "id_status_pegawai": row["id_status_pegawai"],
-                "status_pegawai": row["status_pegawai"],
-
-                "pribadi": {
-                    "nik": row["nik"],
-                    "alamat": row["alamat"],
-                    "no_telepon": row["no_telepon"],
-                    "email": row["email_pribadi"],
-                    "tempat_lahir": row["tempat_lahir"],
-                    "tanggal_lahir": row["tanggal_lahir"],
-                    "image": row["image_path"],
-                    "agama": row["agama"],
-                    "status_nikah": row["status_nikah"],
-                },
-
-                "rekening": {
-                    "bank": row["nama_bank"],
-                    "nomor": row["no_rekening"],
-                    "an": row["atas_nama"],
-                },
-
-                "auth_pegawai": {
-                    "username": row["username"],
-                    "recovery_code": row["kode_pemulihan"],
-                    "img_path": row["img_path"],
-                    "status": row["auth_status"],
-                    "last_login_at": (
-                        row["last_login_at"].strftime("%d-%m-%Y %H:%M:%S")
-                        if row["last_login_at"] is not None
-                        else None
-                    ),
-                },
-
-                "pendidikan": get_pendidikan_by_pegawai(row["id_pegawai"]),
-                "lokasi_absensi": get_lokasi_absensi_by_pegawai(row["id_pegawai"]),
-            }
-
-            result.append(pegawai)
-
-        return success(
-            data=result,
+        fields, after, limit = parse_listing_args("all-data")
+        chunks = get_all_pegawai_core(fields=fields, after=after, limit=limit, stream=True)
+        wanted = set(fields or PEGAWAI_LISTINGS["all-data"])
+        state = {"total": 0, "last": None}
+
+        def items():
+            for rows in chunks:
+                # pendidikan & lokasi dimuat sekali per chunk (bukan per baris)
+                id_pegawai_list = [row["id_pegawai"] for row in rows]
+                pendidikan_map = get_pendidikan_map(id_pegawai_list) if "pendidikan" in wanted else {}
+                lokasi_map = get_lokasi_absensi_map(id_pegawai_list) if "lokasi_absensi" in wanted else {}
+
+                for row in rows:
+                    state["total"] += 1
+                    state["last"] = row
+                    yield project_fields(build_pegawai_data(row, wanted, pendidikan_map, lokasi_map), fields)
+
+        # satu baris per pegawai → jumlah pegawai di halaman = total item
+        return success_stream(
+            items=items(),
             message="List pegawai lengkap",
-            meta={"total": len(result)}
+            meta=lambda: cursor_meta(state["total"], limit, state["last"], state["total"])
         )
 
 
+
+
 # ==================================================
 # GET DATA PEGAWAI BASIC ID DAN NAMA
 # ==================================================
@@ -165,6 +260,7 @@ class PegawaiListResource(Resource):
 class PegawaiBasicListResource(Resource):
 
     @role_required("admin")
+    @conditional_get(*PEGAWAI_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get data basic pegawai (nama dan id)"""
@@ -196,45 +292,19 @@ class PegawaiBasicListResource(Resource):
 class PegawaiProfileListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get list profile pegawai (CORE TAB)"""
-        rows = get_pegawai_profile()
-        result = []
-
-        for row in rows:
-            result.append({
-                "id_pegawai": row["id_pegawai"],
-                "nip": row["nip"],
-                "nama_lengkap": row["nama_lengkap"],
-                "nama_panggilan": row["nama_panggilan"],
-                "jenis_kelamin": row["jenis_kelamin"],
-                "tanggal_masuk": row["tanggal_masuk"],
-
-                "id_status_pegawai": row["id_status_pegawai"],
-                "status_pegawai": row["status_pegawai"],
-                "id_jabatan": row["id_jabatan"],
-                "jabatan": row["nama_jabatan"],
-                "id_departemen": row["id_departemen"],
-                "departemen": row["nama_departemen"],
-                "id_level_jabatan": row["id_level_jabatan"],
-                "level_jabatan": row["level_jabatan"],
-
-                "nik": row["nik"],
-                "agama": row["agama"],
-                "tempat_lahir": row["tempat_lahir"],
-                "tanggal_lahir": row["tanggal_lahir"],
-                "status_nikah": row["status_nikah"],
-
-                "email": row["email_pribadi"],
-                "no_telepon": row["no_telepon"],
-                "alamat": row["alamat"],
-            })
+        fields, after, limit = parse_listing_args("profile")
+        rows = get_pegawai_listing("profile", fields=fields, after=after, limit=limit)
+        result = [project_fields(dict(row), fields) for row in rows]
 
         return success(
             data=result,
             message="List profile pegawai",
-            meta={"total": len(result)}
+            meta=listing_meta(rows, len(result), limit)
         )
 
 
@@ -242,30 +312,19 @@ class PegawaiProfileListResource(Resource):
 class PegawaiRekeningListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get data rekening pegawai (TAB REKENING)"""
-        rows = get_pegawai_rekening()
-        result = []
-
-        for row in rows:
-            result.append({
-                "id_pegawai": row["id_pegawai"],
-                "nip": row["nip"],
-                "nama_lengkap": row["nama_lengkap"],
-                "tanggal_masuk": row["tanggal_masuk"],
-                "status_pegawai": row["status_pegawai"],
-
-                "nama_bank": row["nama_bank"],
-                "no_rekening": row["no_rekening"],
-                "atas_nama": row["atas_nama"],
-                
-            })
+        fields, after, limit = parse_listing_args("rekening")
+        rows = get_pegawai_listing("rekening", fields=fields, after=after, limit=limit)
+        result = [project_fields(dict(row), fields) for row in rows]
 
         return success(
             data=result,
             message="List data rekening pegawai",
-            meta={"total": len(result)}
+            meta=listing_meta(rows, len(result), limit)
         )
 
 
@@ -273,31 +332,19 @@ class PegawaiRekeningListResource(Resource):
 class PegawaiPendidikanListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get data pendidikan pegawai (TAB PENDIDIKAN)"""
-        rows = get_pegawai_pendidikan()
-        result = []
-
-        for row in rows:
-            result.append({
-                "id_pegawai": row["id_pegawai"],
-                "nip": row["nip"],
-                "nama_lengkap": row["nama_lengkap"],
-                "tanggal_masuk": row["tanggal_masuk"],
-                "status_pegawai": row["status_pegawai"],
-
-                "jenjang": row["jenjang"],
-                "institusi": row["institusi"],
-                "jurusan": row["jurusan"],
-                "tahun_masuk": row["tahun_masuk"],
-                "tahun_lulus": row["tahun_lulus"],
-            })
+        fields, after, limit = parse_listing_args("pendidikan")
+        rows = get_pegawai_listing("pendidikan", fields=fields, after=after, limit=limit)
+        result = [project_fields(dict(row), fields) for row in rows]
 
         return success(
             data=result,
             message="List data pendidikan pegawai",
-            meta={"total": len(result)}
+            meta=listing_meta(rows, len(result), limit)
         )
 
 
@@ -305,34 +352,25 @@ class PegawaiPendidikanListResource(Resource):
 class PegawaiAkunListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_LOGIN_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get data akun sistem pegawai (TAB AKUN)"""
-        rows = get_pegawai_akun()
+        fields, after, limit = parse_listing_args("akun")
+        rows = get_pegawai_listing("akun", fields=fields, after=after, limit=limit)
         result = []
 
         for row in rows:
-            result.append({
-                "id_pegawai": row["id_pegawai"],
-                "nip": row["nip"],
-                "nama_lengkap": row["nama_lengkap"],
-                "tanggal_masuk": row["tanggal_masuk"],
-                "status_pegawai": row["status_pegawai"],
-
-                "username": row["username"],
-                "kode_pemulihan": row["kode_pemulihan"],
-                "img_path": row["img_path"],
-                "last_login_at": (
-                    row["last_login_at"].strftime("%d-%m-%Y %H:%M:%S")
-                    if row["last_login_at"] else None
-                ),
-                "status": row["auth_status"],
-            })
+            item = dict(row)
+            if item.get("last_login_at"):
+                item["last_login_at"] = item["last_login_at"].strftime("%d-%m-%Y %H:%M:%S")
+            result.append(project_fields(item, fields))
 
         return success(
             data=result,
             message="List data akun sistem pegawai",
-            meta={"total": len(result)}
+            meta=listing_meta(rows, len(result), limit)
         )
 
 
@@ -340,10 +378,13 @@ class PegawaiAkunListResource(Resource):
 class PegawaiLokasiListResource(Resource):
 
     @role_required("admin")
+    @pegawai_ns.expect(listing_parser)
+    @conditional_get(*PEGAWAI_READ_TABLES)
     @measure_execution_time
     def get(self):
         """(admin) Get data lokasi absensi pegawai (TAB LOKASI)"""
-        rows = get_pegawai_lokasi()
+        fields, after, limit = parse_listing_args("lokasi")
+        rows = get_pegawai_listing("lokasi", fields=fields, after=after, limit=limit)
         result_map = {}
 
         for row in rows:
@@ -352,18 +393,18 @@ class PegawaiLokasiListResource(Resource):
             if pid not in result_map:
                 result_map[pid] = {
                     "id_pegawai": row["id_pegawai"],
-                    "nip": row["nip"],
+                    "nip": row.get("nip"),
                     "nama_lengkap": row["nama_lengkap"],
                     "tanggal_masuk": (
                         row["tanggal_masuk"].strftime("%d-%m-%Y")
-                        if row["tanggal_masuk"] else None
+                        if row.get("tanggal_masuk") else None
                     ),
-                    "status_pegawai": row["status_pegawai"],
+                    "status_pegawai": row.get("status_pegawai"),
                     "lokasi_absensi": []
                 }
 
             # jika pegawai punya lokasi
-            if row["id_lokasi"]:
+            if row.get("id_lokasi"):
                 result_map[pid]["lokasi_absensi"].append({
                     "id_lokasi": row["id_lokasi"],
                     "nama_lokasi": row["nama_lokasi"],
@@ -372,12 +413,12 @@ class PegawaiLokasiListResource(Resource):
                     "radius_meter": row["radius_meter"],
                 })
 
-        result = list(result_map.values())
+        result = [project_fields(item, fields) for item in result_map.values()]
 
         return success(
             data=result,
             message="List data lokasi absensi pegawai",
-            meta={"total": len(result)}
+            meta=listing_meta(rows, len(result), limit)
         )
 
 
@@ -738,6 +779,7 @@ class PegawaiDeleteResource(Resource):
 class PegawaiProfileAbsenResource(Resource):
 
     @jwt_required()
+    @conditional_get(*PEGAWAI_READ_TABLES, per_user=True)
     @measure_execution_time
     def get(self):
         """(pegawai) Ambil profile pegawai untuk keperluan ABSENSI"""
@@ -783,6 +825,7 @@ class PegawaiProfileAbsenResource(Resource):
 class PegawaiAccountInfoResource(Resource):
 
     @jwt_required()
+    @conditional_get(*PEGAWAI_READ_TABLES, per_user=True)
     @measure_execution_time
     def get(self):
         """(pegawai) Data akun dasar pegawai"""
@@ -5,11 +5,13 @@ from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity
 from werkzeug.datastructures import FileStorage
 from datetime import date, datetime, timedelta
 
-from api.shared.response import success
+from api.shared.response import success, success_stream
 from api.shared.exceptions import ValidationError
+from api.utils.db import release_request_connection
 from api.utils.decorator import measure_execution_time, role_required
 from api.utils.uploader import upload_lampiran_izin_to_cdn
 from api.query.q_perizinan import *
+from api.query.q_rekap import refresh_rekap
 
 
 perizinan_ns = Namespace("perizinan", description="Pengajuan Izin Pegawai")
@@ -257,6 +259,8 @@ class IzinDeleteResource(Resource):
             raise ValidationError("Role tidak dikenali")
 
         soft_delete_izin(id_izin)
+        if izin["status_approval"] == "approved":
+            refresh_rekap(izin["tgl_mulai"], izin["tgl_selesai"], izin["id_pegawai"])
 
         return success(
             message="Pengajuan izin berhasil dihapus (soft delete)"
@@ -358,12 +362,14 @@ class IzinListResource(Resource):
             id_departemen=args.get("id_departemen"),
             id_status_pegawai=args.get("id_status_pegawai"),
             id_pegawai=args.get("id_pegawai"),
-            kategori_izin=args.get("kategori_izin")  # 🔹 IZIN / SAKIT / CUTI
+            kategori_izin=args.get("kategori_izin"),  # 🔹 IZIN / SAKIT / CUTI
+            stream=True
         )
 
-        return success(
+        # dikirim bertahap per chunk cursor
+        return success_stream(
             message="Data izin berhasil dimuat",
-            data=[
+            items=(
                 {
                     "id_izin": r["id_izin"],
                     "id_pegawai": r["id_pegawai"],
@@ -386,8 +392,9 @@ class IzinListResource(Resource):
                     "path_lampiran": r["path_lampiran"],
                     "alasan_penolakan": r["alasan_penolakan"]
                 }
-                for r in rows
-            ]
+                for chunk in rows
+                for r in chunk
+            )
         )
 
 
@@ -427,6 +434,8 @@ class EditIzinAdminResource(Resource):
         # Upload lampiran (opsional)
         path_lampiran = izin["path_lampiran"]
         if args.get("lampiran"):
+            # koneksi request tidak ditahan selama upload CDN
+            release_request_connection()
             path_lampiran = upload_lampiran_izin_to_cdn(args["lampiran"])
 
         # Update izin
@@ -438,6 +447,13 @@ class EditIzinAdminResource(Resource):
             keterangan=args["alasan"],
             path_lampiran=path_lampiran
         )
+        if izin["status_approval"] == "approved":
+            # rentang lama & baru sama-sama dihitung ulang
+            refresh_rekap(
+                min(izin["tgl_mulai"], tgl_mulai),
+                max(izin["tgl_selesai"], tgl_selesai),
+                izin["id_pegawai"]
+            )
 
         return success(
             message="Data izin berhasil diperbarui",
@@ -498,6 +514,7 @@ class IzinApproveResource(Resource):
             status_approval="approved",
             alasan_penolakan=None
         )
+        refresh_rekap(izin["tgl_mulai"], izin["tgl_selesai"], izin["id_pegawai"])
         return success(message="Perizinan berhasil di-approve")
 
 
@@ -522,4 +539,6 @@ class IzinRejectResource(Resource):
             status_approval="rejected",
             alasan_penolakan=alasan_penolakan
         )
+        if izin["status_approval"] == "approved":
+            refresh_rekap(izin["tgl_mulai"], izin["tgl_selesai"], izin["id_pegawai"])
         return success(message="Perizinan berhasil ditolak")
@@ -1,14 +1,18 @@
 from calendar import monthrange
 from flask_restx import Namespace, Resource, reqparse
 from flask_jwt_extended import jwt_required
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timedelta
 
 from api.query.q_master import get_jam_kerja_by_id
-from api.shared.response import success
+from api.shared.response import success, success_stream
 from api.shared.exceptions import ValidationError
 from api.utils.decorator import measure_execution_time, role_required
 from api.shared.helper import get_wita
 from api.query.q_presensi import *
+from api.query.q_rekap import get_rekap_bulanan, get_rekap_range, refresh_rekap, refresh_rekap_absensi
+from api.utils.izin_index import IzinIndex
+from api.utils.kalender import hari_kerja_per_bulan, libur_mask
+from api.utils.rekap_matrix import build_status_matrix, cells_from_rollup, daily_dicts, rekap_totals
 
 
 presensi_ns = Namespace("presensi", description="Manajemen Presensi (Admin)")
@@ -49,6 +53,16 @@ rekap_bulanan_parser.add_argument("tahun", type=int, required=False, help="Tahun
 rekap_bulanan_parser.add_argument("id_departemen", type=int, required=False, help="Filter departemen")
 rekap_bulanan_parser.add_argument("id_status_pegawai", type=int, required=False, help="Filter status pegawai")
 
+rekap_range_parser = reqparse.RequestParser()
+rekap_range_parser.add_argument("start", type=str, required=True, help="Tanggal awal (YYYY-MM-DD)")
+rekap_range_parser.add_argument("end", type=str, required=True, help="Tanggal akhir (YYYY-MM-DD)")
+rekap_range_parser.add_argument(
+    "group_by", type=str, required=False, default="bulan",
+    choices=["bulan", "departemen", "status_pegawai"], help="Pengelompokan hasil"
+)
+rekap_range_parser.add_argument("id_departemen", type=int, required=False, help="Filter departemen")
+rekap_range_parser.add_argument("id_status_pegawai", type=int, required=False, help="Filter status pegawai")
+
 detail_rekap_parser = reqparse.RequestParser()
 detail_rekap_parser.add_argument("bulan", type=int, required=False, help="Bulan (1-12)")
 detail_rekap_parser.add_argument("tahun", type=int, required=False, help="Tahun (YYYY)")
@@ -73,6 +87,78 @@ def parse_time(value):
     raise ValidationError("Format waktu tidak valid")
 
 
+# rentang maksimal rekap-range (satu tahun kabisat)
+REKAP_RANGE_MAX_HARI = 366
+
+# group_by → (kolom key, kolom label)
+REKAP_RANGE_GROUPS = {
+    "bulan": ("periode", "periode"),
+    "departemen": ("id_departemen", "nama_departemen"),
+    "status_pegawai": ("id_status_pegawai", "nama_status"),
+}
+
+REKAP_KOLOM = ("hadir", "izin", "sakit", "cuti", "alpha", "total_kurang_jam")
+
+
+def iter_rekap_range(rows, group_by, hari_kerja):
+    """
+    Satu lintasan atas baris pegawai × bulan (sudah terurut per grup),
+    yield satu grup begitu grup tersebut selesai.
+    hari_kerja: {periode: jumlah hari kerja s/d batas}
+    """
+    key_col, label_col = REKAP_RANGE_GROUPS[group_by]
+    group = None
+    pegawai = None
+
+    def _tutup(group):
+        group["total"] = {
+            k: sum(p[k] for p in group["pegawai"])
+            for k in REKAP_KOLOM
+        }
+        return group
+
+    for r in rows:
+        key = r[key_col]
+        if group_by == "bulan":
+            key = r["periode"].strftime("%Y-%m")
+
+        if group is None or key != group["key"]:
+            if group is not None:
+                yield _tutup(group)
+            group = {
+                "key": key,
+                "label": key if group_by == "bulan" else r[label_col],
+                "hari_kerja": hari_kerja.get(r["periode"], 0) if group_by == "bulan" else sum(hari_kerja.values()),
+                "pegawai": []
+            }
+            pegawai = None
+
+        if pegawai is None or pegawai["id_pegawai"] != r["id_pegawai"]:
+            pegawai = {
+                "id_pegawai": r["id_pegawai"],
+                "nama": r["nama_lengkap"],
+                "nama_panggilan": r["nama_panggilan"],
+                "nip": r["nip"],
+                "id_departemen": r["id_departemen"],
+                "nama_departemen": r["nama_departemen"],
+                "id_status_pegawai": r["id_status_pegawai"],
+                "nama_status": r["nama_status"],
+                **{k: 0 for k in REKAP_KOLOM}
+            }
+            group["pegawai"].append(pegawai)
+
+        masuk = r["hadir"] + r["izin"] + r["sakit"] + r["cuti"]
+        pegawai["hadir"] += r["hadir"]
+        pegawai["izin"] += r["izin"]
+        pegawai["sakit"] += r["sakit"]
+        pegawai["cuti"] += r["cuti"]
+        pegawai["alpha"] += hari_kerja.get(r["periode"], 0) - masuk
+        pegawai["total_kurang_jam"] += r["total_kurang_jam"]
+
+    if group is not None:
+        yield _tutup(group)
+
+
 # ======================================================================
 # ENDPOINT GET DATA PRESENSI HARIAN SEMUA PEGAWAI (ADMIN.WEBBERKAH)
 # ======================================================================
@@ -206,6 +292,7 @@ class PresensiUpdateResource(Resource):
         )
 
         recalc_absensi(id_absensi)
+        refresh_rekap_absensi(id_absensi)
 
         return success(message="Presensi berhasil diperbarui")
     
@@ -221,6 +308,7 @@ class PresensiUpdateResource(Resource):
             raise ValidationError("Data presensi tidak ditemukan")
 
         soft_delete_presensi(id_absensi)
+        refresh_rekap_absensi(id_absensi)
 
         return success(
             message="Presensi berhasil dihapus (soft delete)"
@@ -316,8 +404,9 @@ class PresensiManualCreateResource(Resource):
                 id_lokasi_balik=args.get("id_lokasi_istirahat")
             )
 
-        # 6️⃣ Recalculate
+        # 6️⃣ Recalculate (+ rollup rekap tanggal tsb)
         recalc_absensi(id_absensi)
+        refresh_rekap(tanggal, tanggal, args["id_pegawai"])
 
         return success(
             message="Presensi manual berhasil ditambahkan",
@@ -350,86 +439,121 @@ class PresensiRekapBulananResource(Resource):
 
         is_bulan_berjalan = (bulan == now.month and tahun == now.year)
         today = now.date()
+        batas = today if is_bulan_berjalan else end_date
 
-        pegawai_list = get_pegawai_rekap(
+        # status harian dibaca dari rollup rekap_harian, per chunk pegawai
+        chunks = get_rekap_bulanan(
+            start_date=start_date,
+            batas_date=batas,
             id_departemen=id_departemen,
-            id_status_pegawai=id_status_pegawai
+            id_status_pegawai=id_status_pegawai,
+            stream=True
         )
+        libur = libur_mask(start_date, end_date)
+
+        def items():
+            for rows in chunks:
+                # klasifikasi pegawai × hari sebagai matrix int8, total = sum per baris
+                status, telat = build_status_matrix(
+                    len(rows), start_date, end_date, batas, libur,
+                    cells=cells_from_rollup(rows)
+                )
+                totals = {k: v.tolist() for k, v in rekap_totals(status, telat).items()}
+                daily = daily_dicts(status)
+
+                for i, p in enumerate(rows):
+                    yield {
+                        "id_pegawai": p["id_pegawai"],
+                        "nama": p["nama_lengkap"],
+                        "nama_panggilan": p["nama_panggilan"],
+                        "nip": p["nip"],
+                        "id_departemen": p["id_departemen"],
+                        "nama_departemen": p["nama_departemen"],
+                        "id_status_pegawai": p["id_status_pegawai"],
+                        "nama_status": p["nama_status"],
+                        "hadir": totals["hadir"][i],
+                        "izin": totals["izin"][i],
+                        "sakit": totals["sakit"][i],
+                        "cuti": totals["cuti"][i],
+                        "alpha": totals["alpha"][i],
+                        "total_kurang_jam": totals["total_kurang_jam"][i],
+                        "daily": daily[i]
+                    }
 
-        absensi_map = get_absensi_map(start_date, end_date)
-        izin_map = get_izin_map(start_date, end_date)
-        hari_libur = get_hari_libur_map(start_date, end_date)
+        return success_stream(
+            items=items(),
+            data={
+                "bulan": f"{tahun}-{str(bulan).zfill(2)}",
+                "total_hari": end_date.day
+            },
+            message="Rekap presensi bulanan"
+        )
 
-        hasil = []
 
-        for p in pegawai_list:
-            daily = {}
-            hadir = izin = sakit = cuti = alpha = 0
-            total_kurang_jam = 0
 
-            current = start_date
-            while current <= end_date:
-                day = str(current.day)
+# ======================================================================
+# ENDPOINT REKAP RENTANG TANGGAL: TRIWULAN / TAHUNAN (ADMIN/REKAPAN)
+# ======================================================================
+@presensi_ns.route("/rekap-range")
+class PresensiRekapRangeResource(Resource):
 
-                if is_bulan_berjalan and current > today:
-                    daily[day] = None
+    @jwt_required()
+    @role_required("admin")
+    @presensi_ns.expect(rekap_range_parser)
+    @measure_execution_time
+    def get(self):
+        """(admin) Rekap presensi rentang tanggal, dikelompokkan per bulan / departemen / status pegawai"""
+        args = rekap_range_parser.parse_args()
+
+        try:
+            start_date = datetime.strptime(args["start"], "%Y-%m-%d").date()
+            end_date = datetime.strptime(args["end"], "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError("Format tanggal harus YYYY-MM-DD")
 
-                elif current.weekday() == 6 or current in hari_libur:
-                    daily[day] = "L"
+        if end_date < start_date:
+            raise ValidationError("Tanggal akhir tidak boleh lebih kecil dari tanggal awal")
 
-                elif current in izin_map.get(p["id_pegawai"], {}):
-                    kategori = izin_map[p["id_pegawai"]][current]
+        if (end_date - start_date).days + 1 > REKAP_RANGE_MAX_HARI:
+            raise ValidationError(f"Rentang maksimal {REKAP_RANGE_MAX_HARI} hari")
 
-                    if kategori == "IZIN":
-                        daily[day] = "I"
-                        izin += 1
-                    elif kategori == "SAKIT":
-                        daily[day] = "S"
-                        sakit += 1
-                    elif kategori == "CUTI":
-                        daily[day] = "C"
-                        cuti += 1
+        group_by = args.get("group_by") or "bulan"
 
-                elif current in absensi_map.get(p["id_pegawai"], {}):
-                    daily[day] = "H"
-                    hadir += 1
+        # hari yang belum lewat tidak dihitung (sama seperti bulan berjalan)
+        batas = min(end_date, get_wita().date())
 
-                    menit_telat = (
-                        absensi_map[p["id_pegawai"]][current].get("menit_terlambat") or 0
-                    )
-                    total_kurang_jam += menit_telat
+        # hari kerja per bulan dari bitmap kalender (seluruh periode)
+        hari_kerja = hari_kerja_per_bulan(start_date, batas)
 
-                else:
-                    daily[day] = "A"
-                    alpha += 1
+        chunks = get_rekap_range(
+            start_date=start_date,
+            batas_date=batas,
+            group_by=group_by,
+            id_departemen=args.get("id_departemen"),
+            id_status_pegawai=args.get("id_status_pegawai"),
+            stream=True
+        ) if batas >= start_date else []
+        rows = (r for chunk in chunks for r in chunk)
 
-                current += timedelta(days=1)
+        # grup dikirim begitu selesai dihitung
+        state = {"total_group": 0}
 
-            hasil.append({
-                "id_pegawai": p["id_pegawai"],
-                "nama": p["nama_lengkap"],
-                "nama_panggilan": p["nama_panggilan"],
-                "nip": p["nip"],
-                "id_departemen": p["id_departemen"],
-                "nama_departemen": p["nama_departemen"],
-                "id_status_pegawai": p["id_status_pegawai"],
-                "nama_status": p["nama_status"],
-                "hadir": hadir,
-                "izin": izin,
-                "sakit": sakit,
-                "cuti": cuti,
-                "alpha": alpha,
-                "total_kurang_jam": total_kurang_jam,
-                "daily": daily
-            })
+        def groups():
+            for group in iter_rekap_range(rows, group_by, hari_kerja):
+                state["total_group"] += 1
+                yield group
 
-        return success(
+        return success_stream(
+            items=groups(),
             data={
-                "bulan": f"{tahun}-{str(bulan).zfill(2)}",
-                "total_hari": end_date.day,
-                "data": hasil
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "batas": batas.isoformat(),
+                "group_by": group_by
             },
-            message="Rekap presensi bulanan"
+            list_key="groups",
+            message="Rekap presensi rentang tanggal",
+            meta=lambda: dict(state)
         )
 
 
@@ -463,8 +587,8 @@ class PresensiDetailRekapResource(Resource):
             raise ValidationError("Pegawai tidak ditemukan")
 
         absensi_map = get_absensi_detail_map(id_pegawai, start_date, end_date)
-        izin_map = get_izin_map(start_date, end_date)
-        hari_libur = get_hari_libur_map(start_date, end_date)
+        izin_index = IzinIndex(get_izin_intervals(start_date, end_date, id_pegawai=id_pegawai))
+        libur = libur_mask(start_date, end_date)
 
         logs = []
         current = start_date
@@ -489,18 +613,16 @@ class PresensiDetailRekapResource(Resource):
                 current += timedelta(days=1)
                 continue
 
-            if current.weekday() == 6 or current in hari_libur:
+            kategori = izin_index.status_on(id_pegawai, current)
+
+            if libur[day - 1]:
                 status = "L"
-            elif current in izin_map.get(id_pegawai, {}):
-                kategori = izin_map[id_pegawai][current]
-                if kategori == "IZIN":
-                    status = "I"
-                elif kategori == "SAKIT":
-                    status = "S"
-                elif kategori == "CUTI":
-                    status = "C"
-                else:
-                    status = "A"
+            elif kategori == "IZIN":
+                status = "I"
+            elif kategori == "SAKIT":
+                status = "S"
+            elif kategori == "CUTI":
+                status = "C"
             elif row:
                 status = "H"
             else:
@@ -16,18 +16,6 @@ def get_all_lokasi_absensi():
     with engine.connect() as conn:
         return conn.execute(sql).mappings().all()
 
-def get_allowed_lokasi_ids_pegawai(id_pegawai: int) -> set[int]:
-    sql = text("""
-        SELECT id_lokasi
-        FROM pegawai_lokasi_absensi
-        WHERE id_pegawai = :id
-          AND status = 1
-    """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, {"id": id_pegawai}).scalars().all()
-        return set(rows)
-
-
 # HELPER UNTUK ISTIRAHAT MULAI DAN ISTIRAHAT SELESAI
 def get_absensi_hari_ini(id_pegawai: int, tanggal):
     sql = text("""
@@ -76,48 +64,33 @@ def has_active_shift(id_pegawai: int) -> bool:
             sql, {"id_pegawai": id_pegawai}
         ).first() is not None
 
-# HELPER UNTUK MENDAPATKAN JAM MULAI KERJA YANG DIHITUNG UNTUK KETERLAMBATAN
-def is_valid_jam_kerja_pegawai(id_pegawai: int, id_jam_kerja: int) -> bool:
-    """Cek apakah pegawai boleh mengambil jam kerja ini"""
-    # Shift normal (id=1) selalu valid
-    if id_jam_kerja == 1:
-        return True
-
-    sql = text("""
-        SELECT 1
-        FROM pegawai_jam_kerja
-        WHERE id_pegawai = :id_pegawai
-          AND id_jam_kerja = :id_jam_kerja
-          AND status = 1
-        LIMIT 1
-    """)
-    with engine.connect() as conn:
-        return conn.execute(
-            sql,
-            {
-                "id_pegawai": id_pegawai,
-                "id_jam_kerja": id_jam_kerja
-            }
-        ).first() is not None
-
 # MENGAMBIL DATA PEGAWAI YANG DIIZINKAN WFH
-def is_pegawai_wfh(id_pegawai: int) -> bool:
+def get_akses_lokasi_pegawai(id_pegawai: int) -> dict:
     """
-    Cek apakah pegawai diizinkan WFH
+    Lokasi yang diizinkan + flag WFH pegawai dalam satu query
+    (dipakai cache akses lokasi)
     """
     sql = text("""
-        SELECT 1
-        FROM pegawai_wfh
-        WHERE id_pegawai = :id_pegawai
-          AND status = 1
-        LIMIT 1
+        SELECT
+            ARRAY(
+                SELECT id_lokasi
+                FROM pegawai_lokasi_absensi
+                WHERE id_pegawai = :id
+                  AND status = 1
+            ) AS lokasi_ids,
+            EXISTS(
+                SELECT 1
+                FROM pegawai_wfh
+                WHERE id_pegawai = :id
+                  AND status = 1
+            ) AS is_wfh
     """)
     with engine.connect() as conn:
-        return conn.execute(
-            sql, {"id_pegawai": id_pegawai}
-        ).first() is not None
-
-
+        row = conn.execute(sql, {"id": id_pegawai}).mappings().first()
+        return {
+            "lokasi_ids": frozenset(row["lokasi_ids"] or []),
+            "is_wfh": bool(row["is_wfh"])
+        }
 
 # ==================================================
 # GET ABSENSI HARIAN UNTUK KEPERLUAN ABSEN
@@ -210,44 +183,94 @@ def get_istirahat_absensi(id_absensi: int):
 # ABSENSI MASUK UNTUK PEGAWAI
 # ==================================================
 
-# HELPER UNTUK VALIDASI CHECKIN APAKAH SUDAH CHECKIN ATAU TIDAK
-def is_already_checkin(id_pegawai: int) -> bool:
+# CONTEXT CHECKIN: SEMUA DATA VALIDASI DALAM SATU QUERY
+def get_checkin_context(id_pegawai: int, id_jam_kerja: int) -> dict:
     """
-    Cek apakah pegawai masih memiliki absensi aktif
-    (belum checkout)
+    Ambil sekaligus: status absensi aktif, data wajah, akses lokasi + WFH,
+    izin jam kerja, dan detail jam kerja yang dipilih
     """
-    sql = text("""
-        SELECT 1
-        FROM absensi
-        WHERE id_pegawai = :id_pegawai
-          AND jam_keluar IS NULL
-          AND status = 1
-        LIMIT 1
-    """)
-    with engine.connect() as conn:
-        return conn.execute(
-            sql, {"id_pegawai": id_pegawai}
-        ).first() is not None
-
-def get_jam_kerja_by_id(id_jam_kerja: int):
     sql = text("""
         SELECT
-            id_jam_kerja, nama_shift, jam_mulai, jam_selesai, jam_per_hari
-        FROM ref_jam_kerja
-        WHERE id_jam_kerja = :id_jam_kerja
-          AND status = 1
-        LIMIT 1
+            EXISTS(
+                SELECT 1
+                FROM absensi a
+                WHERE a.id_pegawai = p.id_pegawai
+                  AND a.jam_keluar IS NULL
+                  AND a.status = 1
+            ) AS is_already_checkin,
+            ap.img_path,
+            ap.face_encoding,
+            ARRAY(
+                SELECT pla.id_lokasi
+                FROM pegawai_lokasi_absensi pla
+                WHERE pla.id_pegawai = p.id_pegawai
+                  AND pla.status = 1
+            ) AS lokasi_ids,
+            EXISTS(
+                SELECT 1
+                FROM pegawai_wfh pw
+                WHERE pw.id_pegawai = p.id_pegawai
+                  AND pw.status = 1
+            ) AS is_wfh,
+            (
+                :id_jam_kerja = 1
+                OR EXISTS(
+                    SELECT 1
+                    FROM pegawai_jam_kerja pjk
+                    WHERE pjk.id_pegawai = p.id_pegawai
+                      AND pjk.id_jam_kerja = :id_jam_kerja
+                      AND pjk.status = 1
+                )
+            ) AS is_valid_jam_kerja,
+            jk.id_jam_kerja,
+            jk.nama_shift,
+            jk.jam_mulai,
+            jk.jam_selesai,
+            jk.jam_per_hari
+        FROM (SELECT CAST(:id_pegawai AS INTEGER) AS id_pegawai) p
+        LEFT JOIN auth_pegawai ap
+          ON ap.id_pegawai = p.id_pegawai
+         AND ap.status = 1
+        LEFT JOIN ref_jam_kerja jk
+          ON jk.id_jam_kerja = :id_jam_kerja
+         AND jk.status = 1
     """)
     with engine.connect() as conn:
-        return conn.execute(
-            sql,
-            {"id_jam_kerja": id_jam_kerja}
-        ).mappings().first()
+        row = conn.execute(sql, {
+            "id_pegawai": id_pegawai,
+            "id_jam_kerja": id_jam_kerja
+        }).mappings().first()
 
-def insert_absensi_masuk(
-    id_pegawai: int, tanggal, jam_masuk, id_lokasi_masuk: int, id_jam_kerja: int, menit_terlambat: int
+    return {
+        "is_already_checkin": bool(row["is_already_checkin"]),
+        "face_data": {
+            "img_path": row["img_path"],
+            "face_encoding": row["face_encoding"]
+        },
+        "akses": {
+            "lokasi_ids": frozenset(row["lokasi_ids"] or []),
+            "is_wfh": bool(row["is_wfh"])
+        },
+        "is_valid_jam_kerja": bool(row["is_valid_jam_kerja"]),
+        "jam_kerja": {
+            "id_jam_kerja": row["id_jam_kerja"],
+            "nama_shift": row["nama_shift"],
+            "jam_mulai": row["jam_mulai"],
+            "jam_selesai": row["jam_selesai"],
+            "jam_per_hari": row["jam_per_hari"]
+        } if row["id_jam_kerja"] is not None else None
+    }
+
+def insert_absensi_checkin(
+    id_pegawai: int, tanggal, jam_masuk, id_lokasi_masuk: int, id_jam_kerja: int, menit_terlambat: int,
+    istirahat: dict = None
 ):
-    sql = text("""
+    """
+    Simpan absensi masuk dalam satu transaksi.
+    istirahat (opsional): jam_mulai, jam_selesai, durasi_menit, id_lokasi_balik
+    → istirahat otomatis shift cleaning disimpan & diakumulasi di statement kedua.
+    """
+    sql_absensi = text("""
         INSERT INTO absensi (
             id_pegawai, tanggal, id_jam_kerja, jam_masuk, id_lokasi_masuk, menit_terlambat, status, created_at, updated_at
         )
@@ -256,17 +279,45 @@ def insert_absensi_masuk(
         )
         RETURNING id_absensi
     """)
+    sql_istirahat = text("""
+        WITH new_istirahat AS (
+            INSERT INTO absensi_istirahat (
+                id_absensi, jam_mulai, jam_selesai, durasi_menit, id_lokasi_balik, status, created_at, updated_at
+            )
+            VALUES (
+                :id_absensi, :jam_mulai, :jam_selesai, :durasi_menit, :id_lokasi_balik, 1, :now, :now
+            )
+        )
+        UPDATE absensi
+        SET total_menit_istirahat =
+            COALESCE(total_menit_istirahat, 0) + :durasi_menit,
+            updated_at = :now
+        WHERE id_absensi = :id_absensi
+    """)
+    now = get_wita()
     with engine.begin() as conn:
-        return conn.execute(sql, {
+        id_absensi = conn.execute(sql_absensi, {
             "id_pegawai": id_pegawai,
             "tanggal": tanggal,
             "id_jam_kerja": id_jam_kerja,
             "jam_masuk": jam_masuk,
             "id_lokasi_masuk": id_lokasi_masuk,
             "menit_terlambat": menit_terlambat,
-            "now": get_wita()
+            "now": now
         }).scalar()
 
+        if istirahat:
+            conn.execute(sql_istirahat, {
+                "id_absensi": id_absensi,
+                "jam_mulai": istirahat["jam_mulai"],
+                "jam_selesai": istirahat["jam_selesai"],
+                "durasi_menit": istirahat["durasi_menit"],
+                "id_lokasi_balik": istirahat["id_lokasi_balik"],
+                "now": now
+            })
+
+        return id_absensi
+
 
 # HELPER UNTUK VALIDASI CHECKOUT KALAU SUDAH CHECKIN
 def get_active_absensi(id_pegawai: int):
@@ -487,21 +538,3 @@ def get_rekap_basic_absensi_bulanan(id_pegawai: int, start_date, end_date):
                 "end_date": end_date
             }
         ).mappings().first()
-
-def get_hari_libur_map(start_date, end_date):
-    sql = text("""
-        SELECT tanggal
-        FROM ref_hari_libur
-        WHERE status = 1
-          AND tanggal BETWEEN :start_date AND :end_date
-    """)
-    with engine.connect() as conn:
-        rows = conn.execute(
-            sql,
-            {
-                "start_date": start_date,
-                "end_date": end_date
-            }
-        ).fetchall()
-
-    return {row[0] for row in rows}  # set of date
@@ -1,6 +1,7 @@
 from sqlalchemy import text
 from api.utils.config import engine
 from api.shared.helper import get_wita
+from api.utils.ref_cache import bump_ref_version
 
 
 # ======================================
@@ -66,6 +67,8 @@ def update_pegawai_last_login(id_auth_pegawai: int):
             "id_auth_pegawai": id_auth_pegawai,
             "now": get_wita()
         })
+        # ETag /pegawai/all-data & /pegawai/akun (last_login_at)
+        bump_ref_version(conn, "auth_login")
 
 
 # ======================================
@@ -1,5 +1,6 @@
 from sqlalchemy import text
 from api.utils.config import engine
+from api.utils.streaming import stream_mappings
 from api.shared.helper import get_wita
 
 
@@ -150,7 +151,8 @@ def get_lembur_list(
     status_approval=None,
     id_departemen=None,
     id_status_pegawai=None,
-    id_pegawai=None
+    id_pegawai=None,
+    stream=False
 ):
     sql = """
         SELECT
@@ -211,6 +213,10 @@ def get_lembur_list(
 
     sql += " ORDER BY l.tanggal DESC, l.created_at DESC"
 
+    # stream=True → generator chunk dari server-side cursor (response streaming)
+    if stream:
+        return stream_mappings(text(sql), params)
+
     with engine.connect() as conn:
         return conn.execute(text(sql), params).mappings().all()
 
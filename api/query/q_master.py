@@ -1,11 +1,13 @@
 from sqlalchemy import text
 from api.utils.config import engine
 from api.shared.helper import get_wita
+from api.utils.ref_cache import ref_cached, ref_writes
 
 
 # ==================================================
 # REF STATUS PEGAWAI
 # ==================================================
+@ref_cached("ref_status_pegawai")
 def get_status_pegawai_list():
     sql = text("""
         SELECT
@@ -18,6 +20,7 @@ def get_status_pegawai_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_status_pegawai")
 def get_status_pegawai_by_id(id_status_pegawai: int):
     sql = text("""
         SELECT
@@ -33,6 +36,7 @@ def get_status_pegawai_by_id(id_status_pegawai: int):
         ).mappings().first()
 
 
+@ref_writes("ref_status_pegawai")
 def create_status_pegawai(nama_status: str):
     sql = text("""
         INSERT INTO ref_status_pegawai (nama_status)
@@ -46,6 +50,7 @@ def create_status_pegawai(nama_status: str):
         ).mappings().first()
 
 
+@ref_writes("ref_status_pegawai")
 def update_status_pegawai(id_status_pegawai: int, nama_status: str):
     sql = text("""
         UPDATE ref_status_pegawai
@@ -64,6 +69,7 @@ def update_status_pegawai(id_status_pegawai: int, nama_status: str):
         }).mappings().first()
 
 
+@ref_writes("ref_status_pegawai")
 def delete_status_pegawai(id_status_pegawai: int):
     sql = text("""
         UPDATE ref_status_pegawai
@@ -84,6 +90,7 @@ def delete_status_pegawai(id_status_pegawai: int):
 # ==================================================
 # REF DEPARTEMEN
 # ==================================================
+@ref_cached("ref_departemen")
 def get_departemen_list():
     sql = text("""
         SELECT
@@ -96,6 +103,7 @@ def get_departemen_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_departemen")
 def get_departemen_by_id(id_departemen: int):
     sql = text("""
         SELECT
@@ -111,6 +119,7 @@ def get_departemen_by_id(id_departemen: int):
         ).mappings().first()
 
 
+@ref_writes("ref_departemen")
 def create_departemen(nama_departemen: str):
     sql = text("""
         INSERT INTO ref_departemen (nama_departemen)
@@ -124,6 +133,7 @@ def create_departemen(nama_departemen: str):
         ).mappings().first()
 
 
+@ref_writes("ref_departemen")
 def update_departemen(id_departemen: int, nama_departemen: str):
     sql = text("""
         UPDATE ref_departemen
@@ -142,6 +152,7 @@ def update_departemen(id_departemen: int, nama_departemen: str):
         }).mappings().first()
 
 
+@ref_writes("ref_departemen")
 def delete_departemen(id_departemen: int):
     sql = text("""
         UPDATE ref_departemen
@@ -162,6 +173,7 @@ def delete_departemen(id_departemen: int):
 # ==================================================
 # REF JABATAN
 # ==================================================
+@ref_cached("ref_jabatan")
 def get_jabatan_list():
     sql = text("""
         SELECT
@@ -174,6 +186,7 @@ def get_jabatan_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_jabatan")
 def get_jabatan_by_id(id_jabatan: int):
     sql = text("""
         SELECT
@@ -189,6 +202,7 @@ def get_jabatan_by_id(id_jabatan: int):
         ).mappings().first()
 
 
+@ref_writes("ref_jabatan")
 def create_jabatan(nama_jabatan: str):
     sql = text("""
         INSERT INTO ref_jabatan (nama_jabatan)
@@ -202,6 +216,7 @@ def create_jabatan(nama_jabatan: str):
         ).mappings().first()
 
 
+@ref_writes("ref_jabatan")
 def update_jabatan(id_jabatan: int, nama_jabatan: str):
     sql = text("""
         UPDATE ref_jabatan
@@ -220,6 +235,7 @@ def update_jabatan(id_jabatan: int, nama_jabatan: str):
         }).mappings().first()
 
 
+@ref_writes("ref_jabatan")
 def delete_jabatan(id_jabatan: int):
     sql = text("""
         UPDATE ref_jabatan
@@ -240,6 +256,7 @@ def delete_jabatan(id_jabatan: int):
 # ==================================================
 # REF LEVEL JABATAN
 # ==================================================
+@ref_cached("ref_level_jabatan")
 def get_level_jabatan_list():
     sql = text("""
         SELECT
@@ -252,6 +269,7 @@ def get_level_jabatan_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_level_jabatan")
 def get_level_jabatan_by_id(id_level_jabatan: int):
     sql = text("""
         SELECT
@@ -267,6 +285,7 @@ def get_level_jabatan_by_id(id_level_jabatan: int):
         ).mappings().first()
 
 
+@ref_writes("ref_level_jabatan")
 def create_level_jabatan(nama_level: str, urutan_level: int):
     sql = text("""
         INSERT INTO ref_level_jabatan (nama_level, urutan_level)
@@ -281,6 +300,7 @@ def create_level_jabatan(nama_level: str, urutan_level: int):
         }).mappings().first()
 
 
+@ref_writes("ref_level_jabatan")
 def update_level_jabatan(id_level_jabatan: int, nama_level: str, urutan_level: int):
     sql = text("""
         UPDATE ref_level_jabatan
@@ -301,6 +321,7 @@ def update_level_jabatan(id_level_jabatan: int, nama_level: str, urutan_level: i
         }).mappings().first()
 
 
+@ref_writes("ref_level_jabatan")
 def delete_level_jabatan(id_level_jabatan: int):
     sql = text("""
         UPDATE ref_level_jabatan
@@ -321,6 +342,7 @@ def delete_level_jabatan(id_level_jabatan: int):
 # ==================================================
 # REF JAM KERJA (SHIFT)
 # ==================================================
+@ref_cached("ref_jam_kerja")
 def get_jam_kerja_list():
     sql = text("""
         SELECT
@@ -333,6 +355,7 @@ def get_jam_kerja_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_jam_kerja")
 def get_jam_kerja_by_id(id_jam_kerja: int):
     sql = text("""
         SELECT
@@ -370,6 +393,7 @@ def get_jam_kerja_by_pegawai(id_pegawai: int):
         ).mappings().all()
 
 
+@ref_cached("ref_jam_kerja")
 def get_default_jam_kerja():
     """
     Ambil shift default (Normal)
@@ -386,6 +410,7 @@ def get_default_jam_kerja():
         return conn.execute(sql).mappings().first()
 
 
+@ref_writes("ref_jam_kerja")
 def create_jam_kerja(nama_shift: str, jam_per_hari: int):
     sql = text("""
         INSERT INTO ref_jam_kerja (nama_shift, jam_per_hari)
@@ -400,6 +425,7 @@ def create_jam_kerja(nama_shift: str, jam_per_hari: int):
         }).mappings().first()
 
 
+@ref_writes("ref_jam_kerja")
 def update_jam_kerja(id_jam_kerja: int, nama_shift: str, jam_per_hari: int):
     sql = text("""
         UPDATE ref_jam_kerja
@@ -420,6 +446,7 @@ def update_jam_kerja(id_jam_kerja: int, nama_shift: str, jam_per_hari: int):
         }).mappings().first()
 
 
+@ref_writes("ref_jam_kerja")
 def delete_jam_kerja(id_jam_kerja: int):
     sql = text("""
         UPDATE ref_jam_kerja
@@ -440,6 +467,7 @@ def delete_jam_kerja(id_jam_kerja: int):
 # ==================================================
 # REF LOKASI ABSENSI
 # ==================================================
+@ref_cached("ref_lokasi_absensi")
 def get_lokasi_absensi_list():
     sql = text("""
         SELECT
@@ -452,6 +480,7 @@ def get_lokasi_absensi_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_lokasi_absensi")
 def get_lokasi_absensi_by_id(id_lokasi: int):
     sql = text("""
         SELECT
@@ -467,6 +496,7 @@ def get_lokasi_absensi_by_id(id_lokasi: int):
         ).mappings().first()
 
 
+@ref_writes("ref_lokasi_absensi")
 def create_lokasi_absensi(nama_lokasi: str, latitude: float, longitude: float, radius_meter: int):
     sql = text("""
         INSERT INTO ref_lokasi_absensi
@@ -485,6 +515,7 @@ def create_lokasi_absensi(nama_lokasi: str, latitude: float, longitude: float, r
         }).mappings().first()
 
 
+@ref_writes("ref_lokasi_absensi")
 def update_lokasi_absensi(id_lokasi: int, nama_lokasi: str, latitude: float, longitude: float, radius_meter: int):
     sql = text("""
         UPDATE ref_lokasi_absensi
@@ -509,6 +540,7 @@ def update_lokasi_absensi(id_lokasi: int, nama_lokasi: str, latitude: float, lon
         }).mappings().first()
 
 
+@ref_writes("ref_lokasi_absensi")
 def delete_lokasi_absensi(id_lokasi: int):
     sql = text("""
         UPDATE ref_lokasi_absensi
@@ -529,6 +561,7 @@ def delete_lokasi_absensi(id_lokasi: int):
 # ==================================================
 # REF JENIS IZIN
 # ==================================================
+@ref_cached("ref_jenis_izin")
 def get_jenis_izin_list():
     sql = text("""
         SELECT
@@ -541,6 +574,7 @@ def get_jenis_izin_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_jenis_izin")
 def get_jenis_izin_by_id(id_jenis_izin: int):
     sql = text("""
         SELECT
@@ -556,6 +590,7 @@ def get_jenis_izin_by_id(id_jenis_izin: int):
         ).mappings().first()
 
 
+@ref_writes("ref_jenis_izin")
 def create_jenis_izin(nama_izin: str, potong_cuti: bool):
     sql = text("""
         INSERT INTO ref_jenis_izin (nama_izin, potong_cuti)
@@ -570,6 +605,7 @@ def create_jenis_izin(nama_izin: str, potong_cuti: bool):
         }).mappings().first()
 
 
+@ref_writes("ref_jenis_izin")
 def update_jenis_izin(id_jenis_izin: int, nama_izin: str, potong_cuti: bool):
     sql = text("""
         UPDATE ref_jenis_izin
@@ -589,6 +625,7 @@ def update_jenis_izin(id_jenis_izin: int, nama_izin: str, potong_cuti: bool):
         }).mappings().first()
 
 
+@ref_writes("ref_jenis_izin")
 def delete_jenis_izin(id_jenis_izin: int):
     sql = text("""
         UPDATE ref_jenis_izin
@@ -605,6 +642,7 @@ def delete_jenis_izin(id_jenis_izin: int):
 # ==================================================
 # REF JENIS LEMBUR
 # ==================================================
+@ref_cached("ref_jenis_lembur")
 def get_jenis_lembur_list():
     sql = text("""
         SELECT
@@ -617,6 +655,7 @@ def get_jenis_lembur_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_jenis_lembur")
 def get_jenis_lembur_by_id(id_jenis_lembur: int):
     sql = text("""
         SELECT
@@ -632,6 +671,7 @@ def get_jenis_lembur_by_id(id_jenis_lembur: int):
         ).mappings().first()
 
 
+@ref_writes("ref_jenis_lembur")
 def create_jenis_lembur(nama_jenis: str, deskripsi: str | None):
     sql = text("""
         INSERT INTO ref_jenis_lembur (nama_jenis, deskripsi)
@@ -646,6 +686,7 @@ def create_jenis_lembur(nama_jenis: str, deskripsi: str | None):
         }).mappings().first()
 
 
+@ref_writes("ref_jenis_lembur")
 def update_jenis_lembur(id_jenis_lembur: int, nama_jenis: str, deskripsi: str | None):
     sql = text("""
         UPDATE ref_jenis_lembur
@@ -665,6 +706,7 @@ def update_jenis_lembur(id_jenis_lembur: int, nama_jenis: str, deskripsi: str |
         }).mappings().first()
 
 
+@ref_writes("ref_jenis_lembur")
 def delete_jenis_lembur(id_jenis_lembur: int):
     sql = text("""
         UPDATE ref_jenis_lembur
@@ -681,6 +723,7 @@ def delete_jenis_lembur(id_jenis_lembur: int):
 # ==================================================
 # REF LEMBUR RULE
 # ==================================================
+@ref_cached("ref_lembur_rule", "ref_jenis_lembur")
 def get_lembur_rule_list():
     sql = text("""
         SELECT
@@ -696,6 +739,7 @@ def get_lembur_rule_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_lembur_rule", "ref_jenis_lembur")
 def get_lembur_rule_by_id(id_rule: int):
     sql = text("""
         SELECT
@@ -714,6 +758,7 @@ def get_lembur_rule_by_id(id_rule: int):
         ).mappings().first()
 
 
+@ref_writes("ref_lembur_rule")
 def create_lembur_rule(id_jenis_lembur: int, urutan_jam: int, menit_dari: int, menit_sampai: int, pengali: float):
     sql = text("""
         INSERT INTO ref_lembur_rule
@@ -733,6 +778,7 @@ def create_lembur_rule(id_jenis_lembur: int, urutan_jam: int, menit_dari: int, m
         }).mappings().first()
 
 
+@ref_writes("ref_lembur_rule")
 def update_lembur_rule(id_rule: int, id_jenis_lembur: int, urutan_jam: int, menit_dari: int, menit_sampai: int, pengali: float):
     sql = text("""
         UPDATE ref_lembur_rule
@@ -759,6 +805,7 @@ def update_lembur_rule(id_rule: int, id_jenis_lembur: int, urutan_jam: int, meni
         }).mappings().first()
 
 
+@ref_writes("ref_lembur_rule")
 def delete_lembur_rule(id_rule: int):
     sql = text("""
         UPDATE ref_lembur_rule
@@ -779,6 +826,7 @@ def delete_lembur_rule(id_rule: int):
 # ==================================================
 # REF HARI LIBUR
 # ==================================================
+@ref_cached("ref_hari_libur")
 def get_hari_libur_list():
     sql = text("""
         SELECT
@@ -791,6 +839,7 @@ def get_hari_libur_list():
         return conn.execute(sql).mappings().all()
 
 
+@ref_cached("ref_hari_libur")
 def get_hari_libur_by_id(id_libur: int):
     sql = text("""
         SELECT
@@ -806,6 +855,7 @@ def get_hari_libur_by_id(id_libur: int):
         ).mappings().first()
 
 
+@ref_writes("ref_hari_libur")
 def create_hari_libur(tanggal, nama_libur: str, jenis: str):
     sql = text("""
         INSERT INTO ref_hari_libur (tanggal, nama_libur, jenis)
@@ -821,6 +871,7 @@ def create_hari_libur(tanggal, nama_libur: str, jenis: str):
         }).mappings().first()
 
 
+@ref_writes("ref_hari_libur")
 def update_hari_libur(id_libur: int, tanggal, nama_libur: str, jenis: str):
     sql = text("""
         UPDATE ref_hari_libur
@@ -843,6 +894,7 @@ def update_hari_libur(id_libur: int, tanggal, nama_libur: str, jenis: str):
         }).mappings().first()
 
 
+@ref_writes("ref_hari_libur")
 def delete_hari_libur(id_libur: int):
     sql = text("""
         UPDATE ref_hari_libur
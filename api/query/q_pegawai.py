@@ -1,8 +1,26 @@
-import os
 from sqlalchemy import text
-from api.shared.exceptions import NotFoundError, DatabaseError
+from api.shared.exceptions import NotFoundError, DatabaseError, ValidationError
 from api.utils.config import engine
-from api.shared.helper import _validate_image_file, extract_face_grayscale, get_wita, upload_face_to_cdn
+from api.utils.streaming import stream_mappings
+from api.shared.helper import _validate_image_file, get_wita, upload_face_to_cdn
+from api.utils.face import encoding_to_bytes, extract_reference_face, invalidate_face_cache
+from api.utils.akses_cache import invalidate_akses_pegawai
+from api.utils.db import release_request_connection
+from api.utils.ref_cache import bump_ref_version, ref_writes
+
+
+# Tabel pegawai yang versinya dicatat di ref_version (migrations/004) → ETag GET /pegawai/*
+PEGAWAI_TABLES = (
+    "pegawai", "pegawai_pribadi", "pegawai_rekening", "pegawai_pendidikan",
+    "pegawai_lokasi_absensi", "auth_pegawai"
+)
+# ditambah master yang ikut di-JOIN listing pegawai
+PEGAWAI_READ_TABLES = PEGAWAI_TABLES + (
+    "ref_departemen", "ref_jabatan", "ref_level_jabatan", "ref_status_pegawai", "ref_lokasi_absensi"
+)
+# listing yang menampilkan last_login_at: login tidak menaikkan versi auth_pegawai,
+# jadi ikut versi manual "auth_login" (dinaikkan update_pegawai_last_login)
+PEGAWAI_LOGIN_READ_TABLES = PEGAWAI_READ_TABLES + ("auth_login",)
 
 
 # ==================================================
@@ -67,64 +85,66 @@ def get_lokasi_pegawai(id_pegawai: int):
 # ==================================================
 # ALL DATA PEGAWAI
 # ==================================================
-def get_all_pegawai_core():
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.nama_panggilan, p.jenis_kelamin, p.tanggal_masuk,
+def get_all_pegawai_core(fields=None, after=None, limit=None, stream=False):
+    return get_pegawai_listing("all-data", fields=fields, after=after, limit=limit, stream=stream)
 
-            d.id_departemen, d.nama_departemen, j.id_jabatan, j.nama_jabatan, lj.id_level_jabatan, lj.nama_level as level_jabatan,
-            sp.id_status_pegawai, sp.nama_status AS status_pegawai,
 
-            pr.nik, pr.alamat, pr.no_telepon, pr.email_pribadi, pr.tempat_lahir, pr.tanggal_lahir,
-            pr.image_path, pr.agama, pr.status_nikah,
-
-            r.nama_bank, r.no_rekening, r.atas_nama,
-
-            ap.username, ap.kode_pemulihan, ap.img_path, ap.status AS auth_status, ap.last_login_at
-
-        FROM pegawai p
-        LEFT JOIN ref_departemen d ON d.id_departemen = p.id_departemen
-        LEFT JOIN ref_jabatan j ON j.id_jabatan = p.id_jabatan
-        LEFT JOIN ref_level_jabatan lj ON lj.id_level_jabatan = p.id_level_jabatan
-        LEFT JOIN ref_status_pegawai sp ON sp.id_status_pegawai = p.id_status_pegawai
-
-        LEFT JOIN pegawai_pribadi pr ON pr.id_pegawai = p.id_pegawai AND pr.status = 1
-        LEFT JOIN pegawai_rekening r ON r.id_pegawai = p.id_pegawai AND r.status = 1
-        LEFT JOIN auth_pegawai ap ON ap.id_pegawai = p.id_pegawai AND ap.status = 1
-
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
-    """)
+def get_pendidikan_map(id_pegawai_list: list[int]) -> dict:
+    """Pendidikan terakhir (tahun_lulus terbaru) untuk banyak pegawai sekaligus"""
+    if not id_pegawai_list:
+        return {}
 
-    with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
-    
-    
-def get_pendidikan_by_pegawai(id_pegawai: int):
     sql = text("""
-        SELECT
-            jenjang, institusi, jurusan, tahun_masuk, tahun_lulus
+        SELECT DISTINCT ON (id_pegawai)
+            id_pegawai, jenjang, institusi, jurusan, tahun_masuk, tahun_lulus
         FROM pegawai_pendidikan
-        WHERE id_pegawai = :id
+        WHERE id_pegawai = ANY(:ids)
           AND status = 1
-        ORDER BY tahun_lulus DESC
+        ORDER BY id_pegawai, tahun_lulus DESC
     """)
     with engine.connect() as conn:
-        return conn.execute(sql, {"id": id_pegawai}).mappings().fetchone()
-    
-    
-def get_lokasi_absensi_by_pegawai(id_pegawai: int):
+        rows = conn.execute(sql, {"ids": list(id_pegawai_list)}).mappings().all()
+
+    return {
+        row["id_pegawai"]: {
+            "jenjang": row["jenjang"],
+            "institusi": row["institusi"],
+            "jurusan": row["jurusan"],
+            "tahun_masuk": row["tahun_masuk"],
+            "tahun_lulus": row["tahun_lulus"]
+        }
+        for row in rows
+    }
+
+
+def get_lokasi_absensi_map(id_pegawai_list: list[int]) -> dict:
+    """Lokasi absensi aktif untuk banyak pegawai sekaligus → {id_pegawai: [lokasi]}"""
+    if not id_pegawai_list:
+        return {}
+
     sql = text("""
         SELECT
-            l.id_lokasi, l.nama_lokasi, l.latitude, l.longitude, l.radius_meter
+            pla.id_pegawai, l.id_lokasi, l.nama_lokasi, l.latitude, l.longitude, l.radius_meter
         FROM pegawai_lokasi_absensi pla
         JOIN ref_lokasi_absensi l ON l.id_lokasi = pla.id_lokasi
-        WHERE pla.id_pegawai = :id
+        WHERE pla.id_pegawai = ANY(:ids)
           AND pla.status = 1
           AND l.status = 1
+        ORDER BY pla.id_pegawai, l.id_lokasi
     """)
     with engine.connect() as conn:
-        return conn.execute(sql, {"id": id_pegawai}).mappings().all()
+        rows = conn.execute(sql, {"ids": list(id_pegawai_list)}).mappings().all()
+
+    result = {}
+    for row in rows:
+        result.setdefault(row["id_pegawai"], []).append({
+            "id_lokasi": row["id_lokasi"],
+            "nama_lokasi": row["nama_lokasi"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "radius_meter": row["radius_meter"]
+        })
+    return result
 
 
 
@@ -145,131 +165,171 @@ def get_pegawai_basic():
 
 
 # ==================================================
-# GET DATA PEGAWAI PER TAB
+# LISTING PEGAWAI: PROYEKSI FIELD + KEYSET PAGINATION
 # ==================================================
-def get_pegawai_profile():
-    """
-    Ambil data profile pegawai (CORE TAB)
-    """
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.nama_panggilan, p.jenis_kelamin, p.tanggal_masuk,
-            p.id_status_pegawai, p.id_jabatan, p.id_departemen, p.id_level_jabatan,
-            
-            sp.nama_status AS status_pegawai, j.nama_jabatan, d.nama_departemen, lj.nama_level AS level_jabatan,
-
-            pr.nik, pr.agama, pr.tempat_lahir, pr.tanggal_lahir, pr.status_nikah, pr.email_pribadi, pr.no_telepon, 
-            pr.alamat
-
-        FROM pegawai p
-        LEFT JOIN ref_status_pegawai sp
-            ON sp.id_status_pegawai = p.id_status_pegawai
-        LEFT JOIN ref_jabatan j
-            ON j.id_jabatan = p.id_jabatan
-        LEFT JOIN ref_departemen d
-            ON d.id_departemen = p.id_departemen
-        LEFT JOIN ref_level_jabatan lj
-            ON lj.id_level_jabatan = p.id_level_jabatan
-        LEFT JOIN pegawai_pribadi pr
-            ON pr.id_pegawai = p.id_pegawai
-           AND pr.status = 1
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
-    """)
-    with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
-
-
-def get_pegawai_rekening():
+# Tiap listing = {field output: ([kolom SQL], (alias join yang dibutuhkan))}.
+# SELECT & JOIN dibangun hanya dari field yang diminta (?fields=), halaman
+# dipotong di level pegawai (CTE page) dengan urutan stabil
+# (nama_lengkap, id_pegawai) → cursor ?after=<nama_lengkap>,<id_pegawai>.
+_PEGAWAI_JOINS = [
+    ("d", "LEFT JOIN ref_departemen d ON d.id_departemen = p.id_departemen"),
+    ("j", "LEFT JOIN ref_jabatan j ON j.id_jabatan = p.id_jabatan"),
+    ("lj", "LEFT JOIN ref_level_jabatan lj ON lj.id_level_jabatan = p.id_level_jabatan"),
+    ("sp", "LEFT JOIN ref_status_pegawai sp ON sp.id_status_pegawai = p.id_status_pegawai"),
+    ("pr", "LEFT JOIN pegawai_pribadi pr ON pr.id_pegawai = p.id_pegawai AND pr.status = 1"),
+    ("r", "LEFT JOIN pegawai_rekening r ON r.id_pegawai = p.id_pegawai AND r.status = 1"),
+    ("ap", "LEFT JOIN auth_pegawai ap ON ap.id_pegawai = p.id_pegawai AND ap.status = 1"),
+    # tab akun menampilkan akun non-aktif juga
+    ("ap_all", "LEFT JOIN auth_pegawai ap_all ON ap_all.id_pegawai = p.id_pegawai"),
+    ("pd", "LEFT JOIN pegawai_pendidikan pd ON pd.id_pegawai = p.id_pegawai AND pd.status = 1"),
+    ("pla", "LEFT JOIN pegawai_lokasi_absensi pla ON pla.id_pegawai = p.id_pegawai AND pla.status = 1"),
+    ("la", "LEFT JOIN ref_lokasi_absensi la ON la.id_lokasi = pla.id_lokasi AND la.status = 1"),
+]
+
+_PEGAWAI_CORE_FIELDS = {
+    "id_pegawai": (["p.id_pegawai"], ()),
+    "nip": (["p.nip"], ()),
+    "nama_lengkap": (["p.nama_lengkap"], ()),
+    "tanggal_masuk": (["p.tanggal_masuk"], ()),
+}
+
+PEGAWAI_LISTINGS = {
+    "all-data": {
+        **_PEGAWAI_CORE_FIELDS,
+        "nama_panggilan": (["p.nama_panggilan"], ()),
+        "jenis_kelamin": (["p.jenis_kelamin"], ()),
+        "id_departemen": (["d.id_departemen"], ("d",)),
+        "departemen": (["d.nama_departemen"], ("d",)),
+        "id_jabatan": (["j.id_jabatan"], ("j",)),
+        "jabatan": (["j.nama_jabatan"], ("j",)),
+        "id_level_jabatan": (["lj.id_level_jabatan"], ("lj",)),
+        "level_jabatan": (["lj.nama_level AS level_jabatan"], ("lj",)),
+        "id_status_pegawai": (["sp.id_status_pegawai"], ("sp",)),
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "pribadi": ([
+            "pr.nik", "pr.alamat", "pr.no_telepon", "pr.email_pribadi", "pr.tempat_lahir",
+            "pr.tanggal_lahir", "pr.image_path", "pr.agama", "pr.status_nikah"
+        ], ("pr",)),
+        "rekening": (["r.nama_bank", "r.no_rekening", "r.atas_nama"], ("r",)),
+        "auth_pegawai": ([
+            "ap.username", "ap.kode_pemulihan", "ap.img_path",
+            "ap.status AS auth_status", "ap.last_login_at"
+        ], ("ap",)),
+        # dimuat terpisah lewat batch loader
+        "pendidikan": ([], ()),
+        "lokasi_absensi": ([], ()),
+    },
+    "profile": {
+        **_PEGAWAI_CORE_FIELDS,
+        "nama_panggilan": (["p.nama_panggilan"], ()),
+        "jenis_kelamin": (["p.jenis_kelamin"], ()),
+        "id_status_pegawai": (["p.id_status_pegawai"], ()),
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "id_jabatan": (["p.id_jabatan"], ()),
+        "jabatan": (["j.nama_jabatan AS jabatan"], ("j",)),
+        "id_departemen": (["p.id_departemen"], ()),
+        "departemen": (["d.nama_departemen AS departemen"], ("d",)),
+        "id_level_jabatan": (["p.id_level_jabatan"], ()),
+        "level_jabatan": (["lj.nama_level AS level_jabatan"], ("lj",)),
+        "nik": (["pr.nik"], ("pr",)),
+        "agama": (["pr.agama"], ("pr",)),
+        "tempat_lahir": (["pr.tempat_lahir"], ("pr",)),
+        "tanggal_lahir": (["pr.tanggal_lahir"], ("pr",)),
+        "status_nikah": (["pr.status_nikah"], ("pr",)),
+        "email": (["pr.email_pribadi AS email"], ("pr",)),
+        "no_telepon": (["pr.no_telepon"], ("pr",)),
+        "alamat": (["pr.alamat"], ("pr",)),
+    },
+    "rekening": {
+        **_PEGAWAI_CORE_FIELDS,
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "nama_bank": (["r.nama_bank"], ("r",)),
+        "no_rekening": (["r.no_rekening"], ("r",)),
+        "atas_nama": (["r.atas_nama"], ("r",)),
+    },
+    "pendidikan": {
+        **_PEGAWAI_CORE_FIELDS,
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "jenjang": (["pd.jenjang"], ("pd",)),
+        "institusi": (["pd.institusi"], ("pd",)),
+        "jurusan": (["pd.jurusan"], ("pd",)),
+        "tahun_masuk": (["pd.tahun_masuk"], ("pd",)),
+        "tahun_lulus": (["pd.tahun_lulus"], ("pd",)),
+    },
+    "akun": {
+        **_PEGAWAI_CORE_FIELDS,
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "username": (["ap_all.username"], ("ap_all",)),
+        "kode_pemulihan": (["ap_all.kode_pemulihan"], ("ap_all",)),
+        "img_path": (["ap_all.img_path"], ("ap_all",)),
+        "last_login_at": (["ap_all.last_login_at"], ("ap_all",)),
+        "status": (["ap_all.status AS status"], ("ap_all",)),
+    },
+    "lokasi": {
+        **_PEGAWAI_CORE_FIELDS,
+        "status_pegawai": (["sp.nama_status AS status_pegawai"], ("sp",)),
+        "lokasi_absensi": ([
+            "la.id_lokasi", "la.nama_lokasi", "la.latitude", "la.longitude", "la.radius_meter"
+        ], ("pla", "la")),
+    },
+}
+
+
+def get_pegawai_listing(listing: str, fields=None, after=None, limit=None, stream=False):
     """
-    Ambil data rekening pegawai (TAB REKENING)
+    Ambil data listing pegawai.
+    - fields : list field output (None = semua); id_pegawai & nama_lengkap selalu diambil
+    - after  : (nama_lengkap, id_pegawai) baris terakhir halaman sebelumnya
+    - limit  : jumlah pegawai per halaman (None = semua)
+    - stream : True → generator chunk dari server-side cursor
+    Urutan: nama_lengkap ASC, id_pegawai ASC (+ baris detail untuk tab 1:N).
     """
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.tanggal_masuk, sp.nama_status AS status_pegawai, 
-            r.nama_bank, r.no_rekening, r.atas_nama
-        FROM pegawai p
-        LEFT JOIN ref_status_pegawai sp
-            ON sp.id_status_pegawai = p.id_status_pegawai
-        LEFT JOIN pegawai_rekening r
-            ON r.id_pegawai = p.id_pegawai
-           AND r.status = 1
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
-    """)
-    with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
-    
-
-def get_pegawai_pendidikan():
-    """
-    Ambil data pendidikan pegawai (TAB PENDIDIKAN)
-    """
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.tanggal_masuk, sp.nama_status AS status_pegawai,
-            pd.jenjang, pd.institusi, pd.jurusan, pd.tahun_masuk, pd.tahun_lulus
-        FROM pegawai p
-        LEFT JOIN ref_status_pegawai sp
-            ON sp.id_status_pegawai = p.id_status_pegawai
-        LEFT JOIN pegawai_pendidikan pd
-            ON pd.id_pegawai = p.id_pegawai
-           AND pd.status = 1
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
+    spec = PEGAWAI_LISTINGS[listing]
+    selected = ["id_pegawai", "nama_lengkap"] + [f for f in (fields or spec) if f in spec]
+
+    columns = []
+    aliases = set()
+    for field in selected:
+        cols, join_aliases = spec[field]
+        columns.extend(cols)
+        aliases.update(join_aliases)
+
+    joins = "\n        ".join(sql for alias, sql in _PEGAWAI_JOINS if alias in aliases)
+    cursor_sql = "AND (p.nama_lengkap, p.id_pegawai) > (:after_nama, :after_id)" if after else ""
+    limit_sql = "LIMIT :limit" if limit else ""
+    detail_order = ", la.id_lokasi ASC" if "la" in aliases else ""
+
+    sql = text(f"""
+        WITH page AS (
+            SELECT *
+            FROM pegawai p
+            WHERE p.status = 1
+              {cursor_sql}
+            ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
+            {limit_sql}
+        )
+        SELECT {", ".join(dict.fromkeys(columns))}
+        FROM page p
+        {joins}
+        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC{detail_order}
     """)
-    with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
-
 
-def get_pegawai_akun():
-    """
-    Ambil data akun sistem pegawai (TAB AKUN)
-    """
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.tanggal_masuk, sp.nama_status AS status_pegawai,
-            ap.username, ap.kode_pemulihan, ap.img_path, ap.last_login_at, ap.status AS auth_status
-        FROM pegawai p
-        LEFT JOIN ref_status_pegawai sp
-            ON sp.id_status_pegawai = p.id_status_pegawai
-        LEFT JOIN auth_pegawai ap
-            ON ap.id_pegawai = p.id_pegawai
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
-    """)
-    with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
+    params = {"limit": limit}
+    if after:
+        params["after_nama"], params["after_id"] = after
 
+    if stream:
+        return stream_mappings(sql, params)
 
-def get_pegawai_lokasi():
-    """
-    Ambil data lokasi absensi pegawai (TAB LOKASI)
-    """
-    sql = text("""
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, p.tanggal_masuk, sp.nama_status AS status_pegawai,
-            la.id_lokasi, la.nama_lokasi, la.latitude, la.longitude, la.radius_meter
-        FROM pegawai p
-        LEFT JOIN ref_status_pegawai sp
-            ON sp.id_status_pegawai = p.id_status_pegawai
-        LEFT JOIN pegawai_lokasi_absensi pla
-            ON pla.id_pegawai = p.id_pegawai
-           AND pla.status = 1
-        LEFT JOIN ref_lokasi_absensi la
-            ON la.id_lokasi = pla.id_lokasi
-           AND la.status = 1
-        WHERE p.status = 1
-        ORDER BY p.nama_lengkap ASC, p.id_pegawai ASC
-    """)
     with engine.connect() as conn:
-        return conn.execute(sql).mappings().all()
+        return conn.execute(sql, params).mappings().all()
 
 
 
 # ==================================================
 # REGISTER PEGAWAI BARU
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def register_pegawai(
     nama_lengkap,
     nip,
@@ -328,6 +388,7 @@ def register_pegawai(
 # ==================================================
 # UPDATE DAN INSERT DATA PEGAWAI PRIBADI
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def update_pegawai_lengkap(id_pegawai: int, pegawai_data: dict, pribadi_data: dict):
     with engine.begin() as conn:
         sql_pegawai = text("""
@@ -411,6 +472,7 @@ def update_pegawai_lengkap(id_pegawai: int, pegawai_data: dict, pribadi_data: di
 # ==================================================
 # UPDATE DAN INSERT REKENING PEGAWAI
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def upsert_pegawai_rekening(id_pegawai: int, nama_bank: str, no_rekening: str, atas_nama: str):
     with engine.begin() as conn:
 
@@ -471,6 +533,7 @@ def upsert_pegawai_rekening(id_pegawai: int, nama_bank: str, no_rekening: str, a
 # ==================================================
 # UPDATE DAN INSERT PEDIDIKAN PEGAWAI
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def upsert_pegawai_pendidikan(
     id_pegawai: int,
     jenjang: str,
@@ -544,6 +607,7 @@ def upsert_pegawai_pendidikan(
 # ==================================================
 # UPDATE WAJAH PEGAWAI UNTUK VERIFIKASI ABSENSI
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def enroll_face_pegawai(id_pegawai: int, file):
     _validate_image_file(file)
 
@@ -551,40 +615,48 @@ def enroll_face_pegawai(id_pegawai: int, file):
     if not auth:
         raise NotFoundError("Akun pegawai belum tersedia")
 
-    face_path = extract_face_grayscale(file)
+    # koneksi request dilepas selama job wajah & upload CDN (UPDATE di bawah
+    # mengambil koneksi baru)
+    release_request_connection()
 
-    try:
-        img_url = upload_face_to_cdn(face_path)
+    # crop + encoding dihitung sekali di pool, verifikasi cukup encode foto live
+    face_bytes, encoding = extract_reference_face(file)
+    if encoding is None:
+        raise ValidationError("Wajah tidak terdeteksi dengan jelas")
 
-        sql = text("""
-            UPDATE auth_pegawai
-            SET img_path = :img_path,
-                updated_at = :now
-            WHERE id_pegawai = :id_pegawai
-              AND status = 1
-        """)
+    img_url = upload_face_to_cdn(face_bytes)
 
-        with engine.begin() as conn:
-            result = conn.execute(sql, {
-                "id_pegawai": id_pegawai,
-                "img_path": img_url,
-                "now": get_wita()
-            })
+    sql = text("""
+        UPDATE auth_pegawai
+        SET img_path = :img_path,
+            face_encoding = :face_encoding,
+            updated_at = :now
+        WHERE id_pegawai = :id_pegawai
+          AND status = 1
+    """)
+
+    with engine.begin() as conn:
+        result = conn.execute(sql, {
+            "id_pegawai": id_pegawai,
+            "img_path": img_url,
+            "face_encoding": encoding_to_bytes(encoding),
+            "now": get_wita()
+        })
 
-            if result.rowcount == 0:
-                raise DatabaseError("Gagal memperbarui foto pegawai")
+        if result.rowcount == 0:
+            raise DatabaseError("Gagal memperbarui foto pegawai")
 
-        return img_url
+        bump_ref_version(conn, "face_index")
 
-    finally:
-        if os.path.exists(face_path):
-            os.remove(face_path)
+    invalidate_face_cache(id_pegawai)
+    return img_url
 
 
 
 # ==================================================
 # RESET PASSWORD PEGAWAI LANGSUNG OLEH ADMIN
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def reset_password_pegawai(
     id_pegawai: int,
     password_hash: str
@@ -610,6 +682,7 @@ def reset_password_pegawai(
 # ==================================================
 # SINKRONISASI LOKASI ABSENSI PEGAWAI
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def sync_lokasi_pegawai(id_pegawai: int, id_lokasi_list: list[int]):
     with engine.begin() as conn:
 
@@ -684,11 +757,14 @@ def sync_lokasi_pegawai(id_pegawai: int, id_lokasi_list: list[int]):
                     }
                 )
 
+    invalidate_akses_pegawai(id_pegawai)
+
 
 
 # ==================================================
 # NONAKTIFKAN PEGAWAI & NONAKTIFKAN AKUN LOGIN
 # ==================================================
+@ref_writes(*PEGAWAI_TABLES)
 def soft_delete_pegawai(id_pegawai: int):
     with engine.begin() as conn:
         now = get_wita()
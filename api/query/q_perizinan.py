@@ -1,5 +1,6 @@
 from sqlalchemy import text
 from api.utils.config import engine
+from api.utils.streaming import stream_mappings
 from api.shared.helper import get_wita
 
 
@@ -145,7 +146,8 @@ def get_izin_list(
     id_departemen=None,
     id_status_pegawai=None,
     id_pegawai=None,
-    kategori_izin=None  # IZIN | SAKIT | CUTI
+    kategori_izin=None,  # IZIN | SAKIT | CUTI
+    stream=False
 ):
     sql = """
         SELECT
@@ -221,6 +223,10 @@ def get_izin_list(
 
     sql += " ORDER BY i.tgl_mulai DESC, i.created_at DESC"
 
+    # stream=True → generator chunk dari server-side cursor (response streaming)
+    if stream:
+        return stream_mappings(text(sql), params)
+
     with engine.connect() as conn:
         return conn.execute(text(sql), params).mappings().all()
 
@@ -1,4 +1,3 @@
-from datetime import timedelta
 from sqlalchemy import text
 from api.utils.config import engine
 from api.shared.helper import get_wita
@@ -357,64 +356,12 @@ def revive_absensi_manual(
 # ======================================================================
 # ENDPOINT LIHAT KEHADIRAN BULANAN SEMUA PEGAWAI (ADMIN/REKAPAN)
 # ======================================================================
-def get_pegawai_rekap(id_departemen=None, id_status_pegawai=None):
-    sql = """
-        SELECT
-            p.id_pegawai, p.nip, p.nama_lengkap, nama_panggilan, d.id_departemen, d.nama_departemen, 
-            s.id_status_pegawai, s.nama_status
-        FROM pegawai p
-        LEFT JOIN ref_departemen d
-            ON d.id_departemen = p.id_departemen
-        LEFT JOIN ref_status_pegawai s
-            ON s.id_status_pegawai = p.id_status_pegawai
-        WHERE p.status = 1
+def get_izin_intervals(start_date, end_date, id_pegawai=None):
     """
-
-    params = {}
-
-    if id_departemen:
-        sql += " AND p.id_departemen = :id_departemen"
-        params["id_departemen"] = id_departemen
-
-    if id_status_pegawai:
-        sql += " AND p.id_status_pegawai = :id_status_pegawai"
-        params["id_status_pegawai"] = id_status_pegawai
-
-    sql += " ORDER BY p.nama_panggilan ASC"
-
-    with engine.connect() as conn:
-        return conn.execute(text(sql), params).mappings().all()
-
-
-
-def get_absensi_map(start_date, end_date):
-    sql = text("""
-        SELECT
-            id_pegawai,
-            tanggal,
-            menit_terlambat
-        FROM absensi
-        WHERE status = 1
-          AND tanggal BETWEEN :start AND :end
-    """)
-
-    with engine.connect() as conn:
-        rows = conn.execute(sql, {
-            "start": start_date,
-            "end": end_date
-        }).mappings().all()
-
-    result = {}
-    for r in rows:
-        result.setdefault(r["id_pegawai"], {})[r["tanggal"]] = {
-            "menit_terlambat": r["menit_terlambat"]
-        }
-
-    return result
-
-
-def get_izin_map(start_date, end_date):
-    sql = text("""
+    Izin approved yang beririsan dengan rentang, tetap sebagai interval
+    (tidak diekspansi per hari) → bahan IzinIndex
+    """
+    sql = """
         SELECT
             id_pegawai, id_jenis_izin, tgl_mulai, tgl_selesai
         FROM izin
@@ -422,45 +369,21 @@ def get_izin_map(start_date, end_date):
           AND status_approval = 'approved'
           AND tgl_selesai >= :start
           AND tgl_mulai <= :end
-    """)
+    """
+    params = {
+        "start": start_date,
+        "end": end_date
+    }
 
-    result = {}
+    if id_pegawai:
+        sql += " AND id_pegawai = :id_pegawai"
+        params["id_pegawai"] = id_pegawai
 
-    with engine.connect() as conn:
-        rows = conn.execute(sql, {
-            "start": start_date,
-            "end": end_date
-        }).mappings().all()
-
-    for r in rows:
-        # klasifikasi jenis izin
-        if r["id_jenis_izin"] in (1, 2, 6):
-            kategori = "IZIN"
-        elif r["id_jenis_izin"] == 3:
-            kategori = "SAKIT"
-        elif r["id_jenis_izin"] in (4, 5):
-            kategori = "CUTI"
-        else:
-            continue  # abaikan jenis lain
-
-        current = r["tgl_mulai"]
-        while current <= r["tgl_selesai"]:
-            result.setdefault(r["id_pegawai"], {})[current] = kategori
-            current += timedelta(days=1)
-
-    return result
-
-
-def get_hari_libur_map(start_date, end_date):
-    sql = text("""
-        SELECT tanggal
-        FROM ref_hari_libur
-        WHERE status = 1
-          AND tanggal BETWEEN :start AND :end
-    """)
+    # izin yang lebih baru menang jika beririsan
+    sql += " ORDER BY id_izin ASC"
 
     with engine.connect() as conn:
-        return {r.tanggal for r in conn.execute(sql, {"start": start_date, "end": end_date})}
+        return conn.execute(text(sql), params).mappings().all()
 
 
 
@@ -0,0 +1,442 @@
+from calendar import monthrange
+from datetime import timedelta
+from sqlalchemy import text
+from api.utils.config import engine
+from api.utils.streaming import stream_mappings
+from api.shared.helper import get_wita
+
+
+# ======================================================================
+# SUMBER STATUS HARIAN (DIPAKAI REFRESH & CEK KONSISTENSI)
+# ======================================================================
+# Aturan sama dengan rekap bulanan lama:
+#   Minggu / hari libur → L (tidak disimpan)
+# Hari kerja dihitung dari ref_hari_libur di dalam transaksi penulis (bukan dari
+# kalender cache proses yang bisa tertinggal di worker lain) → rollup selalu
+# sesuai hari libur yang ter-commit. Kalender cache hanya untuk jalur baca.
+#   izin approved       → I (jenis 1,2,6), S (3), C (4,5)  — menang atas absensi
+#   absensi aktif       → H (+ menit_terlambat)
+#   selain itu          → A (tidak disimpan, dihitung saat baca)
+def _harian_cte(filter_pegawai: bool) -> str:
+    filter_izin = " AND i.id_pegawai = ANY(:ids)" if filter_pegawai else ""
+    filter_absensi = " AND a.id_pegawai = ANY(:ids)" if filter_pegawai else ""
+
+    return f"""
+        hari AS (
+            SELECT d::date AS tanggal
+            FROM generate_series(CAST(:start AS date), CAST(:end AS date), INTERVAL '1 day') AS d
+            WHERE EXTRACT(ISODOW FROM d) <> 7
+              AND NOT EXISTS (
+                  SELECT 1 FROM ref_hari_libur l
+                  WHERE l.status = 1
+                    AND l.tanggal = d::date
+              )
+        ),
+        sumber AS (
+            SELECT
+                i.id_pegawai,
+                h.tanggal,
+                CASE
+                    WHEN i.id_jenis_izin IN (1, 2, 6) THEN 'I'
+                    WHEN i.id_jenis_izin = 3 THEN 'S'
+                    ELSE 'C'
+                END AS status,
+                0 AS menit_terlambat,
+                1 AS prioritas,
+                i.id_izin
+            FROM izin i
+            JOIN hari h ON h.tanggal BETWEEN i.tgl_mulai AND i.tgl_selesai
+            WHERE i.status = 1
+              AND i.status_approval = 'approved'
+              AND i.id_jenis_izin IN (1, 2, 3, 4, 5, 6){filter_izin}
+
+            UNION ALL
+
+            SELECT
+                a.id_pegawai,
+                a.tanggal,
+                'H' AS status,
+                COALESCE(a.menit_terlambat, 0) AS menit_terlambat,
+                2 AS prioritas,
+                0 AS id_izin
+            FROM absensi a
+            JOIN hari h ON h.tanggal = a.tanggal
+            WHERE a.status = 1{filter_absensi}
+        ),
+        harian AS (
+            SELECT DISTINCT ON (id_pegawai, tanggal)
+                id_pegawai, tanggal, status, menit_terlambat
+            FROM sumber
+            -- izin beririsan → izin terbaru menang (sama dengan IzinIndex)
+            ORDER BY id_pegawai, tanggal, prioritas, id_izin DESC
+        )
+    """
+
+
+def _bulan_range(start_date, end_date):
+    """Perluas rentang ke awal bulan start & akhir bulan end"""
+    awal = start_date.replace(day=1)
+    akhir = end_date.replace(day=monthrange(end_date.year, end_date.month)[1])
+    return awal, akhir
+
+
+# ======================================================================
+# LOCK REFRESH (ADVISORY, SAMPAI AKHIR TRANSAKSI)
+# ======================================================================
+# Refresh yang bersamaan untuk pegawai yang sama (mis. check-in + approve izin)
+# dijalankan bergiliran: yang kedua menunggu commit yang pertama lalu menghitung
+# ulang dari data terbaru. Refresh semua pegawai (hari libur / rebuild) memegang
+# kunci global eksklusif; refresh per pegawai memegang kunci global shared.
+REKAP_LOCK_NAMESPACE = 1701
+
+
+def _lock_refresh(conn, ids):
+    if ids is None:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:ns, 0)"), {"ns": REKAP_LOCK_NAMESPACE})
+        return
+
+    conn.execute(text("SELECT pg_advisory_xact_lock_shared(:ns, 0)"), {"ns": REKAP_LOCK_NAMESPACE})
+    # urutan id tetap → dua refresh multi-pegawai tidak saling deadlock
+    conn.execute(
+        text("""
+            SELECT pg_advisory_xact_lock(:ns, id)
+            FROM unnest(CAST(:ids AS int[])) AS id
+            ORDER BY id
+        """),
+        {"ns": REKAP_LOCK_NAMESPACE, "ids": sorted(set(ids))}
+    )
+
+
+# ======================================================================
+# REFRESH INKREMENTAL (DIPANGGIL SETIAP ADA PERUBAHAN ABSENSI/IZIN/LIBUR)
+# ======================================================================
+def refresh_rekap(start_date, end_date, id_pegawai=None):
+    """
+    Hitung ulang rekap_harian pada rentang tanggal lalu total rekap_bulanan
+    untuk bulan yang tersentuh. id_pegawai: int / list[int] / None (semua pegawai).
+    Di dalam request ikut transaksi request → atomik dengan perubahan sumbernya.
+    Baris ditulis dengan upsert + hapus baris usang, di bawah advisory lock
+    per pegawai → refresh bersamaan tidak bentrok di primary key.
+    """
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+
+    ids = None
+    if id_pegawai is not None:
+        ids = [id_pegawai] if isinstance(id_pegawai, int) else list(id_pegawai)
+        if not ids:
+            return
+
+    filter_pegawai = ids is not None
+    filter_sql = " AND id_pegawai = ANY(:ids)" if filter_pegawai else ""
+    filter_harian = " AND r.id_pegawai = ANY(:ids)" if filter_pegawai else ""
+    filter_bulanan = " AND b.id_pegawai = ANY(:ids)" if filter_pegawai else ""
+    bulan_awal, bulan_akhir = _bulan_range(start_date, end_date)
+
+    params = {
+        "start": start_date,
+        "end": end_date,
+        "bulan_awal": bulan_awal,
+        "bulan_akhir": bulan_akhir,
+        "now": get_wita()
+    }
+    if filter_pegawai:
+        params["ids"] = ids
+
+    sql_isi_harian = text(f"""
+        WITH {_harian_cte(filter_pegawai)}
+        INSERT INTO rekap_harian (id_pegawai, tanggal, status, menit_terlambat, updated_at)
+        SELECT id_pegawai, tanggal, status, menit_terlambat, :now
+        FROM harian
+        ON CONFLICT (id_pegawai, tanggal) DO UPDATE
+        SET status = EXCLUDED.status,
+            menit_terlambat = EXCLUDED.menit_terlambat,
+            updated_at = EXCLUDED.updated_at
+    """)
+    # baris yang tidak lagi punya status (izin / absensi dihapus, jadi hari libur) → dibuang
+    sql_hapus_harian = text(f"""
+        WITH {_harian_cte(filter_pegawai)}
+        DELETE FROM rekap_harian r
+        WHERE r.tanggal BETWEEN :start AND :end{filter_harian}
+          AND NOT EXISTS (
+              SELECT 1 FROM harian h
+              WHERE h.id_pegawai = r.id_pegawai
+                AND h.tanggal = r.tanggal
+          )
+    """)
+    sql_isi_bulanan = text(f"""
+        INSERT INTO rekap_bulanan (
+            id_pegawai, periode, hadir, izin, sakit, cuti, total_kurang_jam, updated_at
+        )
+        SELECT
+            id_pegawai,
+            date_trunc('month', tanggal)::date AS periode,
+            COUNT(*) FILTER (WHERE status = 'H'),
+            COUNT(*) FILTER (WHERE status = 'I'),
+            COUNT(*) FILTER (WHERE status = 'S'),
+            COUNT(*) FILTER (WHERE status = 'C'),
+            COALESCE(SUM(menit_terlambat), 0),
+            :now
+        FROM rekap_harian
+        WHERE tanggal BETWEEN :bulan_awal AND :bulan_akhir{filter_sql}
+        GROUP BY id_pegawai, date_trunc('month', tanggal)
+        ON CONFLICT (id_pegawai, periode) DO UPDATE
+        SET hadir = EXCLUDED.hadir,
+            izin = EXCLUDED.izin,
+            sakit = EXCLUDED.sakit,
+            cuti = EXCLUDED.cuti,
+            total_kurang_jam = EXCLUDED.total_kurang_jam,
+            updated_at = EXCLUDED.updated_at
+    """)
+    sql_hapus_bulanan = text(f"""
+        DELETE FROM rekap_bulanan b
+        WHERE b.periode BETWEEN :bulan_awal AND :bulan_akhir{filter_bulanan}
+          AND NOT EXISTS (
+              SELECT 1 FROM rekap_harian r
+              WHERE r.id_pegawai = b.id_pegawai
+                AND r.tanggal >= b.periode
+                AND r.tanggal < b.periode + INTERVAL '1 month'
+          )
+    """)
+
+    with engine.begin() as conn:
+        _lock_refresh(conn, ids)
+        conn.execute(sql_isi_harian, params)
+        conn.execute(sql_hapus_harian, params)
+        conn.execute(sql_isi_bulanan, params)
+        conn.execute(sql_hapus_bulanan, params)
+
+
+def refresh_rekap_absensi(id_absensi: int):
+    """Refresh rekap hari absensi tersebut (status aktif maupun yang baru dihapus)"""
+    sql = text("""
+        SELECT id_pegawai, tanggal
+        FROM absensi
+        WHERE id_absensi = :id
+    """)
+    with engine.connect() as conn:
+        row = conn.execute(sql, {"id": id_absensi}).mappings().first()
+
+    if row:
+        refresh_rekap(row["tanggal"], row["tanggal"], row["id_pegawai"])
+
+
+
+# ======================================================================
+# CEK KONSISTENSI ROLLUP (CLI)
+# ======================================================================
+def cek_rekap(start_date, end_date, id_pegawai=None):
+    """
+    Bandingkan rollup tersimpan dengan hasil hitung ulang dari tabel sumber.
+    Return jumlah baris yang berbeda (harian & bulanan), 0 = konsisten.
+    """
+    bulan_awal, bulan_akhir = _bulan_range(start_date, end_date)
+    filter_pegawai = id_pegawai is not None
+    filter_sql = " AND id_pegawai = ANY(:ids)" if filter_pegawai else ""
+
+    sql_harian = text(f"""
+        WITH {_harian_cte(filter_pegawai)},
+        tersimpan AS (
+            SELECT id_pegawai, tanggal, status::text AS status, menit_terlambat
+            FROM rekap_harian
+            WHERE tanggal BETWEEN :start AND :end{filter_sql}
+        ),
+        seharusnya AS (
+            SELECT id_pegawai, tanggal, status::text AS status, menit_terlambat
+            FROM harian
+        )
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT * FROM seharusnya EXCEPT SELECT * FROM tersimpan) x)
+          + (SELECT COUNT(*) FROM (SELECT * FROM tersimpan EXCEPT SELECT * FROM seharusnya) y)
+    """)
+    sql_bulanan = text(f"""
+        WITH tersimpan AS (
+            SELECT id_pegawai, periode, hadir, izin, sakit, cuti, total_kurang_jam
+            FROM rekap_bulanan
+            WHERE periode BETWEEN :bulan_awal AND :bulan_akhir{filter_sql}
+        ),
+        seharusnya AS (
+            SELECT
+                id_pegawai,
+                date_trunc('month', tanggal)::date AS periode,
+                COUNT(*) FILTER (WHERE status = 'H')::int AS hadir,
+                COUNT(*) FILTER (WHERE status = 'I')::int AS izin,
+                COUNT(*) FILTER (WHERE status = 'S')::int AS sakit,
+                COUNT(*) FILTER (WHERE status = 'C')::int AS cuti,
+                COALESCE(SUM(menit_terlambat), 0)::int AS total_kurang_jam
+            FROM rekap_harian
+            WHERE tanggal BETWEEN :bulan_awal AND :bulan_akhir{filter_sql}
+            GROUP BY id_pegawai, date_trunc('month', tanggal)
+        )
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT * FROM seharusnya EXCEPT SELECT * FROM tersimpan) x)
+          + (SELECT COUNT(*) FROM (SELECT * FROM tersimpan EXCEPT SELECT * FROM seharusnya) y)
+    """)
+
+    params = {
+        "start": start_date,
+        "end": end_date,
+        "bulan_awal": bulan_awal,
+        "bulan_akhir": bulan_akhir
+    }
+    if filter_pegawai:
+        params["ids"] = [id_pegawai]
+
+    with engine.connect() as conn:
+        selisih_harian = conn.execute(sql_harian, params).scalar()
+        selisih_bulanan = conn.execute(sql_bulanan, params).scalar()
+
+    return {
+        "harian": selisih_harian,
+        "bulanan": selisih_bulanan
+    }
+
+
+
+# ======================================================================
+# QUERY BACA REKAP BULANAN SEMUA PEGAWAI (ADMIN/REKAPAN)
+# ======================================================================
+def get_rekap_bulanan(start_date, batas_date, id_departemen=None, id_status_pegawai=None, stream=False):
+    """
+    Satu query: pegawai aktif + status harian dari rollup s/d batas_date,
+    sebagai array sejajar (hari, kode, telat) untuk matrix rekap.
+    """
+    sql = """
+        SELECT
+            p.id_pegawai, p.nip, p.nama_lengkap, p.nama_panggilan, d.id_departemen, d.nama_departemen,
+            s.id_status_pegawai, s.nama_status,
+            rh.hari, rh.kode, rh.telat
+        FROM pegawai p
+        LEFT JOIN ref_departemen d
+            ON d.id_departemen = p.id_departemen
+        LEFT JOIN ref_status_pegawai s
+            ON s.id_status_pegawai = p.id_status_pegawai
+        LEFT JOIN LATERAL (
+            SELECT
+                array_agg(EXTRACT(DAY FROM r.tanggal)::int ORDER BY r.tanggal) AS hari,
+                array_agg(r.status::text ORDER BY r.tanggal) AS kode,
+                array_agg(r.menit_terlambat ORDER BY r.tanggal) AS telat
+            FROM rekap_harian r
+            WHERE r.id_pegawai = p.id_pegawai
+              AND r.tanggal BETWEEN :start AND :batas
+        ) rh ON TRUE
+        WHERE p.status = 1
+    """
+
+    params = {"start": start_date, "batas": batas_date}
+
+    if id_departemen:
+        sql += " AND p.id_departemen = :id_departemen"
+        params["id_departemen"] = id_departemen
+
+    if id_status_pegawai:
+        sql += " AND p.id_status_pegawai = :id_status_pegawai"
+        params["id_status_pegawai"] = id_status_pegawai
+
+    sql += " ORDER BY p.nama_panggilan ASC"
+
+    # stream=True → chunk pegawai dari server-side cursor
+    if stream:
+        return stream_mappings(text(sql), params)
+
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).mappings().all()
+
+
+
+# ======================================================================
+# QUERY REKAP RENTANG TANGGAL (TRIWULAN / TAHUNAN)
+# ======================================================================
+REKAP_RANGE_ORDER = {
+    "bulan": "pr.periode, p.nama_panggilan, p.id_pegawai",
+    "departemen": "d.nama_departemen NULLS LAST, p.id_departemen, p.nama_panggilan, p.id_pegawai, pr.periode",
+    "status_pegawai": "s.nama_status NULLS LAST, p.id_status_pegawai, p.nama_panggilan, p.id_pegawai, pr.periode",
+}
+
+
+def get_rekap_range(
+    start_date, batas_date, group_by="bulan", id_departemen=None, id_status_pegawai=None, stream=False
+):
+    """
+    Satu baris per pegawai aktif × bulan di rentang, terurut per grup.
+    Bulan yang tercakup penuh dibaca dari rekap_bulanan, bulan tepi (parsial)
+    diagregasi dari rekap_harian — semua dalam satu query.
+    """
+    # bulan penuh: [penuh_awal, penuh_akhir] (kosong jika penuh_awal > penuh_akhir)
+    penuh_awal = start_date if start_date.day == 1 else (
+        start_date.replace(day=monthrange(start_date.year, start_date.month)[1]) + timedelta(days=1)
+    )
+    akhir_bulan_batas = batas_date.replace(day=monthrange(batas_date.year, batas_date.month)[1])
+    penuh_akhir = batas_date if batas_date == akhir_bulan_batas else batas_date.replace(day=1) - timedelta(days=1)
+
+    sql = """
+        WITH periode AS (
+            SELECT generate_series(
+                date_trunc('month', CAST(:start AS date)),
+                date_trunc('month', CAST(:batas AS date)),
+                INTERVAL '1 month'
+            )::date AS periode
+        ),
+        total AS (
+            SELECT id_pegawai, periode, hadir, izin, sakit, cuti, total_kurang_jam
+            FROM rekap_bulanan
+            WHERE periode BETWEEN :penuh_awal AND :penuh_akhir
+
+            UNION ALL
+
+            SELECT
+                id_pegawai,
+                date_trunc('month', tanggal)::date AS periode,
+                COUNT(*) FILTER (WHERE status = 'H') AS hadir,
+                COUNT(*) FILTER (WHERE status = 'I') AS izin,
+                COUNT(*) FILTER (WHERE status = 'S') AS sakit,
+                COUNT(*) FILTER (WHERE status = 'C') AS cuti,
+                COALESCE(SUM(menit_terlambat), 0) AS total_kurang_jam
+            FROM rekap_harian
+            WHERE tanggal BETWEEN :start AND :batas
+              AND NOT (tanggal BETWEEN :penuh_awal AND :penuh_akhir)
+            GROUP BY id_pegawai, date_trunc('month', tanggal)
+        )
+        SELECT
+            p.id_pegawai, p.nip, p.nama_lengkap, p.nama_panggilan, p.id_departemen, d.nama_departemen,
+            p.id_status_pegawai, s.nama_status,
+            pr.periode,
+            COALESCE(t.hadir, 0) AS hadir,
+            COALESCE(t.izin, 0) AS izin,
+            COALESCE(t.sakit, 0) AS sakit,
+            COALESCE(t.cuti, 0) AS cuti,
+            COALESCE(t.total_kurang_jam, 0) AS total_kurang_jam
+        FROM pegawai p
+        CROSS JOIN periode pr
+        LEFT JOIN ref_departemen d
+            ON d.id_departemen = p.id_departemen
+        LEFT JOIN ref_status_pegawai s
+            ON s.id_status_pegawai = p.id_status_pegawai
+        LEFT JOIN total t
+            ON t.id_pegawai = p.id_pegawai
+           AND t.periode = pr.periode
+        WHERE p.status = 1
+    """
+
+    params = {
+        "start": start_date,
+        "batas": batas_date,
+        "penuh_awal": penuh_awal,
+        "penuh_akhir": penuh_akhir
+    }
+
+    if id_departemen:
+        sql += " AND p.id_departemen = :id_departemen"
+        params["id_departemen"] = id_departemen
+
+    if id_status_pegawai:
+        sql += " AND p.id_status_pegawai = :id_status_pegawai"
+        params["id_status_pegawai"] = id_status_pegawai
+
+    sql += f" ORDER BY {REKAP_RANGE_ORDER[group_by]}"
+
+    if stream:
+        return stream_mappings(text(sql), params)
+
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).mappings().all()
@@ -59,3 +59,25 @@ class DatabaseError(AppError):
             code="DATABASE_ERROR",
             status_code=500
         )
+
+
+class ServiceBusyError(AppError):
+    def __init__(self, message="Server sedang sibuk, silakan coba lagi", retry_after=3):
+        super().__init__(
+            message=message,
+            code="SERVER_BUSY",
+            status_code=503,
+            errors={"retry_after": retry_after}
+        )
+        self.retry_after = retry_after
+
+
+class FaceQualityError(AppError):
+    """Foto ditolak di tahap pre-check (blur, gelap, tanpa wajah, dsb.)"""
+    def __init__(self, message="Kualitas foto tidak memadai", reason="FACE_QUALITY", metrics=None):
+        super().__init__(
+            message=message,
+            code=reason,
+            status_code=422,
+            errors={"reason": reason, **(metrics or {})}
+        )
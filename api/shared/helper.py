@@ -5,14 +5,14 @@ import string
 import pytz
 import uuid
 import requests
-from PIL import Image
-import face_recognition
 from decimal import Decimal
 from dotenv import load_dotenv
+from time import perf_counter
 from datetime import datetime, date, time
 from werkzeug.datastructures import FileStorage
 
 from api.shared.exceptions import ValidationError
+from api.utils.metrics import observe_cdn_upload
 
 load_dotenv()
 
@@ -75,54 +75,26 @@ def serialize_value(obj):
         return obj.strftime("%H:%M")
     return obj
 
-def extract_face_grayscale(file: FileStorage, temp_dir="tmp_faces"):
-    os.makedirs(temp_dir, exist_ok=True)
-
-    # simpan file sementara
-    temp_filename = f"{uuid.uuid4().hex}.jpg"
-    temp_path = os.path.join(temp_dir, temp_filename)
-    file.save(temp_path)
-
-    # load image
-    image = face_recognition.load_image_file(temp_path)
-    face_locations = face_recognition.face_locations(image)
-
-    if not face_locations:
-        os.remove(temp_path)
-        raise ValidationError("Tidak ditemukan wajah pada gambar")
-
-    # ambil wajah pertama
-    top, right, bottom, left = face_locations[0]
-    face_image = image[top:bottom, left:right]
-
-    pil_image = Image.fromarray(face_image).convert("L")  # grayscale
-
-    face_filename = f"{uuid.uuid4().hex}.jpg"
-    face_path = os.path.join(temp_dir, face_filename)
-    pil_image.save(face_path)
-
-    os.remove(temp_path)
-    return face_path
-
-def upload_face_to_cdn(file_path: str):
+def upload_face_to_cdn(face_bytes: bytes):
     upload_url = f"{CDN_UPLOAD_URL}/wajah"
 
-    with open(file_path, "rb") as f:
-        files = {
-            "file": (
-                os.path.basename(file_path),
-                f,
-                "image/jpeg"
-            )
-        }
-        headers = {
-            "X-API-KEY": API_KEY_ABSENSI
-        }
-        res = requests.post(
-            upload_url,
-            files=files,
-            headers=headers
+    files = {
+        "file": (
+            f"{uuid.uuid4().hex}.jpg",
+            face_bytes,
+            "image/jpeg"
         )
+    }
+    headers = {
+        "X-API-KEY": API_KEY_ABSENSI
+    }
+    start = perf_counter()
+    res = requests.post(
+        upload_url,
+        files=files,
+        headers=headers
+    )
+    observe_cdn_upload(start, res.status_code)
 
     if res.status_code != 200:
         raise ValidationError(
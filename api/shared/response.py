@@ -1,14 +1,27 @@
 # api/shared/response.py
+import time
+import logging
 from http import HTTPStatus
-from api.shared.helper import serialize_value
+from flask import Response, stream_with_context
+
+from api.utils.config import SQL_METRICS_META, STREAM_BUFFER_BYTES
+from api.utils.db import defer_request_transaction
+from api.utils.json_encoder import dumps
+
+
+logger = logging.getLogger(__name__)
+
+# penanda iterator items habis
+_END = object()
 
 
 def success(data=None, message="Success", status_code=HTTPStatus.OK, meta=None):
+    # date / Decimal / RowMapping dsb. dikonversi langsung oleh encoder (api.utils.json_encoder)
     return {
         "code": status_code,
         "success": True,
         "message": message,
-        "data": serialize_value(data),
+        "data": data,
         "meta": meta
     }, status_code
 
@@ -20,3 +33,89 @@ def error(message="Terjadi kesalahan", code="GENERAL_ERROR", status_code=HTTPSta
         "code": code,
         "errors": errors
     }, status_code
+
+
+def success_stream(items, message="Success", status_code=HTTPStatus.OK, meta=None, data=None, list_key="data"):
+    """
+    Versi streaming dari success(): envelope sama, tetapi list data
+    diserialisasi per item dan dikirim bertahap (chunked transfer).
+
+    - items    : iterable / generator item (dict) untuk list data
+    - data     : dict field statis di dalam "data"; list di-stream ke data[list_key].
+                 None → "data" langsung berupa list
+    - meta     : dict atau callable tanpa argumen, dipanggil setelah item terakhir
+                 (mis. total / next_after). execution_time_ms ditambahkan otomatis.
+
+    Item pertama diambil SEBELUM header dikirim → error query / validasi di
+    chunk pertama tetap menjadi response error biasa (4xx / 5xx).
+    Error setelah itu tidak bisa mengubah status 200, jadi body ditutup
+    sebagai JSON valid dengan "success": false + "error" (success ditulis
+    di akhir envelope). Seluruh stream memakai satu koneksi + transaksi request.
+    """
+    started = time.perf_counter()
+
+    iterator = iter(items)
+    first = next(iterator, _END)
+
+    # koneksi request tetap hidup sampai body selesai (cursor + query per chunk)
+    finish_transaction = defer_request_transaction()
+
+    def generate():
+        head = dumps({"code": status_code, "message": message})
+        if data is None:
+            yield head[:-1] + b',"data":['
+        else:
+            fields = dumps({**data, list_key: None})
+            yield head[:-1] + b',"data":' + fields[:-len(b"null}")] + b"["
+
+        buffer = []
+        size = 0
+        total = 0
+        failure = None
+        selesai = False
+
+        try:
+            item = first
+            while item is not _END:
+                chunk = dumps(item)
+                buffer.append(chunk if total == 0 else b"," + chunk)
+                size += len(chunk)
+                total += 1
+
+                if size >= STREAM_BUFFER_BYTES:
+                    yield b"".join(buffer)
+                    buffer = []
+                    size = 0
+
+                item = next(iterator, _END)
+
+            meta_value = dict((meta() if callable(meta) else meta) or {})
+            selesai = True
+        except Exception:
+            logger.exception("Streaming response gagal setelah %s item", total)
+            failure = {"code": "STREAM_ERROR", "message": "Data tidak lengkap, terjadi kesalahan saat memuat data"}
+            meta_value = {"total_terkirim": total}
+        finally:
+            # error / client putus di tengah stream (GeneratorExit) → rollback
+            finish_transaction(commit=selesai)
+
+        meta_value["execution_time_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if SQL_METRICS_META:
+            from api.utils.sql_metrics import request_sql_stats
+            meta_value["sql"] = request_sql_stats()
+
+        tail = b"]" if data is None else b"]}"
+        if failure is None:
+            status = b',"success":true'
+        else:
+            status = b',"success":false,"error":' + dumps(failure)
+        yield b"".join(buffer) + tail + status + b',"meta":' + dumps(meta_value) + b"}\n"
+
+    response = Response(
+        stream_with_context(generate()),
+        status=status_code,
+        mimetype="application/json"
+    )
+    # jaring pengaman: body tidak pernah diiterasi (client putus sebelum kirim)
+    response.call_on_close(lambda: finish_transaction(commit=False))
+    return response
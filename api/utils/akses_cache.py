@@ -0,0 +1,82 @@
+# api/utils/akses_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+from api.query.q_absensi import get_akses_lokasi_pegawai
+from api.utils.config import AKSES_CACHE_TTL, AKSES_CACHE_SIZE
+from api.utils.db import on_commit
+from api.utils.ref_cache import ref_versions
+
+
+# ==================================================
+# CACHE AKSES LOKASI & WFH PER PEGAWAI
+# ==================================================
+# id_pegawai → (kadaluarsa, versi, {"lokasi_ids": frozenset, "is_wfh": bool})
+# Entry berlaku selama versi pegawai_lokasi_absensi & pegawai_wfh di ref_version
+# tidak berubah (di-poll ref_cache) → perubahan dari worker lain / langsung di DB
+# terlihat paling lambat REF_CACHE_POLL_SECONDS. TTL & ukuran (LRU) sebagai batas.
+# sync_lokasi_pegawai menghapus entry pegawai terkait setelah commit.
+AKSES_TABLES = ("pegawai_lokasi_absensi", "pegawai_wfh")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hit": 0, "miss": 0, "expired": 0, "stale": 0, "bypass": 0, "invalidated": 0}
+
+
+def get_akses_pegawai(id_pegawai: int) -> dict:
+    versi = ref_versions(*AKSES_TABLES)
+    if None in versi:
+        # versi tidak terbaca → tidak bisa memastikan cache masih benar
+        with _lock:
+            _stats["bypass"] += 1
+        return get_akses_lokasi_pegawai(id_pegawai)
+
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(id_pegawai)
+        if entry and entry[0] > now and entry[1] == versi:
+            _cache.move_to_end(id_pegawai)
+            _stats["hit"] += 1
+            return entry[2]
+        if not entry:
+            _stats["miss"] += 1
+        else:
+            _stats["stale" if entry[1] != versi else "expired"] += 1
+
+    akses = get_akses_lokasi_pegawai(id_pegawai)
+
+    with _lock:
+        _cache[id_pegawai] = (now + AKSES_CACHE_TTL, versi, akses)
+        _cache.move_to_end(id_pegawai)
+        while len(_cache) > AKSES_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return akses
+
+
+def get_allowed_lokasi_ids_cached(id_pegawai: int) -> frozenset:
+    return get_akses_pegawai(id_pegawai)["lokasi_ids"]
+
+
+def is_pegawai_wfh_cached(id_pegawai: int) -> bool:
+    return get_akses_pegawai(id_pegawai)["is_wfh"]
+
+
+def invalidate_akses_pegawai(id_pegawai: int):
+    """Hapus entry pegawai setelah transaksi penulis ter-commit (bukan sebelum)"""
+    def _drop():
+        with _lock:
+            if _cache.pop(id_pegawai, None) is not None:
+                _stats["invalidated"] += 1
+
+    on_commit(_drop)
+
+
+def akses_cache_stats() -> dict:
+    with _lock:
+        lookups = _stats["hit"] + _stats["miss"] + _stats["expired"] + _stats["stale"]
+        return {
+            **_stats,
+            "size": len(_cache),
+            "hit_rate": round(_stats["hit"] / lookups, 4) if lookups else None
+        }
@@ -3,6 +3,8 @@ import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+from api.utils.db import RequestScopedEngine
+
 
 load_dotenv()
 
@@ -10,6 +12,77 @@ load_dotenv()
 CDN_UPLOAD_URL = os.getenv("CDN_UPLOAD_URL")
 API_KEY_ABSENSI = os.getenv("API_KEY_ABSENSI")
 
+# === Konfigurasi Verifikasi Wajah === #
+# Sisi terpanjang foto (px) sebelum deteksi wajah, foto HP di-downscale ke batas ini
+FACE_MAX_SIDE = int(os.getenv("FACE_MAX_SIDE", 800))
+
+# Pre-check foto live (grayscale kecil) sebelum encoding mahal
+FACE_PRECHECK_SIDE = int(os.getenv("FACE_PRECHECK_SIDE", 400))
+FACE_MIN_SHARPNESS = float(os.getenv("FACE_MIN_SHARPNESS", 40))   # variance Laplacian
+FACE_MIN_BRIGHTNESS = float(os.getenv("FACE_MIN_BRIGHTNESS", 40))  # rata-rata 0-255
+FACE_MAX_BRIGHTNESS = float(os.getenv("FACE_MAX_BRIGHTNESS", 225))
+
+# Process pool verifikasi wajah PER WORKER gunicorn (0 = jalan inline di worker).
+# Default: core dibagi rata ke GUNICORN_WORKERS (minimal 1) → total proses dlib ≈ jumlah core
+FACE_POOL_WORKERS = int(os.getenv(
+    "FACE_POOL_WORKERS",
+    max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("GUNICORN_WORKERS", 2))))
+))
+# Jumlah job yang boleh antre (per worker gunicorn) di luar yang sedang diproses
+FACE_POOL_QUEUE = int(os.getenv("FACE_POOL_QUEUE", 2 * FACE_POOL_WORKERS))
+# Batas tunggu hasil (detik) & saran retry ke client saat antrean penuh
+FACE_POOL_TIMEOUT = int(os.getenv("FACE_POOL_TIMEOUT", 15))
+FACE_POOL_RETRY_AFTER = int(os.getenv("FACE_POOL_RETRY_AFTER", 3))
+
+# Worker "face-capable": model dlib di-load & di-warm-up saat boot (post_fork gunicorn).
+# Worker lain baru meng-import face_recognition saat benar-benar dipakai.
+FACE_WORKER = os.getenv("FACE_WORKER", "false").lower() in ("1", "true", "yes")
+
+# Cache encoding referensi dari CDN (jumlah entry & detik sebelum revalidasi ETag)
+FACE_CACHE_SIZE = int(os.getenv("FACE_CACHE_SIZE", 1024))
+FACE_CACHE_TTL = int(os.getenv("FACE_CACHE_TTL", 300))
+
+# Mode kiosk 1:N → toleransi lebih ketat dari verifikasi 1:1 (0.6)
+FACE_KIOSK_TOLERANCE = float(os.getenv("FACE_KIOSK_TOLERANCE", 0.5))
+
+# Masa berlaku token perangkat kiosk (hari), diterbitkan admin per lokasi
+KIOSK_TOKEN_EXPIRES_DAYS = int(os.getenv("KIOSK_TOKEN_EXPIRES_DAYS", 30))
+
+# === Cache Data Master (ref_*) === #
+# Selang baca ulang tabel ref_version per worker (detik) → batas telat melihat
+# perubahan dari worker lain. Jumlah entry maksimum sebelum cache dikosongkan.
+REF_CACHE_POLL_SECONDS = float(os.getenv("REF_CACHE_POLL_SECONDS", 5))
+REF_CACHE_SIZE = int(os.getenv("REF_CACHE_SIZE", 4096))
+
+# === Conditional GET (ETag) === #
+# Ganti (mis. dengan versi rilis) saat bentuk response berubah → ETag lama tidak cocok lagi
+ETAG_SALT = os.getenv("ETAG_SALT", "")
+
+# === Cache Lokasi Absensi === #
+# Cache akses lokasi & flag WFH per pegawai (detik / jumlah pegawai).
+# Kesegaran dijaga versi ref_version; TTL hanya batas atas umur entry
+AKSES_CACHE_TTL = int(os.getenv("AKSES_CACHE_TTL", 60))
+AKSES_CACHE_SIZE = int(os.getenv("AKSES_CACHE_SIZE", 10000))
+
+# === Instrumentasi SQL === #
+# Statement yang sama > N kali dalam satu request → warning N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+# Tambahkan ringkasan SQL (jumlah query, waktu DB, dsb.) ke meta response
+SQL_METRICS_META = os.getenv("SQL_METRICS_META", "false").lower() in ("1", "true", "yes")
+
+# === Streaming Response (listing besar) === #
+# Jumlah baris per fetch dari server-side cursor & ukuran buffer sebelum flush ke client
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 500))
+STREAM_BUFFER_BYTES = int(os.getenv("STREAM_BUFFER_BYTES", 64 * 1024))
+
+# === Encoder JSON Response === #
+# orjson (default, fallback ke stdlib jika tidak terpasang) | stdlib
+JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson").lower()
+
+# === Metrics Prometheus === #
+# /metrics hanya didaftarkan jika di-set, diakses dengan header "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 # === Konfigurasi Database === #
 host = os.getenv("DB_HOST", "localhost")
 port = os.getenv("DB_PORT", "5432")
@@ -20,14 +93,15 @@ password = os.getenv("DB_PASS")
 DATABASE_URL = f'postgresql+psycopg2://{username}:{password}@{host}:{port}/{dbname}'
 
 # ⛽️ Engine dibuat sekali dan dipakai ulang (pool aman)
-engine = create_engine(
+# Dibungkus RequestScopedEngine → satu koneksi + transaksi per request Flask
+engine = RequestScopedEngine(create_engine(
     DATABASE_URL,
     pool_size=10,
     max_overflow=5,
     pool_timeout=30,
     pool_recycle=1800,
     pool_pre_ping=True  # opsional tapi direkomendasikan
-)
+))
 
 def get_connection():
     return engine
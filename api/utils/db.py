@@ -0,0 +1,140 @@
+# api/utils/db.py
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+
+# ==================================================
+# KONEKSI & TRANSAKSI PER REQUEST (UNIT OF WORK)
+# ==================================================
+# Semua fungsi query memakai pola `with engine.connect()` / `with engine.begin()`.
+# Di dalam request Flask, keduanya mengembalikan SATU koneksi + transaksi yang
+# sama (disimpan di flask.g), lalu commit / rollback sekali di akhir request.
+# Di luar request (CLI, process pool, post_fork) perilakunya sama seperti engine biasa.
+class RequestScopedEngine:
+
+    def __init__(self, engine):
+        self._engine = engine
+
+    def __getattr__(self, name):
+        # pool, dispose, url, dialect, dll. diteruskan ke engine asli
+        return getattr(self._engine, name)
+
+    @property
+    def raw(self):
+        return self._engine
+
+    def _request_connection(self):
+        conn = g.get("_db_conn")
+        if conn is None:
+            # import di sini: sql_metrics butuh config yang sedang membuat engine ini
+            from api.utils.sql_metrics import record_pool_wait
+
+            start = time.perf_counter()
+            conn = self._engine.connect()
+            record_pool_wait((time.perf_counter() - start) * 1000)
+            g._db_conn = conn
+            g._db_tx = conn.begin()
+        return conn
+
+    @contextmanager
+    def _shared(self):
+        # blok `with` di query function tidak menutup / commit koneksi request
+        yield self._request_connection()
+
+    def connect(self):
+        if has_request_context():
+            return self._shared()
+        return self._engine.connect()
+
+    def begin(self):
+        if has_request_context():
+            return self._shared()
+        return self._engine.begin()
+
+
+def on_commit(callback):
+    """
+    Jalankan callback setelah transaksi request berhasil di-commit
+    (mis. invalidasi cache). Di luar request langsung dijalankan, karena
+    `engine.begin()` biasa sudah commit saat blok `with` selesai.
+    """
+    if not has_request_context():
+        callback()
+        return
+    if "_db_on_commit" not in g:
+        g._db_on_commit = []
+    g._db_on_commit.append(callback)
+
+
+def finish_request_transaction(commit: bool, state=None):
+    """
+    Commit (atau rollback) transaksi request lalu kembalikan koneksi ke pool.
+    state: flask.g milik request (default: g yang aktif)
+    """
+    state = g if state is None else state
+    conn = state.pop("_db_conn", None)
+    tx = state.pop("_db_tx", None)
+    callbacks = state.pop("_db_on_commit", None) or []
+    if conn is None:
+        return
+
+    try:
+        if tx is not None and tx.is_active:
+            if commit:
+                tx.commit()
+            else:
+                tx.rollback()
+                callbacks = []
+    finally:
+        conn.close()
+
+    for callback in callbacks:
+        callback()
+
+
+def release_request_connection():
+    """
+    Selesaikan transaksi request sekarang (commit) dan kembalikan koneksinya
+    ke pool sebelum pekerjaan lama tanpa DB (mis. job verifikasi wajah),
+    supaya koneksi tidak menganggur "idle in transaction". Query berikutnya
+    di request yang sama otomatis membuka koneksi + transaksi baru.
+    Panggil hanya setelah fase baca / validasi, sebelum ada penulisan.
+    """
+    if has_request_context():
+        finish_request_transaction(commit=True)
+
+
+def defer_request_transaction():
+    """
+    Response streaming: koneksi & transaksi request tidak diselesaikan di
+    after_request / teardown_request (keduanya jalan sebelum body dikirim),
+    tetapi tetap dipakai generator body (cursor + query per chunk).
+    Return finish(commit) untuk menyelesaikannya; aman dipanggil berulang
+    dan bisa dipanggil di luar request context (mis. call_on_close).
+    """
+    state = g._get_current_object()
+    state._db_deferred = True
+
+    def finish(commit: bool):
+        state.pop("_db_deferred", None)
+        finish_request_transaction(commit, state)
+
+    return finish
+
+
+def init_request_db(app):
+    @app.after_request
+    def _commit_request_transaction(response):
+        if g.get("_db_deferred"):
+            return response
+        # error yang sudah di-handle (AppError → 4xx/5xx) tetap di-rollback
+        finish_request_transaction(commit=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _close_request_transaction(exc):
+        if g.get("_db_deferred"):
+            return
+        # exception yang tidak tertangani: after_request tidak sempat jalan
+        finish_request_transaction(commit=False)
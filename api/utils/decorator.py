@@ -1,15 +1,25 @@
 # api/utils/decorator.py
 import time
+import hashlib
 from functools import wraps
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask import Response, g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
 
 from api.shared.exceptions import ForbiddenError
+from api.utils.config import SQL_METRICS_META, ETAG_SALT
+from api.utils.ref_cache import ref_versions
+from api.utils.sql_metrics import request_sql_stats
 
 
 def role_required(expected_roles):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
+            # tandai endpoint kiosk sebelum token diverifikasi (lihat kiosk_token_scope)
+            if expected_roles == "kiosk" or (
+                isinstance(expected_roles, (list, tuple, set)) and "kiosk" in expected_roles
+            ):
+                g._kiosk_endpoint = True
             verify_jwt_in_request()
             jwt_data = get_jwt()
             role = jwt_data.get("account_type")
@@ -23,6 +33,16 @@ def role_required(expected_roles):
         return decorator
     return wrapper
 
+def kiosk_token_scope(jwt_header, jwt_data):
+    """
+    token_verification_loader JWTManager: token kiosk (identity = id_lokasi)
+    hanya diterima di endpoint role_required("kiosk"), supaya tidak dibaca
+    sebagai id_pegawai oleh endpoint yang cukup memakai @jwt_required().
+    """
+    if jwt_data.get("account_type") == "kiosk" and not g.get("_kiosk_endpoint"):
+        raise ForbiddenError("Token kiosk hanya berlaku untuk endpoint kiosk")
+    return True
+
 def measure_execution_time(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
@@ -39,7 +59,49 @@ def measure_execution_time(fn):
                 # ⬇️ FIX UTAMA ADA DI SINI
                 meta = body.get("meta") or {}
                 meta["execution_time_ms"] = execution_time
+                if SQL_METRICS_META:
+                    meta["sql"] = request_sql_stats()
                 body["meta"] = meta
             return body, status
         return response
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def _etag_for(versi, per_user):
+    parts = [ETAG_SALT, request.path, sorted(request.args.items(multi=True)), versi]
+    if per_user:
+        parts.append(get_jwt_identity())
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_get(*tables, per_user=False):
+    """
+    ETag dari versi tabel (ref_version) + path + query string (+ identity jika
+    per_user). If-None-Match yang cocok → 304 tanpa query & serialisasi.
+    Dipasang SETELAH decorator auth (401 / 403 tetap didahulukan).
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            versi = ref_versions(*tables)
+            if None in versi:
+                # versi belum tersedia (migrasi / DB) → response biasa tanpa ETag
+                return fn(*args, **kwargs)
+
+            etag = _etag_for(versi, per_user)
+            headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+
+            # perbandingan weak (RFC 9110): proxy gzip bisa mengubah ETag jadi W/"..."
+            if request.if_none_match.contains_weak(etag):
+                return Response(status=304, headers=headers)
+
+            response = fn(*args, **kwargs)
+            if isinstance(response, Response):
+                if response.status_code == 200:
+                    response.headers.update(headers)
+                return response
+            if isinstance(response, tuple) and len(response) == 2 and response[1] == 200:
+                return response[0], response[1], headers
+            return response
+        return decorator
+    return wrapper
@@ -1,68 +1,301 @@
-import os
-import uuid
+import time
+import threading
 import requests
-import face_recognition
-from api.shared.exceptions import ValidationError
-from api.utils.config import engine
+import numpy as np
+from io import BytesIO
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps, UnidentifiedImageError
+from api.shared.exceptions import FaceQualityError, ValidationError
+from api.utils.config import (
+    engine, FACE_MAX_SIDE, FACE_CACHE_SIZE, FACE_CACHE_TTL,
+    FACE_PRECHECK_SIDE, FACE_MIN_SHARPNESS, FACE_MIN_BRIGHTNESS, FACE_MAX_BRIGHTNESS
+)
+from api.utils.face_pool import run_face_job
+from api.utils.db import release_request_connection
+from api.utils.ref_cache import bump_ref_version
 from sqlalchemy import text
 
+import face_jobs
+from face_jobs import FACE_ENCODING_DTYPE, FaceJobError, encoding_from_bytes
 
-def get_pegawai_face_path(id_pegawai: int):
+
+# Job CPU-bound (decode, deteksi, encoding dlib) ada di modul top-level
+# face_jobs agar proses pool tidak meng-import package api.
+# face_recognition sengaja di-import di dalam fungsi:
+# worker yang hanya melayani master / export tidak ikut menanggung biayanya.
+
+# Session CDN dipakai ulang → koneksi TCP/TLS tidak dibuka per request
+_cdn_session = requests.Session()
+_cdn_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_cdn_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def encoding_to_bytes(encoding) -> bytes:
+    """Serialisasi encoding wajah ke blob float32 untuk kolom BYTEA"""
+    return np.asarray(encoding, dtype=FACE_ENCODING_DTYPE).tobytes()
+
+
+# ==================================================
+# JOB WAJAH → ERROR API
+# ==================================================
+_FACE_JOB_ERRORS = {
+    "FACE_NOT_FOUND": "Wajah tidak terdeteksi, pastikan wajah terlihat jelas di kamera",
+    "FACE_MULTIPLE": "Terdeteksi lebih dari satu wajah, pastikan hanya Anda di kamera",
+}
+
+
+def _to_app_error(error: FaceJobError):
+    if error.reason in _FACE_JOB_ERRORS:
+        return FaceQualityError(_FACE_JOB_ERRORS[error.reason], reason=error.reason, metrics=error.metrics)
+    return ValidationError("File gambar tidak valid")
+
+
+def run_face_check(fn, *args):
+    """run_face_job untuk fungsi face_jobs, penolakan job → FaceQualityError / ValidationError"""
+    try:
+        return run_face_job(fn, *args)
+    except FaceJobError as e:
+        raise _to_app_error(e) from None
+
+
+def load_face_image(source, max_side: int = FACE_MAX_SIDE):
+    """Decode gambar di worker (enrollment), ValidationError jika bukan gambar"""
+    try:
+        return face_jobs.load_face_image(source, max_side)
+    except FaceJobError as e:
+        raise _to_app_error(e) from None
+
+
+def extract_reference_face(file):
+    """Deteksi + crop + encode foto enrollment di pool → (JPEG grayscale, encoding)"""
+    file.stream.seek(0)
+    return run_face_check(face_jobs.extract_reference_face, file.stream.read(), FACE_MAX_SIDE)
+
+
+# ==================================================
+# PRE-CHECK KUALITAS FOTO LIVE
+# ==================================================
+def load_precheck_image(data: bytes, side: int = FACE_PRECHECK_SIDE):
+    """Decode grayscale kecil; JPEG langsung di-decode di skala DCT yang diperkecil"""
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.draft("L", (side, side))
+            img = ImageOps.exif_transpose(img).convert("L")
+            if max(img.size) > side:
+                img.thumbnail((side, side), Image.BILINEAR)
+            return np.asarray(img)
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("File gambar tidak valid")
+
+
+def laplacian_variance(gray) -> float:
+    """Ukuran ketajaman: variance Laplacian 4-tetangga (semakin kecil semakin blur)"""
+    g = gray.astype(np.float32)
+    lap = (
+        g[1:-1, :-2] + g[1:-1, 2:] + g[:-2, 1:-1] + g[2:, 1:-1]
+        - 4.0 * g[1:-1, 1:-1]
+    )
+    return float(lap.var())
+
+
+def precheck_face_image(data: bytes):
+    """
+    Tolak foto yang jelas tidak layak sebelum memakai slot process pool:
+    gelap / over-exposure / blur → beberapa ms, hanya NumPy + PIL (tanpa dlib).
+    Deteksi wajah dilakukan di job pool (face_jobs.detect_live_faces).
+    Raise FaceQualityError dengan reason spesifik.
+    """
+    gray = load_precheck_image(data)
+
+    brightness = float(gray.mean())
+    if brightness < FACE_MIN_BRIGHTNESS:
+        raise FaceQualityError(
+            "Foto terlalu gelap, cari tempat yang lebih terang",
+            reason="FACE_TOO_DARK",
+            metrics={"brightness": round(brightness, 1)}
+        )
+    if brightness > FACE_MAX_BRIGHTNESS:
+        raise FaceQualityError(
+            "Foto terlalu terang, hindari cahaya langsung ke kamera",
+            reason="FACE_TOO_BRIGHT",
+            metrics={"brightness": round(brightness, 1)}
+        )
+
+    sharpness = laplacian_variance(gray)
+    if sharpness < FACE_MIN_SHARPNESS:
+        raise FaceQualityError(
+            "Foto buram, tahan kamera hingga fokus",
+            reason="FACE_BLURRY",
+            metrics={"sharpness": round(sharpness, 1)}
+        )
+
+
+def get_pegawai_face_data(id_pegawai: int):
     sql = text("""
-        SELECT img_path
+        SELECT img_path, face_encoding
         FROM auth_pegawai
         WHERE id_pegawai = :id
           AND status = 1
         LIMIT 1
     """)
     with engine.connect() as conn:
-        return conn.execute(sql, {"id": id_pegawai}).scalar()
+        return conn.execute(sql, {"id": id_pegawai}).mappings().first()
+
 
+def update_pegawai_face_encoding(id_pegawai: int, encoding):
+    sql = text("""
+        UPDATE auth_pegawai
+        SET face_encoding = :face_encoding
+        WHERE id_pegawai = :id
+          AND status = 1
+    """)
+    with engine.begin() as conn:
+        conn.execute(sql, {
+            "id": id_pegawai,
+            "face_encoding": encoding_to_bytes(encoding)
+        })
+        bump_ref_version(conn, "face_index")
 
-def verify_face(id_pegawai: int, image_file):
+
+def download_reference_encoding(img_url: str):
     """
-    Verifikasi wajah pegawai (FIXED & STABIL)
+    Download foto referensi dari CDN lalu hitung encoding-nya
+    (dipakai oleh perintah backfill)
     """
+    res = _cdn_session.get(img_url, timeout=10)
+    if res.status_code != 200:
+        raise ValidationError("Gagal mengambil data wajah pegawai")
 
-    img_url = get_pegawai_face_path(id_pegawai)
-    if not img_url:
-        raise ValidationError("Data wajah pegawai belum tersedia")
+    try:
+        return face_jobs.encode_reference_bytes(res.content, FACE_MAX_SIDE)
+    except FaceJobError as e:
+        raise _to_app_error(e) from None
+
+
+# ==================================================
+# CACHE ENCODING REFERENSI (LRU + REVALIDASI ETAG)
+# ==================================================
+# Hanya untuk data lama yang belum punya face_encoding di DB.
+# Key (id_pegawai, img_path) → encoding blob + validator HTTP dari CDN.
+_face_cache = OrderedDict()
+_face_cache_lock = threading.Lock()
+_face_cache_stats = {"hit": 0, "revalidated": 0, "miss": 0, "evicted": 0}
+
+
+def _count(name: str):
+    with _face_cache_lock:
+        _face_cache_stats[name] += 1
 
-    ref_path = f"/tmp/{uuid.uuid4().hex}_ref.jpg"
-    live_path = f"/tmp/{uuid.uuid4().hex}_live.jpg"
 
-    # download wajah referensi
-    res = requests.get(img_url, timeout=10)
+def face_cache_stats() -> dict:
+    with _face_cache_lock:
+        return {**_face_cache_stats, "size": len(_face_cache)}
+
+
+def invalidate_face_cache(id_pegawai: int):
+    """Dipanggil saat wajah baru di-enroll"""
+    with _face_cache_lock:
+        for key in [k for k in _face_cache if k[0] == id_pegawai]:
+            del _face_cache[key]
+
+
+def _cache_put(key, entry):
+    with _face_cache_lock:
+        _face_cache[key] = entry
+        _face_cache.move_to_end(key)
+        while len(_face_cache) > FACE_CACHE_SIZE:
+            _face_cache.popitem(last=False)
+            _face_cache_stats["evicted"] += 1
+
+
+def fetch_reference_encoding(id_pegawai: int, img_url: str):
+    """
+    Ambil encoding referensi via cache:
+    - masih fresh (FACE_CACHE_TTL) → langsung dari memori
+    - kadaluarsa → conditional GET (If-None-Match / If-Modified-Since), 304 = pakai cache
+    - belum ada / berubah → download & encode ulang di process pool
+    Return blob float32 atau None jika wajah tidak terdeteksi.
+    """
+    key = (id_pegawai, img_url)
+    with _face_cache_lock:
+        entry = _face_cache.get(key)
+        if entry:
+            _face_cache.move_to_end(key)
+
+    if entry and time.monotonic() - entry["checked_at"] < FACE_CACHE_TTL:
+        _count("hit")
+        return entry["encoding"]
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    res = _cdn_session.get(img_url, headers=headers, timeout=10)
+
+    if res.status_code == 304 and entry:
+        _count("revalidated")
+        _cache_put(key, {**entry, "checked_at": time.monotonic()})
+        return entry["encoding"]
+
     if res.status_code != 200:
         raise ValidationError("Gagal mengambil data wajah pegawai")
 
-    with open(ref_path, "wb") as f:
-        f.write(res.content)
+    _count("miss")
+    encoding = run_face_check(face_jobs.encode_reference_bytes, res.content, FACE_MAX_SIDE)
+    if encoding is None:
+        return None
+
+    blob = encoding_to_bytes(encoding)
+    _cache_put(key, {
+        "encoding": blob,
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified"),
+        "checked_at": time.monotonic()
+    })
+    return blob
+
+
+def encode_live_face(live_bytes: bytes):
+    """Encoding wajah terbesar pada foto live (mode kiosk), None jika gagal di-encode"""
+    return run_face_check(face_jobs.encode_live_face, live_bytes, FACE_MAX_SIDE)
+
+
+def verify_face(id_pegawai: int, image_file, face_data=None):
+    """
+    Verifikasi wajah pegawai terhadap encoding yang tersimpan saat enrollment.
+    Fallback ke foto CDN hanya untuk data lama yang belum di-backfill.
+    face_data (img_path, face_encoding) boleh diberikan jika sudah dimuat.
+    Transaksi request di-commit & koneksinya dilepas sebelum job wajah,
+    jadi panggil setelah validasi baca dan sebelum menulis.
+    """
 
     image_file.stream.seek(0)
-    image_file.save(live_path)
+    live_bytes = image_file.stream.read()
 
-    try:
-        known_image = face_recognition.load_image_file(ref_path)
-        unknown_image = face_recognition.load_image_file(live_path)
+    # foto jelek ditolak paling awal: sebelum query, download CDN & slot pool
+    precheck_face_image(live_bytes)
+
+    if face_data is None:
+        face_data = get_pegawai_face_data(id_pegawai)
+    if not face_data or not face_data["img_path"]:
+        raise ValidationError("Data wajah pegawai belum tersedia")
 
-        known_encodings = face_recognition.face_encodings(known_image)
-        unknown_encodings = face_recognition.face_encodings(unknown_image)
+    # semua data DB sudah dimuat → koneksi request dilepas selama
+    # download CDN & job process pool (diambil ulang oleh query berikutnya)
+    release_request_connection()
 
-        if not known_encodings or not unknown_encodings:
+    known_blob = face_data["face_encoding"]
+    if encoding_from_bytes(known_blob) is None:
+        known_blob = fetch_reference_encoding(id_pegawai, face_data["img_path"])
+        if known_blob is None:
             raise ValidationError("Wajah tidak terdeteksi dengan jelas")
+        update_pegawai_face_encoding(id_pegawai, encoding_from_bytes(known_blob))
 
-        result = face_recognition.compare_faces(
-            [known_encodings[0]],
-            unknown_encodings[0],
-            tolerance=0.6
-        )[0]
-
-        # 🧠 pastikan return bool python
-        return bool(result)
+    result = run_face_check(face_jobs.compare_live_face, live_bytes, bytes(known_blob), FACE_MAX_SIDE)
+    if result is None:
+        raise ValidationError("Wajah tidak terdeteksi dengan jelas")
 
-    finally:
-        if os.path.exists(ref_path):
-            os.remove(ref_path)
-        if os.path.exists(live_path):
-            os.remove(live_path)
+    return result
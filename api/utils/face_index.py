@@ -0,0 +1,100 @@
+# api/utils/face_index.py
+import numpy as np
+from sqlalchemy import text
+
+from api.utils.config import engine
+from api.utils.ref_cache import cached_ref
+
+from face_jobs import FACE_ENCODING_DTYPE, FACE_ENCODING_SIZE
+
+
+# ==================================================
+# INDEX ENCODING WAJAH PER LOKASI (MODE KIOSK 1:N)
+# ==================================================
+# Semua encoding yang diizinkan di satu id_lokasi disimpan sebagai matriks
+# float32 (n x 128) + norma kuadrat tiap baris, sehingga jarak ke wajah live
+# cukup satu perkalian matriks-vektor.
+#
+# Index disimpan di ref_cache dan dibangun ulang hanya jika versi berubah:
+# - "face_index"             → dinaikkan manual oleh enroll / backfill wajah
+# - pegawai                  → nama & status pegawai (trigger)
+# - pegawai_lokasi_absensi   → akses lokasi (trigger)
+# Login (UPDATE auth_pegawai.last_login_at) tidak menyentuh versi di atas.
+FACE_INDEX_TABLES = ("face_index", "pegawai", "pegawai_lokasi_absensi")
+
+
+def _load_index(conn):
+    sql = text("""
+        SELECT
+            pla.id_lokasi,
+            ap.id_pegawai,
+            p.nama_lengkap,
+            ap.face_encoding
+        FROM pegawai_lokasi_absensi pla
+        JOIN auth_pegawai ap
+          ON ap.id_pegawai = pla.id_pegawai
+         AND ap.status = 1
+        JOIN pegawai p
+          ON p.id_pegawai = pla.id_pegawai
+         AND p.status = 1
+        WHERE pla.status = 1
+          AND ap.face_encoding IS NOT NULL
+        ORDER BY pla.id_lokasi, ap.id_pegawai
+    """)
+
+    grouped = {}
+    for row in conn.execute(sql).mappings():
+        blob = bytes(row["face_encoding"])
+        if len(blob) != FACE_ENCODING_SIZE * np.dtype(FACE_ENCODING_DTYPE).itemsize:
+            continue
+        grouped.setdefault(row["id_lokasi"], []).append(
+            (row["id_pegawai"], row["nama_lengkap"], blob)
+        )
+
+    index = {}
+    for id_lokasi, items in grouped.items():
+        matrix = np.frombuffer(
+            b"".join(blob for _, _, blob in items),
+            dtype=FACE_ENCODING_DTYPE
+        ).reshape(len(items), FACE_ENCODING_SIZE)
+        index[id_lokasi] = {
+            "ids": np.array([i for i, _, _ in items], dtype=np.int64),
+            "names": [n for _, n, _ in items],
+            "matrix": matrix,
+            "sq_norms": np.einsum("ij,ij->i", matrix, matrix),
+        }
+    return index
+
+
+def _build_index():
+    with engine.connect() as conn:
+        return _load_index(conn)
+
+
+def get_lokasi_face_index(id_lokasi: int):
+    return cached_ref("face_index", FACE_INDEX_TABLES, _build_index).get(id_lokasi)
+
+
+def identify_face(id_lokasi: int, live_encoding, tolerance: float):
+    """
+    Cari pegawai terdekat untuk encoding live di lokasi tsb.
+    Return dict (id_pegawai, nama_lengkap, distance) atau None jika tidak ada yang cocok.
+    """
+    entry = get_lokasi_face_index(id_lokasi)
+    if not entry:
+        return None
+
+    live = np.asarray(live_encoding, dtype=FACE_ENCODING_DTYPE)
+    # ||a - b||² = ||a||² - 2a·b + ||b||²
+    sq_dist = entry["sq_norms"] - 2.0 * (entry["matrix"] @ live) + float(live @ live)
+    best = int(np.argmin(sq_dist))
+    distance = float(np.sqrt(max(sq_dist[best], 0.0)))
+
+    if distance > tolerance:
+        return None
+
+    return {
+        "id_pegawai": int(entry["ids"][best]),
+        "nama_lengkap": entry["names"][best],
+        "distance": round(distance, 4)
+    }
@@ -0,0 +1,127 @@
+# api/utils/face_pool.py
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import face_jobs
+from api.shared.exceptions import ServiceBusyError
+from api.utils.metrics import FACE_JOB_DURATION, FACE_JOB_REJECTED, FACE_QUEUE_DEPTH
+from api.utils.config import (
+    FACE_POOL_WORKERS, FACE_POOL_QUEUE, FACE_POOL_TIMEOUT, FACE_POOL_RETRY_AFTER
+)
+
+
+# ==================================================
+# PROCESS POOL VERIFIKASI WAJAH
+# ==================================================
+# Encoding dlib (CPU bound) dijalankan di proses terpisah supaya worker
+# gunicorn tidak terblokir. Kapasitas = worker aktif + antrean; jika penuh
+# request langsung ditolak (503 + Retry-After) daripada menumpuk.
+#
+# Pool & antrean ini milik SATU worker gunicorn: FACE_POOL_WORKERS default
+# = jumlah core / GUNICORN_WORKERS, sehingga total proses dlib ≈ jumlah core.
+# Proses pool hanya meng-import face_jobs + face_recognition (bukan package
+# api) → tidak membuat app Flask, engine DB, maupun file metrics Prometheus.
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, FACE_POOL_WORKERS + FACE_POOL_QUEUE))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # forkserver: tidak mewarisi lock / koneksi DB milik thread gunicorn
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(["face_recognition", "face_jobs"])
+            _executor = ProcessPoolExecutor(
+                max_workers=FACE_POOL_WORKERS,
+                mp_context=ctx,
+                initializer=face_jobs.warm_up_face_models
+            )
+        return _executor
+
+
+def preload_face_stack():
+    """
+    Dipanggil dari post_fork gunicorn untuk worker face-capable:
+    load model + inferensi dummy sebelum request pertama masuk,
+    sehingga check-in pertama setelah deploy tidak jadi outlier.
+    """
+    if FACE_POOL_WORKERS <= 0:
+        face_jobs.warm_up_face_models()
+        return
+
+    # satu job kosong per slot → semua proses pool di-spawn & menjalankan warm-up
+    executor = _get_executor()
+    wait([executor.submit(face_jobs.noop) for _ in range(FACE_POOL_WORKERS)])
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _release_slot(_future=None):
+    FACE_QUEUE_DEPTH.dec()
+    _slots.release()
+
+
+def _submit_face_job(fn, *args):
+    if FACE_POOL_WORKERS <= 0:
+        return fn(*args)
+
+    if not _slots.acquire(blocking=False):
+        FACE_JOB_REJECTED.inc()
+        raise ServiceBusyError(
+            f"Server sedang sibuk, coba lagi dalam {FACE_POOL_RETRY_AFTER} detik",
+            retry_after=FACE_POOL_RETRY_AFTER
+        )
+    FACE_QUEUE_DEPTH.inc()
+
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        _release_slot()
+        _reset_executor()
+        raise ServiceBusyError(retry_after=FACE_POOL_RETRY_AFTER)
+    except Exception:
+        _release_slot()
+        raise
+
+    # slot dilepas saat job benar-benar selesai, bukan saat request menyerah
+    future.add_done_callback(_release_slot)
+
+    try:
+        return future.result(timeout=FACE_POOL_TIMEOUT)
+    except FutureTimeoutError:
+        raise ServiceBusyError(
+            f"Verifikasi wajah terlalu lama, coba lagi dalam {FACE_POOL_RETRY_AFTER} detik",
+            retry_after=FACE_POOL_RETRY_AFTER
+        )
+    except BrokenProcessPool:
+        _reset_executor()
+        raise ServiceBusyError(retry_after=FACE_POOL_RETRY_AFTER)
+
+
+def run_face_job(fn, *args):
+    """
+    Jalankan fungsi face_jobs (top-level, picklable) di pool.
+    Raise ServiceBusyError jika antrean penuh / hasil terlalu lama.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = _submit_face_job(fn, *args)
+        outcome = "ok"
+        return result
+    except ServiceBusyError:
+        outcome = "busy"
+        raise
+    finally:
+        FACE_JOB_DURATION.labels(job=fn.__name__, outcome=outcome).observe(time.perf_counter() - start)
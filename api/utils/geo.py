@@ -1,6 +1,11 @@
+import numpy as np
 from math import radians, sin, cos, sqrt, atan2
 
 
+EARTH_RADIUS_M = 6371000
+DEFAULT_RADIUS_M = 50
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
     dlat = lat2 - lat1
@@ -9,33 +14,73 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
-    return 6371000 * c  # meter
+    return EARTH_RADIUS_M * c  # meter
 
 
-def find_valid_lokasi(latitude, longitude, lokasi_list):
+def build_lokasi_arrays(lokasi_list):
     """
-    Cari lokasi absensi yang valid berdasarkan radius
-    (HANYA lokasi dengan koordinat)
+    Ubah list lokasi (rows DB) jadi array NumPy siap pakai untuk haversine.
+    Lokasi tanpa koordinat dibuang; radius kosong → DEFAULT_RADIUS_M.
     """
-    for lokasi in lokasi_list:
+    rows = [
+        l for l in lokasi_list
+        if l["latitude"] is not None and l["longitude"] is not None
+    ]
+    lat = np.radians(np.array([float(l["latitude"]) for l in rows], dtype=np.float64))
+    lon = np.radians(np.array([float(l["longitude"]) for l in rows], dtype=np.float64))
+
+    return {
+        "ids": np.array([l["id_lokasi"] for l in rows], dtype=np.int64),
+        "names": [l["nama_lokasi"] for l in rows],
+        "lat": lat,
+        "lon": lon,
+        "cos_lat": np.cos(lat),
+        "radius": np.array(
+            [float(l["radius_meter"] if l["radius_meter"] is not None else DEFAULT_RADIUS_M) for l in rows],
+            dtype=np.float64
+        ),
+    }
+
+
+def distances_to(latitude, longitude, arrays):
+    """Haversine vektor: jarak (meter) titik ke semua lokasi sekaligus"""
+    lat = radians(latitude)
+    lon = radians(longitude)
+    a = (
+        np.sin((arrays["lat"] - lat) / 2) ** 2
+        + cos(lat) * arrays["cos_lat"] * np.sin((arrays["lon"] - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
 
-        if lokasi["latitude"] is None or lokasi["longitude"] is None:
-            continue
 
-        jarak = calculate_distance(
-            latitude,
-            longitude,
-            lokasi["latitude"],
-            lokasi["longitude"]
-        )
+def find_nearest_lokasi(latitude, longitude, arrays, allowed_ids=None):
+    """
+    Lokasi TERDEKAT yang radiusnya mencakup titik (opsional dibatasi allowed_ids).
+    Return dict id_lokasi, nama_lokasi, jarak atau None.
+    """
+    if not len(arrays["ids"]):
+        return None
 
-        if jarak <= lokasi.get("radius_meter", 50):
-            return {
-                "id_lokasi": lokasi["id_lokasi"],
-                "nama_lokasi": lokasi["nama_lokasi"],
-                "jarak": round(jarak, 2)
-            }
+    jarak = distances_to(latitude, longitude, arrays)
+    valid = jarak <= arrays["radius"]
+    if allowed_ids is not None:
+        valid &= np.isin(arrays["ids"], list(allowed_ids))
 
-    return None
+    candidates = np.flatnonzero(valid)
+    if not len(candidates):
+        return None
 
+    idx = candidates[np.argmin(jarak[candidates])]
+    return {
+        "id_lokasi": int(arrays["ids"][idx]),
+        "nama_lokasi": arrays["names"][idx],
+        "jarak": round(float(jarak[idx]), 2)
+    }
 
+
+def find_valid_lokasi(latitude, longitude, lokasi_list):
+    """
+    Cari lokasi absensi yang valid berdasarkan radius
+    (HANYA lokasi dengan koordinat, yang terdekat jika radius beririsan)
+    """
+    return find_nearest_lokasi(latitude, longitude, build_lokasi_arrays(lokasi_list))
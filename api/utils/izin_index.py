@@ -0,0 +1,80 @@
+from bisect import bisect_right
+from datetime import date
+
+
+# ==================================================
+# INDEX INTERVAL IZIN PER PEGAWAI
+# ==================================================
+# Izin disimpan sebagai interval [mulai, selesai] (ordinal tanggal) dalam list
+# terurut & tidak beririsan per pegawai → lookup per tanggal O(log n) dengan
+# bisect, tanpa mengekspansi sakit / cuti panjang menjadi satu entry per hari.
+
+def kategori_izin(id_jenis_izin):
+    """Klasifikasi jenis izin → IZIN / SAKIT / CUTI (None = diabaikan di rekap)"""
+    if id_jenis_izin in (1, 2, 6):
+        return "IZIN"
+    if id_jenis_izin == 3:
+        return "SAKIT"
+    if id_jenis_izin in (4, 5):
+        return "CUTI"
+    return None
+
+
+def _flatten(intervals):
+    """
+    Interval (mulai, selesai, kategori) → segmen terurut & tidak beririsan.
+    Jika beririsan, interval yang datang belakangan menang (sama seperti map lama).
+    """
+    segmen = []
+    for mulai, selesai, kategori in intervals:
+        sisa = []
+        for s, e, k in segmen:
+            if e < mulai or s > selesai:
+                sisa.append((s, e, k))
+                continue
+            if s < mulai:
+                sisa.append((s, mulai - 1, k))
+            if e > selesai:
+                sisa.append((selesai + 1, e, k))
+        sisa.append((mulai, selesai, kategori))
+        segmen = sorted(sisa)
+    return segmen
+
+
+class IzinIndex:
+
+    def __init__(self, rows):
+        """rows: id_pegawai, id_jenis_izin, tgl_mulai, tgl_selesai (urut id_izin)"""
+        grouped = {}
+        for r in rows:
+            kategori = kategori_izin(r["id_jenis_izin"])
+            if kategori is None:
+                continue
+            grouped.setdefault(r["id_pegawai"], []).append(
+                (r["tgl_mulai"].toordinal(), r["tgl_selesai"].toordinal(), kategori)
+            )
+
+        self._data = {}
+        for id_pegawai, intervals in grouped.items():
+            segmen = _flatten(intervals)
+            self._data[id_pegawai] = (
+                [s for s, _, _ in segmen],
+                [e for _, e, _ in segmen],
+                [k for _, _, k in segmen],
+            )
+
+    def status_on(self, id_pegawai, tanggal: date):
+        """Kategori izin pegawai pada tanggal tsb, None jika tidak izin"""
+        data = self._data.get(id_pegawai)
+        if not data:
+            return None
+
+        starts, ends, kategori = data
+        d = tanggal.toordinal()
+        i = bisect_right(starts, d) - 1
+        if i >= 0 and ends[i] >= d:
+            return kategori[i]
+        return None
+
+    def __contains__(self, id_pegawai):
+        return id_pegawai in self._data
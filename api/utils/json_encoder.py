@@ -0,0 +1,95 @@
+# api/utils/json_encoder.py
+import json
+import uuid
+import logging
+from decimal import Decimal
+from datetime import datetime, date, time
+
+import numpy as np
+from flask import make_response
+from sqlalchemy.engine import RowMapping
+
+from api.utils.config import JSON_ENCODER
+
+try:
+    import orjson
+except ImportError:  # opsional → fallback ke json stdlib
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# TIPE NON-JSON → NILAI JSON (sama dengan serialize_value)
+# ==================================================
+def _default(obj):
+    """
+    Dipanggil encoder hanya untuk tipe yang tidak dikenalnya, sehingga
+    dict / list hasil query tidak perlu di-copy rekursif sebelum encode.
+    """
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    # datetime dicek sebelum date (subclass)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    # jam ditampilkan HH:MM, bukan HH:MM:SS
+    if isinstance(obj, time):
+        return obj.strftime("%H:%M")
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# ==================================================
+# BACKEND ENCODER
+# ==================================================
+def _dumps_stdlib(obj) -> bytes:
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+if orjson is not None:
+    # datetime / date / time di-passthrough ke _default → format time tetap HH:MM
+    _ORJSON_OPTION = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _dumps_orjson(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTION)
+
+
+def _resolve_backend():
+    if JSON_ENCODER == "orjson":
+        if orjson is not None:
+            return "orjson", _dumps_orjson
+        logger.warning("JSON_ENCODER=orjson tetapi orjson tidak terpasang, memakai json stdlib")
+    elif JSON_ENCODER != "stdlib":
+        logger.warning("JSON_ENCODER=%s tidak dikenal, memakai json stdlib", JSON_ENCODER)
+    return "stdlib", _dumps_stdlib
+
+
+BACKEND, _dumps = _resolve_backend()
+
+
+def dumps(obj) -> bytes:
+    """Encode obj → JSON (bytes, UTF-8, tanpa spasi)"""
+    return _dumps(obj)
+
+
+# ==================================================
+# REPRESENTATION FLASK-RESTX
+# ==================================================
+def output_json(data, code, headers=None):
+    """Pengganti flask_restx.representations.output_json"""
+    resp = make_response(_dumps(data) + b"\n", code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def init_json(api):
+    """Daftarkan encoder sebagai representation application/json"""
+    api.representations["application/json"] = output_json
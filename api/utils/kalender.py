@@ -0,0 +1,118 @@
+# api/utils/kalender.py
+from datetime import date, timedelta
+
+import numpy as np
+
+from api.query.q_master import get_hari_libur_list
+from api.utils.ref_cache import cached_ref
+
+
+# ==================================================
+# KALENDER HARI KERJA (BITMAP PER TAHUN)
+# ==================================================
+# Hari kerja = bukan Minggu dan bukan ref_hari_libur. Satu bitmap per tahun
+# (bit ke-i = hari ke-i sejak 1 Januari) → jumlah hari kerja rentang apa pun
+# = popcount potongan bitmap, tanpa loop per hari.
+#
+# Bitmap disimpan di ref_cache dengan versi ref_hari_libur → CRUD hari libur
+# dari worker mana pun membuat bitmap tahun tsb di-build ulang.
+# Hanya untuk jalur BACA (absensi, rekap bulanan / range, detail rekap).
+# Penulisan rollup rekap_harian menghitung hari kerja langsung dari
+# ref_hari_libur di dalam transaksinya (api/query/q_rekap.py).
+
+class KalenderTahun:
+
+    def __init__(self, tahun: int, hari_libur=()):
+        """hari_libur: iterable date (tanggal di luar tahun ini diabaikan)"""
+        self.tahun = tahun
+        self.awal = date(tahun, 1, 1)
+        self.jumlah_hari = (date(tahun + 1, 1, 1) - self.awal).days
+
+        tanggal = np.arange(self.jumlah_hari) + np.datetime64(self.awal, "D")
+        # 1970-01-01 = Kamis → (hari + 3) % 7 memberi Senin=0 ... Minggu=6
+        libur = (tanggal.astype(np.int64) + 3) % 7 == 6
+
+        self.libur_nasional = frozenset(d for d in hari_libur if d.year == tahun)
+        if self.libur_nasional:
+            libur[[(d - self.awal).days for d in self.libur_nasional]] = True
+
+        # mask dipakai bersama antar request → read-only
+        libur.setflags(write=False)
+        self.libur = libur
+        self.bits = int.from_bytes(np.packbits(~libur, bitorder="little").tobytes(), "little")
+
+    def _offset(self, tanggal: date) -> int:
+        return (tanggal - self.awal).days
+
+    def hari_kerja(self, start_date: date, end_date: date) -> int:
+        """Jumlah hari kerja [start_date, end_date] (keduanya di tahun ini)"""
+        awal = self._offset(start_date)
+        panjang = self._offset(end_date) - awal + 1
+        if panjang <= 0:
+            return 0
+        return ((self.bits >> awal) & ((1 << panjang) - 1)).bit_count()
+
+    def libur_mask(self, start_date: date, end_date: date):
+        return self.libur[self._offset(start_date):self._offset(end_date) + 1]
+
+
+def _build_tahun(tahun: int) -> KalenderTahun:
+    return KalenderTahun(tahun, (r["tanggal"] for r in get_hari_libur_list()))
+
+
+def kalender_tahun(tahun: int) -> KalenderTahun:
+    return cached_ref(("kalender", tahun), ("ref_hari_libur",), lambda: _build_tahun(tahun))
+
+
+def _per_tahun(start_date: date, end_date: date):
+    """Pecah rentang lintas tahun → (KalenderTahun, awal, akhir) per tahun"""
+    for tahun in range(start_date.year, end_date.year + 1):
+        yield (
+            kalender_tahun(tahun),
+            max(start_date, date(tahun, 1, 1)),
+            min(end_date, date(tahun, 12, 31)),
+        )
+
+
+# ==================================================
+# API KALENDER
+# ==================================================
+def jumlah_hari_kerja(start_date: date, end_date: date) -> int:
+    """Jumlah hari kerja efektif di rentang inklusif (0 jika end < start)"""
+    if end_date < start_date:
+        return 0
+    return sum(kal.hari_kerja(s, e) for kal, s, e in _per_tahun(start_date, end_date))
+
+
+def hari_libur(start_date: date, end_date: date) -> set:
+    """Tanggal ref_hari_libur di rentang (tidak termasuk Minggu biasa)"""
+    if end_date < start_date:
+        return set()
+    return {
+        d
+        for kal, s, e in _per_tahun(start_date, end_date)
+        for d in kal.libur_nasional
+        if s <= d <= e
+    }
+
+
+def libur_mask(start_date: date, end_date: date):
+    """Mask bool per hari (True = Minggu / hari libur), indeks 0 = start_date"""
+    if end_date < start_date:
+        return np.zeros(0, dtype=bool)
+    potongan = [kal.libur_mask(s, e) for kal, s, e in _per_tahun(start_date, end_date)]
+    return potongan[0] if len(potongan) == 1 else np.concatenate(potongan)
+
+
+def hari_kerja_per_bulan(start_date: date, end_date: date) -> dict:
+    """Jumlah hari kerja per bulan → {tanggal 1 bulan: jumlah} (bulan terpotong ikut rentang)"""
+    if end_date < start_date:
+        return {}
+
+    hasil = {}
+    bulan = date(start_date.year, start_date.month, 1)
+    while bulan <= end_date:
+        bulan_depan = date(bulan.year + bulan.month // 12, bulan.month % 12 + 1, 1)
+        hasil[bulan] = jumlah_hari_kerja(max(start_date, bulan), min(end_date, bulan_depan - timedelta(days=1)))
+        bulan = bulan_depan
+    return hasil
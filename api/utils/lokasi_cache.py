@@ -0,0 +1,17 @@
+# api/utils/lokasi_cache.py
+from api.query.q_absensi import get_all_lokasi_absensi
+from api.utils.geo import build_lokasi_arrays
+from api.utils.ref_cache import cached_ref
+
+
+# ==================================================
+# CACHE LOKASI ABSENSI PER PROSES (ARRAY NUMPY)
+# ==================================================
+# Ikut versi tabel ref_lokasi_absensi di ref_cache → CRUD lokasi dari worker
+# mana pun membuat array di-build ulang (lihat api/utils/ref_cache.py).
+def get_lokasi_arrays():
+    return cached_ref(
+        "lokasi_arrays",
+        ("ref_lokasi_absensi",),
+        lambda: build_lokasi_arrays(get_all_lokasi_absensi())
+    )
@@ -0,0 +1,158 @@
+# api/utils/metrics.py
+import os
+import hmac
+import time
+import threading
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess
+)
+
+from api.utils.config import METRICS_TOKEN
+
+
+# ==================================================
+# METRICS PROMETHEUS (MULTIPROCESS GUNICORN)
+# ==================================================
+# Jika PROMETHEUS_MULTIPROC_DIR di-set, tiap worker menulis nilai metric ke
+# file di folder tsb. dan /metrics menggabungkan semua worker.
+# Gauge memakai mode "livesum" → hanya worker yang masih hidup yang dijumlah.
+# File milik worker yang mati dibersihkan child_exit (gunicorn.conf.py); proses
+# pool wajah tidak meng-import modul ini (lihat face_jobs.py) → tidak menulis file.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency request per endpoint",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Request yang sedang diproses",
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_SIZE = Gauge("db_pool_size", "Ukuran pool SQLAlchemy", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Koneksi pool yang sedang dipakai", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Koneksi overflow di atas pool_size", multiprocess_mode="livesum")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Waktu tunggu checkout koneksi dari pool",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+FACE_QUEUE_DEPTH = Gauge(
+    "face_pool_queue_depth",
+    "Job verifikasi wajah yang sedang diproses / antre",
+    multiprocess_mode="livesum"
+)
+FACE_JOB_DURATION = Histogram(
+    "face_job_duration_seconds",
+    "Durasi job wajah (termasuk antre di pool)",
+    ["job", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+FACE_JOB_REJECTED = Counter("face_job_rejected_total", "Job wajah ditolak karena pool penuh")
+
+CDN_UPLOAD_LATENCY = Histogram(
+    "cdn_upload_duration_seconds",
+    "Latency upload foto ke CDN",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+
+CACHE_EVENTS = Counter(
+    "app_cache_events",
+    "Event cache in-process (hit / miss / dst.)",
+    ["cache", "event"]
+)
+CACHE_SIZE = Gauge(
+    "app_cache_size",
+    "Jumlah entry cache in-process",
+    ["cache"],
+    multiprocess_mode="livesum"
+)
+
+# nilai stats cache terakhir yang sudah dilaporkan → counter dinaikkan selisihnya
+_cache_reported = {}
+_cache_reported_lock = threading.Lock()
+
+
+def observe_cdn_upload(start: float, status_code):
+    CDN_UPLOAD_LATENCY.labels(status=str(status_code)).observe(time.perf_counter() - start)
+
+
+def _update_process_gauges(engine):
+    pool = engine.pool
+    DB_POOL_SIZE.set(pool.size())
+    DB_POOL_CHECKED_OUT.set(pool.checkedout())
+    DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    # import di sini: modul cache ikut meng-import query layer
+    from api.utils.akses_cache import akses_cache_stats
+    from api.utils.face import face_cache_stats
+    from api.utils.ref_cache import ref_cache_stats
+
+    caches = (("akses", akses_cache_stats()), ("face_reference", face_cache_stats()), ("ref", ref_cache_stats()))
+    with _cache_reported_lock:
+        for cache, stats in caches:
+            CACHE_SIZE.labels(cache=cache).set(stats["size"])
+            for event, value in stats.items():
+                if event == "size" or not isinstance(value, int):
+                    continue
+                last = _cache_reported.get((cache, event), 0)
+                # stats di-reset di proses ini → hitung ulang dari nol
+                delta = value - last if value >= last else value
+                if delta:
+                    CACHE_EVENTS.labels(cache=cache, event=event).inc(delta)
+                _cache_reported[(cache, event)] = value
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app, engine):
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def _metrics_end(exc):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+
+        status = g.pop("_metrics_status", 500 if exc else 200)
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.labels(
+            method=request.method,
+            endpoint=endpoint,
+            status=str(status)
+        ).observe(time.perf_counter() - start)
+        _update_process_gauges(engine)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    # tanpa METRICS_TOKEN endpoint tidak didaftarkan (404) → latency per route,
+    # pool DB & statistik cache tidak terbuka publik di host API
+    if not METRICS_TOKEN:
+        return
+
+    @app.route("/metrics")
+    def metrics():
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            return Response("Unauthorized", status=401)
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,189 @@
+# api/utils/ref_cache.py
+import time
+import logging
+import threading
+from functools import wraps
+
+from flask import g, has_request_context
+from sqlalchemy import text
+
+from api.utils.config import engine, REF_CACHE_POLL_SECONDS, REF_CACHE_SIZE
+from api.utils.db import on_commit
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# CACHE READ-THROUGH DATA MASTER (ref_*) PER PROSES
+# ==================================================
+# Tiap tabel ref_* punya versi di tabel ref_version yang dinaikkan trigger
+# setiap INSERT / UPDATE / DELETE (migrations/003_ref_version.sql), jadi
+# versi ikut ter-commit / rollback bersama perubahan datanya.
+#
+# - Entry cache dicatat bersama versi tabel yang dibaca → beda versi = reload.
+# - Versi dibaca ulang dari DB paling sering tiap REF_CACHE_POLL_SECONDS
+#   (satu query kecil per worker), sehingga perubahan dari worker lain
+#   terlihat paling lambat selang itu.
+# - Worker yang menulis: request itu sendiri selalu membaca langsung dari DB,
+#   dan setelah commit versi langsung di-poll ulang (tanpa menunggu selang).
+# - Versi memakai sequence (tidak ikut rollback) → nilai versi tidak pernah
+#   dipakai ulang oleh transaksi lain.
+_lock = threading.Lock()
+_versions = {}      # nama_tabel → versi terakhir yang ter-commit
+_entries = {}       # key → (tables, versi, value)
+_state = {"polled_at": None}
+_stats = {"hit": 0, "miss": 0, "stale": 0, "bypass": 0, "poll": 0, "poll_error": 0}
+
+
+def _poll_versions():
+    # koneksi sendiri (bukan transaksi request) → hanya versi yang sudah ter-commit
+    sql = text("SELECT nama_tabel, versi FROM ref_version")
+    try:
+        with engine.raw.connect() as conn:
+            return {r.nama_tabel: r.versi for r in conn.execute(sql)}
+    except Exception:
+        logger.exception("Gagal membaca ref_version, cache master dilewati")
+        return None
+
+
+def _current_versions(tables):
+    now = time.monotonic()
+    with _lock:
+        polled_at = _state["polled_at"]
+        due = polled_at is None or now - polled_at >= REF_CACHE_POLL_SECONDS
+        if due:
+            # thread lain tidak ikut poll selama poll ini berjalan
+            _state["polled_at"] = now
+
+    if due:
+        versions = _poll_versions()
+        with _lock:
+            _stats["poll"] += 1
+            if versions is None:
+                _stats["poll_error"] += 1
+                _versions.clear()
+            else:
+                _versions.clear()
+                _versions.update(versions)
+
+    with _lock:
+        return tuple(_versions.get(t) for t in tables)
+
+
+def _dirty_tables():
+    if not has_request_context():
+        return ()
+    return g.get("_ref_dirty") or ()
+
+
+def cached_ref(key, tables, loader):
+    """
+    Ambil value dari cache, atau jalankan loader() lalu simpan.
+    tables: tabel ref_* yang dibaca loader (versi gabungannya jadi kunci validitas)
+    """
+    if any(t in _dirty_tables() for t in tables):
+        # request ini baru menulis tabel tsb (belum commit) → baca langsung
+        with _lock:
+            _stats["bypass"] += 1
+        return loader()
+
+    versi = _current_versions(tables)
+    if None in versi:
+        with _lock:
+            _stats["bypass"] += 1
+        return loader()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[1] == versi:
+            _stats["hit"] += 1
+            return entry[2]
+        _stats["stale" if entry else "miss"] += 1
+
+    value = loader()
+
+    with _lock:
+        if len(_entries) >= REF_CACHE_SIZE and key not in _entries:
+            _entries.clear()
+        _entries[key] = (tables, versi, value)
+    return value
+
+
+def ref_cached(*tables):
+    """
+    Decorator fungsi query master (read). Kunci = nama fungsi + argumen.
+    Value yang dikembalikan dipakai bersama antar request → jangan dimutasi.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            key = (fn.__module__, fn.__name__, args, tuple(sorted(kwargs.items())))
+            return cached_ref(key, tables, lambda: fn(*args, **kwargs))
+        decorator.uncached = fn
+        return decorator
+    return wrapper
+
+
+def invalidate_ref_cache(*tables):
+    """
+    Dipanggil setelah menulis tabel ref_*. Versi di DB sudah dinaikkan trigger;
+    di sini request berjalan diarahkan baca langsung, dan setelah commit
+    entry terkait dibuang + versi di-poll ulang.
+    """
+    if has_request_context():
+        g._ref_dirty = set(_dirty_tables()) | set(tables)
+
+    def _drop():
+        with _lock:
+            for key in [k for k, (t, _, _) in _entries.items() if set(t) & set(tables)]:
+                del _entries[key]
+            _state["polled_at"] = None
+
+    on_commit(_drop)
+
+
+def bump_ref_version(conn, *names):
+    """
+    Naikkan versi manual (tanpa trigger) untuk data turunan yang hanya
+    berubah lewat penulisan tertentu, mis. "face_index" (enroll wajah).
+    Ikut transaksi conn → versi baru terlihat worker lain setelah commit.
+    """
+    conn.execute(
+        text("""
+            INSERT INTO ref_version (nama_tabel)
+            SELECT unnest(CAST(:names AS varchar[]))
+            ON CONFLICT (nama_tabel) DO UPDATE
+                SET versi = nextval('ref_version_seq'),
+                    updated_at = NOW()
+        """),
+        {"names": list(names)}
+    )
+    invalidate_ref_cache(*names)
+
+
+def ref_writes(*tables):
+    """Decorator fungsi query master (create / update / delete)"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            invalidate_ref_cache(*tables)
+            return result
+        return decorator
+    return wrapper
+
+
+def ref_versions(*tables):
+    """Versi tabel ref_* yang berlaku saat ini (None = belum / gagal dibaca)"""
+    return _current_versions(tables)
+
+
+def ref_cache_stats() -> dict:
+    with _lock:
+        lookups = _stats["hit"] + _stats["miss"] + _stats["stale"]
+        return {
+            **_stats,
+            "size": len(_entries),
+            "hit_rate": round(_stats["hit"] / lookups, 4) if lookups else None
+        }
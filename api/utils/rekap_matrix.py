@@ -0,0 +1,91 @@
+import numpy as np
+from itertools import chain
+
+
+# ==================================================
+# KODE STATUS MATRIX REKAP (int8)
+# ==================================================
+# Urutan prioritas sama dengan rekap lama:
+#   belum lewat (None) > Minggu/libur (L) > izin (I/S/C) > hadir (H) > alpha (A)
+KOSONG, LIBUR, ALPHA, HADIR, IZIN, SAKIT, CUTI = range(7)
+
+LABELS = np.array([None, "L", "A", "H", "I", "S", "C"], dtype=object)
+KODE = {"L": LIBUR, "A": ALPHA, "H": HADIR, "I": IZIN, "S": SAKIT, "C": CUTI}
+
+
+def _datetime64(value):
+    return np.datetime64(value, "D")
+
+
+
+# ==================================================
+# BANGUN MATRIX PEGAWAI × HARI
+# ==================================================
+def build_status_matrix(n_pegawai, start_date, end_date, batas_date, libur, cells=None):
+    """
+    Matrix status int8 (pegawai × hari) + matrix menit terlambat.
+
+    libur : mask bool per hari (Minggu / hari libur), lihat api.utils.kalender
+    cells : (rows, cols, kode, menit) status per sel dari rollup rekap_harian
+    """
+    libur = np.asarray(libur, dtype=bool)
+    n_hari = len(libur)
+    # kolom setelah batas (bulan berjalan) → belum lewat
+    kosong = np.arange(_datetime64(start_date), _datetime64(end_date) + 1) > _datetime64(batas_date)
+
+    status = np.full((n_pegawai, n_hari), ALPHA, dtype=np.int8)
+    telat = np.zeros((n_pegawai, n_hari), dtype=np.int32)
+
+    if cells is not None:
+        rows, cols, kode, menit = cells
+        status[rows, cols] = kode
+        telat[rows, cols] = menit
+
+    status[:, libur] = LIBUR
+    status[:, kosong] = KOSONG
+    # keterlambatan hanya dihitung di hari berstatus hadir
+    telat[status != HADIR] = 0
+
+    return status, telat
+
+
+def rekap_totals(status, telat):
+    """Jumlah per pegawai (sum sepanjang sumbu hari)"""
+    return {
+        "hadir": np.count_nonzero(status == HADIR, axis=1),
+        "izin": np.count_nonzero(status == IZIN, axis=1),
+        "sakit": np.count_nonzero(status == SAKIT, axis=1),
+        "cuti": np.count_nonzero(status == CUTI, axis=1),
+        "alpha": np.count_nonzero(status == ALPHA, axis=1),
+        "total_kurang_jam": telat.sum(axis=1, dtype=np.int64),
+    }
+
+
+def daily_dicts(status):
+    """Matrix status → list dict {"1": "H", "2": "L", ...} per pegawai"""
+    keys = [str(d) for d in range(1, status.shape[1] + 1)]
+    return [dict(zip(keys, row)) for row in LABELS[status].tolist()]
+
+
+
+# ==================================================
+# INPUT DARI ROLLUP rekap_harian
+# ==================================================
+def cells_from_rollup(rows):
+    """
+    Baris get_rekap_bulanan (array hari / kode / telat per pegawai) → cells.
+    Indeks baris = urutan rows.
+    """
+    panjang = np.fromiter((len(r["hari"] or ()) for r in rows), dtype=np.int64, count=len(rows))
+    total = int(panjang.sum())
+
+    return (
+        np.repeat(np.arange(len(rows)), panjang),
+        np.fromiter(chain.from_iterable(r["hari"] or () for r in rows), dtype=np.int64, count=total) - 1,
+        np.fromiter(
+            (KODE[k] for k in chain.from_iterable(r["kode"] or () for r in rows)),
+            dtype=np.int8,
+            count=total
+        ),
+        np.fromiter(chain.from_iterable(r["telat"] or () for r in rows), dtype=np.int32, count=total),
+    )
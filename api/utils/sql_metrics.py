@@ -0,0 +1,130 @@
+# api/utils/sql_metrics.py
+import time
+import logging
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from api.utils.config import SQL_N_PLUS_ONE_THRESHOLD
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# INSTRUMENTASI SQL PER REQUEST
+# ==================================================
+# Event SQLAlchemy mencatat jumlah statement, total waktu DB, statement
+# paling lambat, dan hitungan per template SQL (deteksi N+1) ke flask.g.
+# Waktu tunggu checkout pool dicatat oleh RequestScopedEngine.
+def _stats():
+    stats = g.get("_sql_stats")
+    if stats is None:
+        stats = {
+            "count": 0,
+            "db_ms": 0.0,
+            "pool_wait_ms": 0.0,
+            "slowest_ms": 0.0,
+            "slowest_sql": None,
+            "templates": Counter()
+        }
+        g._sql_stats = stats
+    return stats
+
+
+def record_pool_wait(elapsed_ms: float):
+    from api.utils.metrics import DB_POOL_WAIT
+
+    DB_POOL_WAIT.observe(elapsed_ms / 1000)
+    if has_request_context():
+        _stats()["pool_wait_ms"] += elapsed_ms
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _record_statement(conn, statement):
+    start = conn.info["_query_start"].pop()
+    if not has_request_context():
+        return
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = _stats()
+    stats["count"] += 1
+    stats["db_ms"] += elapsed_ms
+    stats["templates"][statement] += 1
+    if elapsed_ms > stats["slowest_ms"]:
+        stats["slowest_ms"] = elapsed_ms
+        stats["slowest_sql"] = statement
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn, statement)
+
+
+def _handle_error(exception_context):
+    # statement gagal tidak memanggil after_cursor_execute → waktu mulainya
+    # diambil di sini (tetap dihitung ke stats request), kalau tidak stack
+    # _query_start di koneksi pool terus bertambah selama umur koneksi
+    conn = exception_context.connection
+    if (
+        conn is None
+        or exception_context.execution_context is None
+        or not conn.info.get("_query_start")
+    ):
+        return
+    _record_statement(conn, exception_context.statement)
+
+
+def request_sql_stats() -> dict:
+    """Ringkasan SQL request aktif (untuk meta response)"""
+    if not has_request_context():
+        return None
+
+    stats = _stats()
+    slowest = stats["slowest_sql"]
+    return {
+        "queries": stats["count"],
+        "db_ms": round(stats["db_ms"], 2),
+        "pool_wait_ms": round(stats["pool_wait_ms"], 2),
+        "slowest_ms": round(stats["slowest_ms"], 2),
+        "slowest_sql": " ".join(slowest.split())[:200] if slowest else None
+    }
+
+
+def _warn_n_plus_one(stats):
+    for statement, count in stats["templates"].items():
+        if count > SQL_N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                "Kemungkinan N+1: %s %s menjalankan statement yang sama %d kali: %s",
+                request.method, request.path, count, " ".join(statement.split())[:200]
+            )
+
+
+def init_sql_metrics(app, engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def _start_request_timer():
+        g._request_start = time.perf_counter()
+
+    @app.after_request
+    def _add_server_timing(response):
+        stats = g.get("_sql_stats")
+        timings = []
+        if stats:
+            timings.append(f'db;dur={stats["db_ms"]:.2f};desc="{stats["count"]} queries"')
+            timings.append(f'db-slowest;dur={stats["slowest_ms"]:.2f}')
+            timings.append(f'pool-wait;dur={stats["pool_wait_ms"]:.2f}')
+            _warn_n_plus_one(stats)
+
+        start = g.get("_request_start")
+        if start is not None:
+            timings.append(f"total;dur={(time.perf_counter() - start) * 1000:.2f}")
+
+        if timings:
+            response.headers.add("Server-Timing", ", ".join(timings))
+        return response
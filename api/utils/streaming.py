@@ -0,0 +1,26 @@
+# api/utils/streaming.py
+from api.utils.config import engine, STREAM_CHUNK_SIZE
+
+
+# ==================================================
+# SERVER-SIDE CURSOR UNTUK RESPONSE STREAMING
+# ==================================================
+# Di dalam request cursor memakai koneksi + transaksi request (engine.connect()),
+# sehingga query lain selama stream (mis. batch map per chunk) berjalan di
+# koneksi & snapshot yang sama. success_stream menunda penyelesaian transaksi
+# sampai body selesai dikirim (api/utils/db.py: defer_request_transaction).
+# Di luar request (CLI) memakai koneksi biasa yang ditutup saat generator selesai.
+def stream_mappings(statement, params=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield list RowMapping per chunk (stream_results + yield_per)"""
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True,
+            yield_per=chunk_size
+        ).execute(statement, params or {})
+
+        try:
+            for chunk in result.mappings().partitions():
+                yield chunk
+        finally:
+            # cursor server-side ditutup meski client memutus di tengah stream
+            result.close()
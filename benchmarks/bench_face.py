@@ -0,0 +1,297 @@
+"""
+Benchmark & regression check pipeline verifikasi wajah.
+
+Contoh:
+    python -m benchmarks.bench_face --images ./sample_faces
+    python -m benchmarks.bench_face --images ./sample_faces --save-baseline baseline.json
+    python -m benchmarks.bench_face --images ./sample_faces --baseline baseline.json --max-regression 0.2
+
+Corpus = folder berisi foto wajah (jpg/png). Tiap foto di-resize ke beberapa
+resolusi (--sizes), lalu dijalankan lewat:
+- legacy  : jalur lama (simpan ke /tmp → load_image_file → encode ulang referensi)
+- current : verify_face() / extract_reference_face() (crop + encode enrollment) versi sekarang
+DB & CDN diganti stub lokal, jadi yang terukur murni biaya pipeline wajah.
+Exit code 1 jika p95 salah satu skenario naik melebihi --max-regression
+dibanding baseline, atau jalur current lebih lambat dari jalur legacy.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import resource
+import statistics
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+
+
+# ==================================================
+# CORPUS
+# ==================================================
+def load_corpus(folder, sizes):
+    corpus = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXT):
+            continue
+        with Image.open(os.path.join(folder, name)) as img:
+            img = img.convert("RGB")
+            for size in sizes:
+                resized = img.copy()
+                resized.thumbnail((size, size))
+                buffer = BytesIO()
+                resized.save(buffer, format="JPEG", quality=90)
+                corpus.append((f"{name}@{size}", size, buffer.getvalue()))
+    if not corpus:
+        sys.exit(f"Tidak ada gambar di {folder}")
+    return corpus
+
+
+def as_file_storage(data: bytes):
+    return FileStorage(stream=BytesIO(data), filename="live.jpg", content_type="image/jpeg")
+
+
+# ==================================================
+# STUB DB & CDN
+# ==================================================
+class _StubResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+        self.headers = {}
+
+
+def install_stubs(reference_bytes, with_encoding):
+    """verify_face tanpa DB & CDN: referensi diambil dari memori lokal"""
+    import api.utils.face as face
+    from face_jobs import encode_reference_face
+
+    encoding = encode_reference_face(face.load_face_image(reference_bytes))
+    blob = face.encoding_to_bytes(encoding) if with_encoding else None
+
+    face.get_pegawai_face_data = lambda id_pegawai: {
+        "img_path": "stub://reference.jpg",
+        "face_encoding": blob
+    }
+    face.update_pegawai_face_encoding = lambda id_pegawai, encoding: None
+    face._cdn_session.get = lambda url, headers=None, timeout=None: _StubResponse(reference_bytes)
+
+
+# ==================================================
+# JALUR LAMA (TEMP FILE) SEBAGAI PEMBANDING
+# ==================================================
+def legacy_verify(reference_bytes, live_bytes):
+    import face_recognition
+
+    ref_path = f"/tmp/{uuid.uuid4().hex}_ref.jpg"
+    live_path = f"/tmp/{uuid.uuid4().hex}_live.jpg"
+    with open(ref_path, "wb") as f:
+        f.write(reference_bytes)
+    as_file_storage(live_bytes).save(live_path)
+    try:
+        known = face_recognition.face_encodings(face_recognition.load_image_file(ref_path))
+        unknown = face_recognition.face_encodings(face_recognition.load_image_file(live_path))
+        if not known or not unknown:
+            return None
+        return bool(face_recognition.compare_faces([known[0]], unknown[0], tolerance=0.6)[0])
+    finally:
+        for path in (ref_path, live_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def legacy_extract(live_bytes, temp_dir="/tmp/tmp_faces"):
+    import face_recognition
+
+    os.makedirs(temp_dir, exist_ok=True)
+    temp_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}.jpg")
+    as_file_storage(live_bytes).save(temp_path)
+    image = face_recognition.load_image_file(temp_path)
+    locations = face_recognition.face_locations(image)
+    os.remove(temp_path)
+    if not locations:
+        return None
+    top, right, bottom, left = locations[0]
+    face_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}.jpg")
+    Image.fromarray(image[top:bottom, left:right]).convert("L").save(face_path)
+    # enrollment sekarang ikut menyimpan encoding crop → legacy ikut encode
+    face_recognition.face_encodings(face_recognition.load_image_file(face_path))
+    os.remove(face_path)
+    return face_path
+
+
+def current_verify(live_bytes):
+    from api.shared.exceptions import FaceQualityError, ValidationError
+    from api.utils.face import verify_face
+
+    # ditolak (gelap / blur / wajah tidak tepat satu) → None, sama seperti legacy
+    try:
+        return verify_face(0, as_file_storage(live_bytes))
+    except (ValidationError, FaceQualityError):
+        return None
+
+
+def current_extract(live_bytes):
+    from api.shared.exceptions import FaceQualityError, ValidationError
+    from api.utils.face import extract_reference_face
+
+    try:
+        return extract_reference_face(as_file_storage(live_bytes))
+    except (ValidationError, FaceQualityError):
+        return None
+
+
+# ==================================================
+# PENGUKURAN
+# ==================================================
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def summarize(latencies_ms, wall_s, rejected=0):
+    return {
+        "calls": len(latencies_ms),
+        "rejected": rejected,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+        "throughput_per_core": round(len(latencies_ms) / wall_s / (os.cpu_count() or 1), 3),
+    }
+
+
+def timed(fn, arg):
+    """(latency ms, ditolak?) — kedua jalur return None untuk foto yang ditolak"""
+    start = time.perf_counter()
+    result = fn(arg)
+    return (time.perf_counter() - start) * 1000, result is None
+
+
+def run_single(fn, payloads, repeat):
+    fn(payloads[0])  # warm-up (load model, pool, dsb.)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            samples.append(timed(fn, payload))
+    wall_s = time.perf_counter() - start
+    return summarize([ms for ms, _ in samples], wall_s, sum(r for _, r in samples))
+
+
+def run_burst(fn, payloads, repeat, concurrency):
+    jobs = [p for _ in range(repeat) for p in payloads]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda p: timed(fn, p), jobs))
+    wall_s = time.perf_counter() - start
+    return summarize([ms for ms, _ in samples], wall_s, sum(r for _, r in samples))
+
+
+def peak_rss_mb():
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"self_mb": round(self_kb / 1024, 1), "children_mb": round(child_kb / 1024, 1)}
+
+
+def compare_with_legacy(results, max_regression):
+    """Jalur current tidak boleh lebih lambat dari jalur temp-file lama"""
+    failures = []
+    for key, current in results.items():
+        if ".current." not in key:
+            continue
+        legacy = results.get(key.replace(".current.", ".legacy."))
+        if not legacy or not legacy["p95_ms"]:
+            continue
+        ratio = current["p95_ms"] / legacy["p95_ms"] - 1
+        if ratio > max_regression:
+            failures.append(
+                f"{key}: p95 {current['p95_ms']} ms vs legacy {legacy['p95_ms']} ms (+{ratio:.0%})"
+            )
+    return failures
+
+
+def compare_baseline(results, baseline, max_regression):
+    failures = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        ratio = current["p95_ms"] / previous["p95_ms"] - 1
+        if ratio > max_regression:
+            failures.append(
+                f"{key}: p95 {previous['p95_ms']} → {current['p95_ms']} ms (+{ratio:.0%})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="Folder corpus foto wajah")
+    parser.add_argument("--reference", help="Foto referensi (default: gambar pertama corpus)")
+    parser.add_argument("--sizes", default="480,800,1600,3000", help="Sisi terpanjang (px), dipisah koma")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-legacy", action="store_true", help="Hanya ukur jalur current")
+    parser.add_argument("--baseline", help="File JSON hasil --save-baseline sebelumnya")
+    parser.add_argument("--save-baseline", help="Simpan hasil run ini sebagai baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Batas kenaikan p95 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    corpus = load_corpus(args.images, sizes)
+
+    if args.reference:
+        with open(args.reference, "rb") as f:
+            reference_bytes = f.read()
+    else:
+        reference_bytes = corpus[0][2]
+
+    install_stubs(reference_bytes, with_encoding=True)
+
+    scenarios = {
+        "verify.current": current_verify,
+        "extract.current": current_extract,
+    }
+    if not args.skip_legacy:
+        scenarios["verify.legacy"] = lambda live: legacy_verify(reference_bytes, live)
+        scenarios["extract.legacy"] = legacy_extract
+
+    results = {}
+    for size in sizes:
+        payloads = [data for _, s, data in corpus if s == size]
+        for name, fn in scenarios.items():
+            results[f"{name}.single@{size}"] = run_single(fn, payloads, args.repeat)
+            results[f"{name}.burst@{size}"] = run_burst(fn, payloads, args.repeat, args.concurrency)
+
+    report = {
+        "cpu_count": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "peak_rss": peak_rss_mb(),
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = compare_with_legacy(results, args.max_regression)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare_baseline(results, json.load(f), args.max_regression)
+
+    if failures:
+        print("\nREGRESI LATENCY:", *failures, sep="\n  ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
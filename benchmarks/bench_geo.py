@@ -0,0 +1,115 @@
+"""
+Micro-benchmark pencocokan geofence lokasi absensi.
+
+Contoh:
+    python -m benchmarks.bench_geo
+    python -m benchmarks.bench_geo --counts 10,100,1000,10000 --queries 2000
+
+Membandingkan:
+- legacy     : loop Python + calculate_distance per lokasi (find_valid_lokasi lama)
+- vectorized : satu haversine NumPy atas array dari cache lokasi
+Hasil vectorized dicek sama dengan lokasi valid terdekat versi loop.
+"""
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from api.utils.geo import calculate_distance, build_lokasi_arrays, find_nearest_lokasi
+
+
+# titik tengah area uji (Mataram) & sebaran lokasi ± ~20 km
+CENTER_LAT, CENTER_LON = -8.583069, 116.320251
+SPREAD_DEG = 0.2
+
+
+def make_lokasi(count, rng):
+    lat = CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG, count)
+    lon = CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG, count)
+    radius = rng.integers(50, 500, count)
+    return [
+        {
+            "id_lokasi": i + 1,
+            "nama_lokasi": f"Lokasi {i + 1}",
+            "latitude": float(lat[i]),
+            "longitude": float(lon[i]),
+            "radius_meter": int(radius[i])
+        }
+        for i in range(count)
+    ]
+
+
+def make_queries(lokasi, count, rng):
+    """Separuh titik di sekitar lokasi (match), separuh acak (kebanyakan miss)"""
+    queries = []
+    for i in range(count):
+        if i % 2 == 0:
+            l = lokasi[rng.integers(len(lokasi))]
+            queries.append((l["latitude"] + rng.normal(0, 0.001), l["longitude"] + rng.normal(0, 0.001)))
+        else:
+            queries.append((
+                CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+                CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG)
+            ))
+    return queries
+
+
+def legacy_nearest(latitude, longitude, lokasi_list):
+    """Loop Python; menyimpan yang terdekat agar hasil bisa dibandingkan"""
+    best = None
+    for lokasi in lokasi_list:
+        jarak = calculate_distance(latitude, longitude, lokasi["latitude"], lokasi["longitude"])
+        if jarak <= lokasi["radius_meter"] and (best is None or jarak < best[1]):
+            best = (lokasi["id_lokasi"], jarak)
+    return best[0] if best else None
+
+
+def per_call_us(fn, queries):
+    start = time.perf_counter()
+    results = [fn(lat, lon) for lat, lon in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", default="10,100,1000,10000", help="Jumlah lokasi, dipisah koma")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    report = {}
+    mismatches = 0
+
+    for count in [int(c) for c in args.counts.split(",") if c]:
+        lokasi = make_lokasi(count, rng)
+        queries = make_queries(lokasi, args.queries, rng)
+
+        start = time.perf_counter()
+        arrays = build_lokasi_arrays(lokasi)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_us, legacy_ids = per_call_us(lambda lat, lon: legacy_nearest(lat, lon, lokasi), queries)
+        vector_us, vector_res = per_call_us(lambda lat, lon: find_nearest_lokasi(lat, lon, arrays), queries)
+
+        vector_ids = [r["id_lokasi"] if r else None for r in vector_res]
+        mismatches += sum(a != b for a, b in zip(legacy_ids, vector_ids))
+
+        report[count] = {
+            "cache_build_ms": round(build_ms, 3),
+            "legacy_us": round(legacy_us, 2),
+            "vectorized_us": round(vector_us, 2),
+            "speedup": round(legacy_us / vector_us, 1) if vector_us else None,
+            "matched": sum(1 for r in vector_ids if r is not None),
+        }
+
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        print(f"\nHASIL BERBEDA dengan loop legacy: {mismatches} titik")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
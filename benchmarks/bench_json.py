@@ -0,0 +1,162 @@
+"""
+Benchmark encode JSON untuk response terbesar.
+
+Contoh:
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --pegawai 10000 --lembur 50000
+
+Payload (sintetis, bentuk sama dengan endpoint):
+- rekap_bulanan : /presensi/rekap-bulanan (total + daily 31 hari per pegawai)
+- all_data      : /pegawai/all-data (profil lengkap + pendidikan + lokasi)
+- lembur        : /lembur (date, time, datetime, Decimal per baris)
+
+Membandingkan:
+- legacy : serialize_value (copy rekursif) + json.dumps (output_json bawaan RESTX)
+- stdlib : json.dumps dengan default hook (api.utils.json_encoder, fallback)
+- orjson : orjson.dumps dengan default hook (api.utils.json_encoder, default)
+Output ketiga versi dicek identik setelah di-decode.
+"""
+import sys
+import json
+import time
+import uuid
+import argparse
+from decimal import Decimal
+from datetime import date, datetime, time as dt_time, timedelta
+
+import numpy as np
+
+from api.shared.helper import serialize_value
+from api.utils import json_encoder
+
+
+def envelope(data):
+    return {"code": 200, "success": True, "message": "Success", "data": data, "meta": {"execution_time_ms": 1.0}}
+
+
+def make_rekap_bulanan(count, rng):
+    labels = np.array(["H", "H", "H", "A", "I", "S", "C", "L"], dtype=object)
+    status = labels[rng.integers(0, len(labels), (count, 31))].tolist()
+    keys = [str(d) for d in range(1, 32)]
+    return {
+        "bulan": "2026-03",
+        "total_hari": 31,
+        "data": [
+            {
+                "id_pegawai": i, "nip": f"{19900000 + i}", "nama": f"Pegawai {i}",
+                "nama_departemen": "Operasional", "status_pegawai": "Tetap",
+                "hadir": 20, "izin": 1, "sakit": 0, "cuti": 1, "alpha": 2, "total_kurang_jam": 35,
+                "daily": dict(zip(keys, status[i]))
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def make_all_data(count, rng):
+    lahir = date(1980, 1, 1)
+    return [
+        {
+            "id_pegawai": i, "nip": f"{19900000 + i}", "nama": f"Pegawai {i}", "nama_panggilan": f"P{i}",
+            "tanggal_lahir": lahir + timedelta(days=int(rng.integers(0, 9000))),
+            "tanggal_masuk": date(2020, 1, 1) + timedelta(days=i % 1500),
+            "gaji_pokok": Decimal("5500000.00"),
+            "jam_masuk": dt_time(8, 0), "jam_pulang": dt_time(17, 0),
+            "uuid_akun": uuid.UUID(int=i),
+            "created_at": datetime(2024, 5, 1, 8, 30, 15, 123456),
+            "departemen": {"id_departemen": i % 12, "nama_departemen": "Operasional"},
+            "pendidikan": [
+                {"jenjang": "S1", "institusi": "Universitas", "tahun_lulus": 2010, "ipk": Decimal("3.45")},
+                {"jenjang": "SMA", "institusi": "SMA Negeri", "tahun_lulus": 2006, "ipk": None},
+            ],
+            "lokasi": [{"id_lokasi": 1, "nama_lokasi": "Kantor", "latitude": Decimal("-3.3194"),
+                        "longitude": Decimal("114.5908"), "radius_meter": 100}],
+        }
+        for i in range(count)
+    ]
+
+
+def make_lembur(count, rng):
+    menit = rng.integers(30, 300, count).tolist()
+    return [
+        {
+            "id_lembur": i, "id_pegawai": i % 2000, "nama_panggilan": f"P{i % 2000}", "nip": f"{19900000 + i}",
+            "nama_departemen": "Operasional", "jenis_lembur": "Hari kerja",
+            "tanggal": date(2026, 3, 1 + i % 31),
+            "jam_mulai": dt_time(17, 0), "jam_selesai": dt_time(17 + menit[i] // 60, menit[i] % 60),
+            "menit_lembur": menit[i], "total_bayaran": Decimal(menit[i] * 500) / 3,
+            "status_approval": "approved", "keterangan": "Closing bulanan",
+            "created_at": datetime(2026, 3, 1, 20, 0) + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def encode_legacy(body):
+    return (json.dumps(serialize_value(body)) + "\n").encode()
+
+
+def encode_stdlib(body):
+    return json_encoder._dumps_stdlib(body) + b"\n"
+
+
+def encode_orjson(body):
+    return json_encoder._dumps_orjson(body) + b"\n"
+
+
+def timed_ms(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pegawai", type=int, default=5000, help="Jumlah pegawai (rekap_bulanan & all_data)")
+    parser.add_argument("--lembur", type=int, default=20000, help="Jumlah baris lembur")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    payloads = {
+        "rekap_bulanan": envelope(make_rekap_bulanan(args.pegawai, rng)),
+        "all_data": envelope(make_all_data(args.pegawai, rng)),
+        "lembur": envelope(make_lembur(args.lembur, rng)),
+    }
+
+    encoders = {"legacy": encode_legacy, "stdlib": encode_stdlib}
+    if json_encoder.orjson is not None:
+        encoders["orjson"] = encode_orjson
+
+    report = {}
+    mismatches = []
+
+    for name, body in payloads.items():
+        row = {}
+        outputs = {}
+        for label, fn in encoders.items():
+            ms, outputs[label] = timed_ms(lambda: fn(body), args.repeat)
+            row[f"{label}_ms"] = round(ms, 2)
+
+        row["bytes_legacy"] = len(outputs["legacy"])
+        row["bytes_fast"] = len(outputs[list(encoders)[-1]])
+        row["speedup"] = round(row["legacy_ms"] / row[f"{list(encoders)[-1]}_ms"], 1)
+        report[name] = row
+
+        expected = json.loads(outputs["legacy"])
+        mismatches += [f"{name}/{label}" for label, out in outputs.items() if json.loads(out) != expected]
+
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        print(f"\nHASIL BERBEDA dengan encoder legacy: {', '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
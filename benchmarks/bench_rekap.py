@@ -0,0 +1,258 @@
+"""
+Benchmark klasifikasi rekap bulanan (pegawai × hari).
+
+Contoh:
+    python -m benchmarks.bench_rekap
+    python -m benchmarks.bench_rekap --counts 500,2000,10000 --berjalan
+
+Membandingkan:
+- legacy : loop Python per pegawai per hari + lookup dict absensi / izin (rekap-bulanan lama)
+- matrix : matrix int8 pegawai × hari dari sel absensi + izin dan mask libur (api.utils.rekap_matrix)
+Output kedua versi (total & daily) dicek identik.
+"""
+import sys
+import json
+import time
+import argparse
+from calendar import monthrange
+from datetime import date, timedelta
+
+import numpy as np
+
+from api.utils.kalender import KalenderTahun
+from api.utils.rekap_matrix import CUTI, HADIR, IZIN, SAKIT, build_status_matrix, daily_dicts, rekap_totals
+
+
+TAHUN, BULAN = 2026, 3
+HARI_LIBUR = {date(2026, 3, 19), date(2026, 3, 20), date(2026, 3, 31)}
+
+# id_jenis_izin → kode matrix (jenis lain diabaikan)
+KODE_JENIS_IZIN = {1: IZIN, 2: IZIN, 6: IZIN, 3: SAKIT, 4: CUTI, 5: CUTI}
+
+
+def make_data(count, start_date, end_date, rng):
+    """Absensi ~85% hari, izin ~10% pegawai (sebagian lintas bulan, jenis 7 diabaikan)"""
+    pegawai_ids = rng.permutation(np.arange(1, count + 1) * 3)
+    n_hari = (end_date - start_date).days + 1
+
+    hadir = rng.random((count, n_hari)) < 0.85
+    rows, cols = np.nonzero(hadir)
+    absensi = {
+        "id_pegawai": pegawai_ids[rows],
+        "tanggal": np.datetime64(start_date) + cols,
+        "menit_terlambat": np.where(rng.random(len(rows)) < 0.2, rng.integers(1, 90, len(rows)), 0),
+    }
+
+    izin_rows = np.flatnonzero(rng.random(count) < 0.1)
+    mulai = rng.integers(-5, n_hari, len(izin_rows))
+    izin = {
+        "id_pegawai": pegawai_ids[izin_rows],
+        "tgl_mulai": np.datetime64(start_date) + mulai,
+        "tgl_selesai": np.datetime64(start_date) + mulai + rng.integers(0, 10, len(izin_rows)),
+        "id_jenis_izin": rng.integers(1, 8, len(izin_rows)),
+    }
+    return pegawai_ids, absensi, izin
+
+
+def to_legacy_maps(absensi, izin):
+    """Bentuk dict seperti get_absensi_map / get_izin_map lama"""
+    absensi_map = {}
+    for id_pegawai, tanggal, menit in zip(
+        absensi["id_pegawai"].tolist(), absensi["tanggal"].tolist(), absensi["menit_terlambat"].tolist()
+    ):
+        absensi_map.setdefault(id_pegawai, {})[tanggal] = {"menit_terlambat": menit}
+
+    izin_map = {}
+    for id_pegawai, mulai, selesai, jenis in zip(
+        izin["id_pegawai"].tolist(), izin["tgl_mulai"].tolist(),
+        izin["tgl_selesai"].tolist(), izin["id_jenis_izin"].tolist()
+    ):
+        if jenis in (1, 2, 6):
+            kategori = "IZIN"
+        elif jenis == 3:
+            kategori = "SAKIT"
+        elif jenis in (4, 5):
+            kategori = "CUTI"
+        else:
+            continue
+        current = mulai
+        while current <= selesai:
+            izin_map.setdefault(id_pegawai, {})[current] = kategori
+            current += timedelta(days=1)
+
+    return absensi_map, izin_map
+
+
+def legacy_rekap(pegawai_ids, absensi_map, izin_map, hari_libur, start_date, end_date, batas):
+    """Salinan inner loop PresensiRekapBulananResource sebelum matrix"""
+    hasil = []
+    for id_pegawai in pegawai_ids:
+        daily = {}
+        hadir = izin = sakit = cuti = alpha = 0
+        total_kurang_jam = 0
+
+        current = start_date
+        while current <= end_date:
+            day = str(current.day)
+
+            if current > batas:
+                daily[day] = None
+            elif current.weekday() == 6 or current in hari_libur:
+                daily[day] = "L"
+            elif current in izin_map.get(id_pegawai, {}):
+                kategori = izin_map[id_pegawai][current]
+                if kategori == "IZIN":
+                    daily[day] = "I"
+                    izin += 1
+                elif kategori == "SAKIT":
+                    daily[day] = "S"
+                    sakit += 1
+                elif kategori == "CUTI":
+                    daily[day] = "C"
+                    cuti += 1
+            elif current in absensi_map.get(id_pegawai, {}):
+                daily[day] = "H"
+                hadir += 1
+                total_kurang_jam += absensi_map[id_pegawai][current].get("menit_terlambat") or 0
+            else:
+                daily[day] = "A"
+                alpha += 1
+
+            current += timedelta(days=1)
+
+        hasil.append({
+            "hadir": hadir, "izin": izin, "sakit": sakit, "cuti": cuti, "alpha": alpha,
+            "total_kurang_jam": total_kurang_jam, "daily": daily
+        })
+    return hasil
+
+
+def day_index(start_date, tanggal):
+    """Array tanggal (date / datetime64) → indeks kolom relatif start_date"""
+    return (np.asarray(tanggal, dtype="datetime64[D]") - np.datetime64(start_date, "D")).astype(np.int64)
+
+
+def row_index(pegawai_ids, ids):
+    """id_pegawai → indeks baris matrix, valid=False untuk id yang tidak ada di pegawai_ids"""
+    order = np.argsort(pegawai_ids, kind="stable")
+    pos = np.minimum(np.searchsorted(pegawai_ids, ids, sorter=order), len(pegawai_ids) - 1)
+    rows = order[pos]
+    return rows, pegawai_ids[rows] == ids
+
+
+def izin_cells(rows, col_mulai, col_selesai, kode, n_hari):
+    """Rentang izin inklusif → sel (rows, cols, kode, menit=0) tanpa loop Python"""
+    col_mulai = np.maximum(col_mulai, 0)
+    col_selesai = np.minimum(col_selesai, n_hari - 1)
+    panjang = np.maximum(col_selesai - col_mulai + 1, 0)
+
+    total = int(panjang.sum())
+    offset = np.arange(total) - np.repeat(np.cumsum(panjang) - panjang, panjang)
+    return (
+        np.repeat(rows, panjang),
+        np.repeat(col_mulai, panjang) + offset,
+        np.repeat(kode, panjang),
+        np.zeros(total, dtype=np.int64),
+    )
+
+
+def matrix_rekap(pegawai_ids, absensi, izin, libur, start_date, end_date, batas):
+    rows, valid = row_index(pegawai_ids, absensi["id_pegawai"])
+    hadir = (
+        rows[valid],
+        day_index(start_date, absensi["tanggal"][valid]),
+        np.full(int(valid.sum()), HADIR, dtype=np.int8),
+        absensi["menit_terlambat"][valid],
+    )
+
+    kode = np.array([KODE_JENIS_IZIN.get(j, -1) for j in izin["id_jenis_izin"].tolist()], dtype=np.int8)
+    izin_rows, izin_valid = row_index(pegawai_ids, izin["id_pegawai"])
+    izin_valid &= kode >= 0
+    izin = izin_cells(
+        izin_rows[izin_valid],
+        day_index(start_date, izin["tgl_mulai"][izin_valid]),
+        day_index(start_date, izin["tgl_selesai"][izin_valid]),
+        kode[izin_valid],
+        len(libur),
+    )
+
+    # sel yang sama: izin menang atas hadir, izin belakangan menang (seperti rollup)
+    gabung = [np.concatenate(kolom) for kolom in zip(hadir, izin)]
+    flat = gabung[0] * len(libur) + gabung[1]
+    _, terakhir = np.unique(flat[::-1], return_index=True)
+    pilih = len(flat) - 1 - terakhir
+    cells = tuple(kolom[pilih] for kolom in gabung)
+
+    status, telat = build_status_matrix(
+        len(pegawai_ids), start_date, end_date, batas, libur, cells=cells
+    )
+    totals = {k: v.tolist() for k, v in rekap_totals(status, telat).items()}
+    daily = daily_dicts(status)
+
+    return [
+        {
+            "hadir": totals["hadir"][i], "izin": totals["izin"][i], "sakit": totals["sakit"][i],
+            "cuti": totals["cuti"][i], "alpha": totals["alpha"][i],
+            "total_kurang_jam": totals["total_kurang_jam"][i], "daily": daily[i]
+        }
+        for i in range(len(pegawai_ids))
+    ]
+
+
+def timed_ms(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", default="500,2000,10000", help="Jumlah pegawai, dipisah koma")
+    parser.add_argument("--berjalan", action="store_true", help="Simulasi bulan berjalan (batas tgl 15)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    start_date = date(TAHUN, BULAN, 1)
+    end_date = date(TAHUN, BULAN, monthrange(TAHUN, BULAN)[1])
+    batas = date(TAHUN, BULAN, 15) if args.berjalan else end_date
+    libur = KalenderTahun(TAHUN, HARI_LIBUR).libur_mask(start_date, end_date)
+
+    report = {}
+    mismatches = 0
+
+    for count in [int(c) for c in args.counts.split(",") if c]:
+        pegawai_ids, absensi, izin = make_data(count, start_date, end_date, rng)
+        absensi_map, izin_map = to_legacy_maps(absensi, izin)
+        ids = pegawai_ids.tolist()
+
+        legacy_ms, legacy = timed_ms(
+            lambda: legacy_rekap(ids, absensi_map, izin_map, HARI_LIBUR, start_date, end_date, batas),
+            args.repeat
+        )
+        matrix_ms, matrix = timed_ms(
+            lambda: matrix_rekap(pegawai_ids, absensi, izin, libur, start_date, end_date, batas),
+            args.repeat
+        )
+        mismatches += sum(a != b for a, b in zip(legacy, matrix))
+
+        report[count] = {
+            "legacy_ms": round(legacy_ms, 2),
+            "matrix_ms": round(matrix_ms, 2),
+            "speedup": round(legacy_ms / matrix_ms, 1) if matrix_ms else None,
+        }
+
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        print(f"\nHASIL BERBEDA dengan loop legacy: {mismatches} pegawai")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# face_jobs.py
+"""
+Job wajah CPU-bound yang dijalankan di process pool (api/utils/face_pool.py).
+
+Sengaja berada di luar package `api`: proses pool & forkserver cukup
+meng-import modul ini + face_recognition, tanpa menjalankan api/__init__
+(app Flask, engine DB, metrics Prometheus). Karena itu modul ini TIDAK
+boleh meng-import `api.*`. Penolakan dikirim balik sebagai FaceJobError
+lalu diterjemahkan ke error API oleh api.utils.face.
+"""
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# face_recognition (dlib + file model) di-import di dalam fungsi:
+# worker gunicorn yang hanya memakai helper di sini tidak ikut me-load model.
+
+# Encoding dlib selalu 128 dimensi, disimpan sebagai float32 (512 byte)
+FACE_ENCODING_DTYPE = np.float32
+FACE_ENCODING_SIZE = 128
+
+
+class FaceJobError(Exception):
+    """Penolakan dari job (reason: INVALID_IMAGE, FACE_NOT_FOUND, FACE_MULTIPLE)"""
+    def __init__(self, reason, metrics=None):
+        super().__init__(reason, metrics)
+        self.reason = reason
+        self.metrics = metrics or {}
+
+
+def encoding_from_bytes(blob):
+    """Kebalikan dari encoding_to_bytes, None jika blob kosong / rusak"""
+    if not blob:
+        return None
+
+    encoding = np.frombuffer(bytes(blob), dtype=FACE_ENCODING_DTYPE)
+    if encoding.size != FACE_ENCODING_SIZE:
+        return None
+
+    return encoding.astype(np.float64)
+
+
+def load_face_image(source, max_side: int):
+    """
+    Decode gambar langsung di memori (bytes / stream) ke array RGB uint8.
+    - Orientasi EXIF dari kamera HP dinormalkan
+    - Foto besar di-downscale ke max_side agar deteksi HOG tetap murah
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            img = img.convert("RGB")
+            if max_side and max(img.size) > max_side:
+                img.thumbnail((max_side, max_side), Image.BILINEAR)
+            return np.asarray(img)
+    except (UnidentifiedImageError, OSError):
+        raise FaceJobError("INVALID_IMAGE")
+
+
+def detect_live_faces(image, single_face: bool = True):
+    """
+    Deteksi HOG pada foto live (upsample 1 = sama dengan face_encodings
+    bawaan). Lokasi yang ditemukan dipakai ulang untuk encoding → deteksi
+    hanya sekali. Raise FaceJobError jika tidak ada / lebih dari satu wajah.
+    """
+    import face_recognition
+
+    locations = face_recognition.face_locations(image, number_of_times_to_upsample=1)
+    if not locations:
+        raise FaceJobError("FACE_NOT_FOUND")
+    if single_face and len(locations) > 1:
+        raise FaceJobError("FACE_MULTIPLE", {"faces": len(locations)})
+    return locations
+
+
+def encode_reference_face(image):
+    """
+    Hitung encoding wajah referensi (hasil crop grayscale enrollment).
+    Jika detector gagal menemukan wajah di crop, seluruh frame dianggap wajah.
+    """
+    import face_recognition
+
+    encodings = face_recognition.face_encodings(image)
+    if encodings:
+        return encodings[0]
+
+    height, width = image.shape[:2]
+    encodings = face_recognition.face_encodings(
+        image,
+        known_face_locations=[(0, width, height, 0)]
+    )
+    return encodings[0] if encodings else None
+
+
+def extract_reference_face(data: bytes, max_side: int):
+    """
+    Foto enrollment: deteksi wajah pertama, crop jadi JPEG grayscale (yang
+    diunggah ke CDN) lalu encode crop tsb. Return (jpeg_bytes, encoding),
+    encoding None jika crop gagal di-encode.
+    """
+    import face_recognition
+
+    image = load_face_image(data, max_side)
+    face_locations = face_recognition.face_locations(image)
+    if not face_locations:
+        raise FaceJobError("FACE_NOT_FOUND")
+
+    # ambil wajah pertama
+    top, right, bottom, left = face_locations[0]
+    face_image = Image.fromarray(image[top:bottom, left:right]).convert("L")  # grayscale
+
+    buffer = BytesIO()
+    face_image.save(buffer, format="JPEG")
+    face_bytes = buffer.getvalue()
+
+    return face_bytes, encode_reference_face(load_face_image(face_bytes, max_side))
+
+
+def encode_reference_bytes(data: bytes, max_side: int):
+    """Decode + encode foto referensi"""
+    return encode_reference_face(load_face_image(data, max_side))
+
+
+def compare_live_face(live_bytes: bytes, known_blob: bytes, max_side: int, tolerance: float = 0.6):
+    """
+    Encode foto live lalu bandingkan dengan encoding referensi.
+    Raise FaceJobError jika jumlah wajah tidak tepat satu,
+    return None jika wajah tidak bisa di-encode.
+    """
+    import face_recognition
+
+    unknown_image = load_face_image(live_bytes, max_side)
+    locations = detect_live_faces(unknown_image)
+    unknown_encodings = face_recognition.face_encodings(unknown_image, known_face_locations=locations)
+    if not unknown_encodings:
+        return None
+
+    result = face_recognition.compare_faces(
+        [encoding_from_bytes(known_blob)],
+        unknown_encodings[0],
+        tolerance=tolerance
+    )[0]
+
+    # 🧠 pastikan return bool python
+    return bool(result)
+
+
+def encode_live_face(live_bytes: bytes, max_side: int):
+    """
+    Encode wajah terbesar (paling dekat kamera) pada foto live, untuk mode kiosk.
+    Raise FaceJobError jika tidak ada wajah, None jika gagal di-encode.
+    """
+    import face_recognition
+
+    image = load_face_image(live_bytes, max_side)
+    # kiosk boleh menangkap orang lain di belakang → cukup ada wajah
+    locations = detect_live_faces(image, single_face=False)
+
+    largest = max(locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+    encodings = face_recognition.face_encodings(image, known_face_locations=[largest])
+    return encodings[0] if encodings else None
+
+
+def warm_up_face_models():
+    """Paksa load model dlib + jalankan satu inferensi dummy (initializer pool)"""
+    import face_recognition
+
+    dummy = np.zeros((64, 64, 3), dtype=np.uint8)
+    face_recognition.face_locations(dummy)
+    face_recognition.face_encodings(dummy, known_face_locations=[(0, 64, 64, 0)])
+
+
+def noop():
+    return None
@@ -0,0 +1,46 @@
+# gunicorn.conf.py
+# Jalankan: gunicorn -c gunicorn.conf.py api:app
+# Worker yang melayani absensi / enrollment wajah diberi FACE_WORKER=true
+# agar model dlib sudah hangat sebelum request pertama.
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+
+
+def post_fork(server, worker):
+    from api.utils.config import FACE_WORKER
+
+    if not FACE_WORKER:
+        return
+
+    from api.utils.face_pool import preload_face_stack
+
+    try:
+        preload_face_stack()
+        server.log.info("Worker %s: model wajah siap", worker.pid)
+    except Exception:
+        # gagal warm-up tidak boleh mematikan worker, model akan di-load saat dipakai
+        server.log.exception("Worker %s: gagal warm-up model wajah", worker.pid)
+
+
+# ==================================================
+# METRICS PROMETHEUS MULTIPROCESS
+# ==================================================
+# Set PROMETHEUS_MULTIPROC_DIR (mis. /tmp/webberkah-metrics) agar /metrics
+# menjumlahkan semua worker.
+def on_starting(server):
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # sisa file dari run sebelumnya membuat counter / histogram salah
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,3 @@
+-- Encoding wajah 128-d (float32, 512 byte) hasil enrollment
+ALTER TABLE auth_pegawai
+    ADD COLUMN IF NOT EXISTS face_encoding BYTEA;
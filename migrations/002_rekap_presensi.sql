@@ -0,0 +1,33 @@
+-- Rollup status presensi per pegawai per hari KERJA (Minggu & hari libur tidak disimpan → "L")
+-- status: H = hadir, I = izin, S = sakit, C = cuti. Hari kerja tanpa baris → "A" (alpha)
+CREATE TABLE IF NOT EXISTS rekap_harian (
+    id_pegawai      INTEGER     NOT NULL,
+    tanggal         DATE        NOT NULL,
+    status          CHAR(1)     NOT NULL,
+    menit_terlambat INTEGER     NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMP   NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id_pegawai, tanggal)
+);
+
+-- refresh hari libur (semua pegawai di satu tanggal) & agregasi per bulan
+CREATE INDEX IF NOT EXISTS idx_rekap_harian_tanggal
+    ON rekap_harian (tanggal);
+
+-- Total per pegawai per bulan (periode = tanggal 1), alpha dihitung saat baca
+-- karena bergantung pada jumlah hari kerja yang sudah lewat
+CREATE TABLE IF NOT EXISTS rekap_bulanan (
+    id_pegawai       INTEGER    NOT NULL,
+    periode          DATE       NOT NULL,
+    hadir            INTEGER    NOT NULL DEFAULT 0,
+    izin             INTEGER    NOT NULL DEFAULT 0,
+    sakit            INTEGER    NOT NULL DEFAULT 0,
+    cuti             INTEGER    NOT NULL DEFAULT 0,
+    total_kurang_jam INTEGER    NOT NULL DEFAULT 0,
+    updated_at       TIMESTAMP  NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id_pegawai, periode)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rekap_bulanan_periode
+    ON rekap_bulanan (periode);
+
+-- Backfill setelah migrasi: flask rekap rebuild --dari 2024-01-01
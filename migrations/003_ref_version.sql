@@ -0,0 +1,44 @@
+-- Versi data master (ref_*) untuk invalidasi cache lintas worker (api/utils/ref_cache.py)
+-- Versi diambil dari sequence: tidak ikut rollback → nilai tidak pernah dipakai ulang
+CREATE SEQUENCE IF NOT EXISTS ref_version_seq;
+
+CREATE TABLE IF NOT EXISTS ref_version (
+    nama_tabel  VARCHAR(64) PRIMARY KEY,
+    versi       BIGINT      NOT NULL DEFAULT nextval('ref_version_seq'),
+    updated_at  TIMESTAMP   NOT NULL DEFAULT NOW()
+);
+
+-- Naikkan versi tabel sekali per statement INSERT / UPDATE / DELETE / TRUNCATE
+CREATE OR REPLACE FUNCTION bump_ref_version() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO ref_version (nama_tabel)
+    VALUES (TG_TABLE_NAME)
+    ON CONFLICT (nama_tabel) DO UPDATE
+        SET versi = nextval('ref_version_seq'),
+            updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tabel TEXT;
+BEGIN
+    FOREACH tabel IN ARRAY ARRAY[
+        'ref_status_pegawai', 'ref_departemen', 'ref_jabatan', 'ref_level_jabatan',
+        'ref_jam_kerja', 'ref_lokasi_absensi', 'ref_jenis_izin', 'ref_jenis_lembur',
+        'ref_lembur_rule', 'ref_hari_libur'
+    ]
+    LOOP
+        INSERT INTO ref_version (nama_tabel) VALUES (tabel)
+        ON CONFLICT (nama_tabel) DO NOTHING;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_ref_version ON %I', tabel);
+        EXECUTE format(
+            'CREATE TRIGGER trg_ref_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_ref_version()',
+            tabel
+        );
+    END LOOP;
+END $$;
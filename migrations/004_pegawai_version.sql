@@ -0,0 +1,34 @@
+-- Versi tabel pegawai di ref_version (trigger dari 003_ref_version.sql)
+-- Dipakai ETag endpoint GET /pegawai/* (api/utils/decorator.py: conditional_get)
+DO $$
+DECLARE
+    tabel TEXT;
+BEGIN
+    FOREACH tabel IN ARRAY ARRAY[
+        'pegawai', 'pegawai_pribadi', 'pegawai_rekening', 'pegawai_pendidikan',
+        'pegawai_lokasi_absensi', 'auth_pegawai'
+    ]
+    LOOP
+        INSERT INTO ref_version (nama_tabel) VALUES (tabel)
+        ON CONFLICT (nama_tabel) DO NOTHING;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_ref_version ON %I', tabel);
+        CONTINUE WHEN tabel = 'auth_pegawai';
+
+        EXECUTE format(
+            'CREATE TRIGGER trg_ref_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_ref_version()',
+            tabel
+        );
+    END LOOP;
+END $$;
+
+-- auth_pegawai: hanya kolom yang tampil di response /pegawai/*.
+-- Login (last_login_at, updated_at) & backfill face_encoding tidak menaikkan versi,
+-- sehingga login tidak ikut membatalkan ETag semua endpoint /pegawai/*.
+-- Listing yang menampilkan last_login_at memakai versi "auth_login" (007).
+CREATE TRIGGER trg_ref_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF id_pegawai, username, kode_pemulihan, img_path, status
+    ON auth_pegawai
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_ref_version();
@@ -0,0 +1,5 @@
+-- Versi manual index wajah kiosk (api/utils/face_index.py), dinaikkan hanya oleh
+-- enroll / backfill face_encoding (api/utils/ref_cache.py: bump_ref_version).
+-- Perubahan nama / status pegawai & akses lokasi memakai versi tabelnya sendiri (004).
+INSERT INTO ref_version (nama_tabel) VALUES ('face_index')
+ON CONFLICT (nama_tabel) DO NOTHING;
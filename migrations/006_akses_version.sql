@@ -0,0 +1,10 @@
+-- Versi pegawai_wfh di ref_version (trigger dari 003_ref_version.sql)
+-- Dipakai cache akses lokasi & WFH per pegawai (api/utils/akses_cache.py) bersama
+-- versi pegawai_lokasi_absensi (004) → perubahan langsung di DB ikut terlihat semua worker.
+INSERT INTO ref_version (nama_tabel) VALUES ('pegawai_wfh')
+ON CONFLICT (nama_tabel) DO NOTHING;
+
+DROP TRIGGER IF EXISTS trg_ref_version ON pegawai_wfh;
+CREATE TRIGGER trg_ref_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON pegawai_wfh
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_ref_version();
@@ -0,0 +1,5 @@
+-- Versi manual login pegawai, dinaikkan update_pegawai_last_login (api/query/q_auth.py).
+-- Ikut ETag /pegawai/all-data & /pegawai/akun yang menampilkan last_login_at;
+-- endpoint /pegawai/* lain tidak terpengaruh login.
+INSERT INTO ref_version (nama_tabel) VALUES ('auth_login')
+ON CONFLICT (nama_tabel) DO NOTHING;